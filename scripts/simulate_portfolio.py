@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Replay the portfolio orchestration policy over exported S1-S7 backtest trades.
+
+    python scripts/simulate_portfolio.py \
+        --trades S1=user_data/backtest_results/S1_test.json S3=... S7=... \
+        --profile balanced --equity-out equity.csv --summary portfolio_summary.json
+
+Trades are loaded with freqtrade's ``load_backtest_data`` (``.json`` or
+``.zip`` exports). Each strategy's position slots default to the
+``max_open_trades`` of its config stub. ``--vol-proxy`` takes a CSV of
+``date,value`` rows (e.g. BTC 1h ATR%) for the volatility regime switch.
+Prints the summary and per-rule intervention counts.
+
+Several ``--profile`` names and/or ``--grid FIELD=V1,V2 ...`` overrides of the
+first profile are evaluated together in one :class:`ProfileSweep` pass::
+
+    python scripts/simulate_portfolio.py --trades S1=... S7=... \
+        --profile balanced conservative aggressive \
+        --grid leverage=1.5,2.5,3.5 max_open_trades=6,10,14 --summary sweep.csv
+
+The sweep's ``--equity-out`` has one daily equity column per variant and
+``--summary`` is a CSV with one row per variant. ``--verify`` also replays
+every variant on its own and exits non-zero if its metrics differ from its
+row in the mixed sweep.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "user_data", "strategies"))
+
+from freqtrade.data.btanalysis import load_backtest_data  # noqa: E402
+
+from strategy_support.portfolio import PortfolioPolicy, PortfolioSimulator, ProfileSweep, profile_variants  # noqa: E402
+
+DEFAULT_POLICY = os.path.join(ROOT, "user_data", "configs", "portfolio_orchestration_profiles.yaml")
+
+
+def stub_slots(strategies) -> dict:
+    slots = {}
+    for strategy in strategies:
+        path = os.path.join(ROOT, "user_data", "configs", f"{strategy}_config_stub.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                slots[strategy] = int(json.load(f).get("max_open_trades", 3))
+    return slots
+
+
+def parse_grid(items) -> dict:
+    axes = {}
+    for item in items:
+        field, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"expected FIELD=V1,V2,..., got {item!r}")
+        axes[field] = [json.loads(value) for value in values.split(",")]
+    return axes
+
+
+def verify_variants(policy, variants: dict, options: dict, trades: dict, result) -> list:
+    """Names of the variants whose metrics alone differ from their row of the mixed sweep ``result``."""
+    mismatched = []
+    for name, settings in variants.items():
+        alone = ProfileSweep(policy, {name: settings}, **options).run(trades).metrics.loc[name]
+        mixed = result.metrics.loc[name]
+        if not np.allclose(alone.to_numpy(dtype=float), mixed.to_numpy(dtype=float), rtol=1e-9, atol=0.0):
+            print(f"{name}: alone {alone.to_dict()} != in sweep {mixed.to_dict()}", file=sys.stderr)
+            mismatched.append(name)
+    return mismatched
+
+
+def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--trades", nargs="+", required=True, metavar="SX=PATH", help="strategy id and its backtest export")
+    p.add_argument("--policy", default=DEFAULT_POLICY)
+    p.add_argument("--profile", nargs="+", default=["balanced"], help="one or more deployment profiles")
+    p.add_argument("--grid", nargs="*", default=[], metavar="FIELD=V1,V2",
+                   help="sweep these deployment profile fields around the first --profile")
+    p.add_argument("--initial-equity", type=float, default=10000.0)
+    p.add_argument("--min-order-notional", type=float, default=5.0)
+    p.add_argument("--vol-proxy", help="CSV with date,value columns")
+    p.add_argument("--equity-out", help="write the equity curve(s) to this CSV")
+    p.add_argument("--summary", help="write the summary to this file (JSON; CSV for a sweep)")
+    p.add_argument("--verify", action="store_true",
+                   help="also replay each sweep variant alone and fail if its result differs from the sweep's")
+    args = p.parse_args()
+
+    trades = {}
+    for item in args.trades:
+        strategy, _, path = item.partition("=")
+        if not path:
+            p.error(f"expected SX=PATH, got {item!r}")
+        trades[strategy] = load_backtest_data(path)
+
+    vol_proxy = None
+    if args.vol_proxy:
+        frame = pd.read_csv(args.vol_proxy, parse_dates=["date"])
+        vol_proxy = frame.set_index(pd.to_datetime(frame["date"], utc=True))["value"]
+
+    policy = PortfolioPolicy.from_yaml(args.policy)
+    options = dict(initial_equity=args.initial_equity, min_order_notional=args.min_order_notional,
+                   slots=stub_slots(trades), vol_proxy=vol_proxy)
+    if len(args.profile) == 1 and not args.grid:
+        result = PortfolioSimulator(policy, profile=args.profile[0], **options).run(trades)
+        summary = result.summary()
+        print(json.dumps(summary, indent=2))
+        if args.equity_out:
+            result.equity.to_csv(args.equity_out, index=False)
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+        return 0
+
+    try:
+        variants = {name: {"base": name} for name in args.profile}
+        if args.grid:
+            variants.update(profile_variants(args.profile[0], **parse_grid(args.grid)))
+        sweep = ProfileSweep(policy, variants, **options)
+    except ValueError as err:
+        p.error(str(err))
+    result = sweep.run(trades)
+    summary = result.summary().sort_values("final_equity", ascending=False)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(summary[["final_equity", "return", "max_drawdown", "trades_taken"]])
+    if args.equity_out:
+        result.equity.to_csv(args.equity_out)
+    if args.summary:
+        summary.to_csv(args.summary)
+    if args.verify:
+        mismatched = verify_variants(policy, variants, options, trades, result)
+        print(f"{len(variants) - len(mismatched)}/{len(variants)} variants match their replay alone")
+        return 1 if mismatched else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,414 @@
 #!/usr/bin/env python3
-"""Validate backtest train/test reports for overfit and drawdown gates."""
+"""Validate backtest train/test reports for overfit and drawdown gates.
+
+Single mode checks one strategy's train/test pair. Thresholds come from the
+flags, or from the strategy's tier when they are omitted. Batch mode
+(``--manifest``) checks every entry of a JSON manifest in a process pool:
+
+    [
+        {"strategy": "S1", "train": "..._train.json", "test": "..._test.json"},
+        {"strategy": "S4", "train": "...", "test": "...", "tier": "progressive", "label": "2024H2"}
+    ]
+
+``tier`` defaults to the strategy's tier from ``TIER_BY_STRATEGY``, ``metrics``
+to ``--metrics``, and ``label`` (e.g. the test timerange) only tags the entry
+in the output.
+``--summary`` writes all results as JSON. Both modes exit non-zero if any gate
+fails or a report cannot be read.
+
+Reports are read incrementally, so ``--export trades`` outputs of any size
+(plain ``.json`` or freqtrade's ``.zip``) are never loaded whole: the summary
+numbers are picked out of the first strategy block while the trade list is
+skipped. ``--metrics trades`` instead recomputes the metrics from that trade
+list with NumPy, keeping only close time and profit per trade.
+"""
 
 import argparse
+import io
 import json
+import os
+import re
 import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
 
+import numpy as np
 
-def load_metrics(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+# Tier gates from VALIDATION_COMMANDS.md section 1.
+TIERS = {
+    "conservative": {"max_dd": 0.10, "max_profit_factor_delta": 0.55, "max_winrate_delta": 0.10},
+    "progressive": {"max_dd": 0.12, "max_profit_factor_delta": 0.65, "max_winrate_delta": 0.12},
+    "aggressive": {"max_dd": 0.16, "max_profit_factor_delta": 0.80, "max_winrate_delta": 0.15},
+}
+TIER_BY_STRATEGY = {
+    "S1": "conservative", "S3": "conservative", "S5": "conservative",
+    "S4": "progressive", "S6": "progressive", "S8": "progressive",
+    "S2": "aggressive", "S7": "aggressive", "S9": "aggressive", "S10": "aggressive",
+}
+TIER_ALIASES = {"event": "aggressive", "aggressive/event": "aggressive"}
 
-    strategy = data.get("strategy", {})
-    if strategy:
-        first = next(iter(strategy.values()))
-    else:
-        first = data
 
+SUMMARY_KEYS = ("winrate", "profit_factor", "max_drawdown_account", "max_drawdown", "expectancy",
+                "total_trades", "trades", "starting_balance")
+
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+_INCOMPLETE = object()
+_AFTER_VALUE = frozenset(",:]} \t\n\r")
+
+
+class JsonStream:
+    """
+    Minimal pull parser over a text stream.
+
+    Values are decoded with the C JSON scanner once they are fully buffered;
+    containers that are not (a multi-megabyte trade list) are walked element by
+    element instead, so the buffer never grows past one chunk plus one element.
+    """
+
+    def __init__(self, handle, chunk_size: int = 1 << 20):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        more = self.handle.read(self.chunk_size)
+        if not more:
+            return False
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"malformed JSON: expected {char!r} near offset {self.pos}")
+        self.pos += 1
+
+    def _decode(self):
+        """Decode the value at ``pos`` if it is complete in the buffer, else return ``_INCOMPLETE``."""
+        try:
+            value, end = _DECODER.raw_decode(self.buf, self.pos)
+        except json.JSONDecodeError:
+            return _INCOMPLETE
+        # A value (or key) is followed by a separator; without one, a number ("1" of "1.5") may be cut short.
+        if end == len(self.buf) or self.buf[end] not in _AFTER_VALUE:
+            return _INCOMPLETE
+        self.pos = end
+        return value
+
+    def read_value(self):
+        """Decode the next value; it is buffered whole, so use it for small values only."""
+        if not self.peek():
+            raise ValueError("malformed JSON: unexpected end of input")
+        while True:
+            value = self._decode()
+            if value is not _INCOMPLETE:
+                return value
+            if not self._fill():
+                value, self.pos = _DECODER.raw_decode(self.buf, self.pos)
+                return value
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char in ("{", "[") and self._decode() is _INCOMPLETE:
+            if char == "{":
+                for _key in self.members():
+                    self.skip_value()
+            else:
+                for _ in self.items():
+                    self.skip_value()
+        elif char not in ("{", "["):
+            self.read_value()
+
+    def read_string(self) -> str:
+        if self.peek() != '"':
+            raise ValueError(f"malformed JSON: expected a string near offset {self.pos}")
+        return self.read_value()
+
+    def members(self):
+        """Yield the keys of an object; the caller consumes each value before resuming."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"malformed JSON: expected ',' or '}}' near offset {self.pos}")
+
+    def items(self):
+        """Yield once per array element; the caller consumes each element before resuming."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"malformed JSON: expected ',' or ']' near offset {self.pos}")
+
+
+def open_report(path: str):
+    """Text stream of a backtest report, looking inside freqtrade's result ``.zip`` if needed."""
+    if not zipfile.is_zipfile(path):
+        return open(path, "r", encoding="utf-8")
+    archive = zipfile.ZipFile(path)
+    names = [name for name in archive.namelist() if name.endswith(".json") and not name.endswith("_config.json")]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    preferred = [name for name in names if os.path.basename(name) == f"{stem}.json"]
+    if not (preferred or names):
+        archive.close()
+        raise ValueError(f"{path}: no backtest result JSON in archive")
+    member = archive.open((preferred or names)[0])
+    return io.TextIOWrapper(member, encoding="utf-8")
+
+
+class _TradeAccumulator:
+    """Close time and ``profit_abs`` of each trade (16 bytes each), in fixed-size NumPy chunks."""
+
+    def __init__(self, chunk: int = 1 << 16):
+        self.chunk = chunk
+        self.times = []
+        self.profits = []
+        self._time = np.empty(chunk, dtype=np.int64)
+        self._profit = np.empty(chunk, dtype=np.float64)
+        self._used = 0
+
+    def add(self, trade: dict) -> None:
+        if "close_timestamp" in trade:
+            close_time = int(trade["close_timestamp"])
+        else:
+            close_time = int(datetime.fromisoformat(str(trade["close_date"])).timestamp() * 1000)
+        self._time[self._used] = close_time
+        self._profit[self._used] = float(trade.get("profit_abs") or 0.0)
+        self._used += 1
+        if self._used == self.chunk:
+            self._flush()
+
+    def _flush(self) -> None:
+        self.times.append(self._time[:self._used].copy())
+        self.profits.append(self._profit[:self._used].copy())
+        self._used = 0
+
+    def metrics(self, starting_balance) -> dict:
+        self._flush()
+        times = np.concatenate(self.times)
+        profits = np.concatenate(self.profits)
+        count = len(profits)
+        wins = profits[profits > 0]
+        losses = profits[profits < 0]
+        loss_sum = -losses.sum()
+        max_drawdown = 0.0
+        if count:
+            if not starting_balance:
+                raise ValueError("trade metrics need the report's starting_balance")
+            # As freqtrade's calculate_max_drawdown: the largest absolute drop of
+            # cumulative profit (by close time), reported relative to the balance peak.
+            cumulative = np.cumsum(profits[np.argsort(times, kind="stable")])
+            high = np.maximum(0.0, np.maximum.accumulate(cumulative))
+            drawdown = cumulative - high
+            worst = int(np.argmin(drawdown))
+            peak_balance = starting_balance + high[worst]
+            max_drawdown = float(-drawdown[worst] / peak_balance) if peak_balance else 0.0
+        return {
+            "winrate": len(wins) / count if count else 0.0,
+            "profit_factor": float(wins.sum() / loss_sum) if loss_sum else 0.0,
+            "max_drawdown": max_drawdown,
+            "expectancy": float(profits.sum() / count) if count else 0.0,
+            "trade_count": count,
+        }
+
+
+def _read_block(stream: JsonStream, keys, block: dict, trades, top: bool = False) -> None:
+    """Consume an object's members, keeping summary values (and trades, if accumulating)."""
+    for key in keys:
+        if top and key == "strategy" and stream.peek() == "{":
+            for _name in stream.members():
+                _read_block(stream, stream.members(), block, trades)
+                # Only the first strategy counts; nothing after it is needed.
+                return
+        elif key == "trades" and stream.peek() == "[":
+            if trades is None:
+                stream.skip_value()
+            else:
+                for _ in stream.items():
+                    trades.add(stream.read_value())
+        elif key in SUMMARY_KEYS:
+            block[key] = stream.read_value()
+        else:
+            stream.skip_value()
+
+
+def load_metrics(path: str, source: str = "summary") -> dict:
+    """
+    Gate metrics of the first strategy in a backtest report.
+
+    ``source="summary"`` reads freqtrade's precomputed numbers,
+    ``source="trades"`` recomputes them from the exported trade list.
+    """
+    block: dict = {}
+    trades = _TradeAccumulator() if source == "trades" else None
+    with open_report(path) as handle:
+        stream = JsonStream(handle)
+        _read_block(stream, stream.members(), block, trades, top=True)
+
+    if trades is not None:
+        return trades.metrics(block.get("starting_balance"))
     return {
-        "winrate": float(first.get("winrate", 0.0)),
-        "profit_factor": float(first.get("profit_factor", 0.0)),
-        "max_drawdown": float(first.get("max_drawdown_account", first.get("max_drawdown", 0.0))),
-        "expectancy": float(first.get("expectancy", 0.0)),
-        "trade_count": int(first.get("total_trades", first.get("trades", 0))),
+        "winrate": float(block.get("winrate", 0.0)),
+        "profit_factor": float(block.get("profit_factor", 0.0)),
+        "max_drawdown": float(block.get("max_drawdown_account", block.get("max_drawdown", 0.0))),
+        "expectancy": float(block.get("expectancy", 0.0)),
+        "trade_count": int(block.get("total_trades", block.get("trades", 0))),
     }
 
 
-def main() -> int:
-    p = argparse.ArgumentParser()
-    p.add_argument("--strategy", required=True)
-    p.add_argument("--train", required=True)
-    p.add_argument("--test", required=True)
-    p.add_argument("--max-dd", type=float, required=True)
-    p.add_argument("--max-profit-factor-delta", type=float, required=True)
-    p.add_argument("--max-winrate-delta", type=float, required=True)
-    args = p.parse_args()
+def tier_thresholds(strategy: str, tier: str = None) -> dict:
+    """Gate thresholds for ``tier``, or for the tier of ``strategy`` (e.g. ``S4`` or ``S4_MFT_...``)."""
+    if tier is None:
+        tier = TIER_BY_STRATEGY.get(strategy.split("_", 1)[0].upper())
+        if tier is None:
+            raise ValueError(f"no tier known for strategy {strategy!r}; pass a tier or thresholds")
+    key = tier.lower()
+    key = TIER_ALIASES.get(key, key)
+    if key not in TIERS:
+        raise ValueError(f"unknown tier {tier!r}; expected one of {sorted(TIERS)}")
+    return dict(TIERS[key], tier=key)
+
 
-    train = load_metrics(args.train)
-    test = load_metrics(args.test)
+def evaluate(strategy: str, train_path: str, test_path: str, thresholds: dict, source: str = "summary") -> dict:
+    train = load_metrics(train_path, source)
+    test = load_metrics(test_path, source)
 
     pf_delta = abs(train["profit_factor"] - test["profit_factor"])
     win_delta = abs(train["winrate"] - test["winrate"])
 
     failed = []
-    if test["max_drawdown"] > args.max_dd:
-        failed.append(f"drawdown {test['max_drawdown']:.4f} > {args.max_dd:.4f}")
-    if pf_delta > args.max_profit_factor_delta:
-        failed.append(f"profit_factor delta {pf_delta:.4f} > {args.max_profit_factor_delta:.4f}")
-    if win_delta > args.max_winrate_delta:
-        failed.append(f"winrate delta {win_delta:.4f} > {args.max_winrate_delta:.4f}")
-
-    print(f"[{args.strategy}] train={train}")
-    print(f"[{args.strategy}] test={test}")
-    if failed:
-        print(f"[{args.strategy}] REJECT: {'; '.join(failed)}")
-        return 1
-
-    print(f"[{args.strategy}] PASS: all gates satisfied")
-    return 0
+    if test["max_drawdown"] > thresholds["max_dd"]:
+        failed.append(f"drawdown {test['max_drawdown']:.4f} > {thresholds['max_dd']:.4f}")
+    if pf_delta > thresholds["max_profit_factor_delta"]:
+        failed.append(f"profit_factor delta {pf_delta:.4f} > {thresholds['max_profit_factor_delta']:.4f}")
+    if win_delta > thresholds["max_winrate_delta"]:
+        failed.append(f"winrate delta {win_delta:.4f} > {thresholds['max_winrate_delta']:.4f}")
+
+    return {
+        "strategy": strategy,
+        "status": "reject" if failed else "pass",
+        "train": train,
+        "test": test,
+        "profit_factor_delta": pf_delta,
+        "winrate_delta": win_delta,
+        "thresholds": thresholds,
+        "failed": failed,
+    }
+
+
+def evaluate_entry(entry: dict, source: str = "summary") -> dict:
+    """Evaluate one manifest entry; unreadable reports or bad entries become ``error`` results."""
+    strategy = str(entry.get("strategy", ""))
+    try:
+        thresholds = tier_thresholds(strategy, entry.get("tier"))
+        result = evaluate(strategy, entry["train"], entry["test"], thresholds, entry.get("metrics", source))
+    except (OSError, KeyError, ValueError, TypeError) as exc:
+        result = {"strategy": strategy, "status": "error", "failed": [f"{type(exc).__name__}: {exc}"]}
+    result["label"] = entry.get("label")
+    result["train_report"] = entry.get("train")
+    result["test_report"] = entry.get("test")
+    return result
+
+
+def print_result(result: dict) -> None:
+    name = result["strategy"] + (f" {result['label']}" if result.get("label") else "")
+    if result["status"] == "error":
+        print(f"[{name}] ERROR: {'; '.join(result['failed'])}")
+        return
+    print(f"[{name}] train={result['train']}")
+    print(f"[{name}] test={result['test']}")
+    if result["failed"]:
+        print(f"[{name}] REJECT: {'; '.join(result['failed'])}")
+    else:
+        print(f"[{name}] PASS: all gates satisfied")
+
+
+def run_batch(manifest_path: str, workers: int = None, source: str = "summary") -> list:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries.get("entries", [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map keeps manifest order, so output and summary are deterministic.
+        return list(pool.map(partial(evaluate_entry, source=source), entries))
+
+
+def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--manifest", help="JSON list of {strategy, train, test[, tier, label]} entries")
+    p.add_argument("--workers", type=int, default=None, help="batch mode process count (default: CPU count)")
+    p.add_argument("--summary", help="write all results to this JSON file")
+    p.add_argument("--metrics", choices=("summary", "trades"), default="summary",
+                   help="read freqtrade's summary numbers or recompute them from the trade list")
+    p.add_argument("--strategy")
+    p.add_argument("--train")
+    p.add_argument("--test")
+    p.add_argument("--tier", help="conservative, progressive or aggressive (default: from --strategy)")
+    p.add_argument("--max-dd", type=float)
+    p.add_argument("--max-profit-factor-delta", type=float)
+    p.add_argument("--max-winrate-delta", type=float)
+    args = p.parse_args()
+
+    if args.manifest:
+        results = run_batch(args.manifest, args.workers, args.metrics)
+    else:
+        if not (args.strategy and args.train and args.test):
+            p.error("--strategy, --train and --test are required without --manifest")
+        explicit = {
+            "max_dd": args.max_dd,
+            "max_profit_factor_delta": args.max_profit_factor_delta,
+            "max_winrate_delta": args.max_winrate_delta,
+        }
+        thresholds = {}
+        if args.tier or None in explicit.values():
+            try:
+                thresholds = tier_thresholds(args.strategy, args.tier)
+            except ValueError as exc:
+                p.error(str(exc))
+        thresholds.update({key: value for key, value in explicit.items() if value is not None})
+        results = [evaluate(args.strategy, args.train, args.test, thresholds, args.metrics)]
+
+    for result in results:
+        print_result(result)
+
+    failed = [result for result in results if result["status"] != "pass"]
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(
+                {"passed": len(results) - len(failed), "failed": len(failed), "results": results},
+                f, indent=2,
+            )
+    if len(results) > 1:
+        print(f"{len(results) - len(failed)}/{len(results)} passed")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Run rolling walk-forward backtests for the strategy pack with cached results.
+
+For every ``user_data/configs/SX_config_stub.json`` (or the ``--strategies``
+given) this generates train/test timeranges that roll forward through
+``--start``..``--end`` (``--anchored`` keeps the train start fixed), and runs
+``freqtrade backtesting`` for each window on a pool of ``--workers`` concurrent
+freqtrade processes.
+
+Each run is keyed by a SHA-256 over everything that determines its result:
+
+- the strategy file and the ``strategy_support`` package it imports,
+- the config stub,
+- the timerange and any extra arguments passed through to freqtrade,
+- the freqtrade and CCXT versions reported by ``freqtrade --version``,
+- the candle, mark and funding files of the stub's pairs for the timeframes
+  the strategy declares.
+
+Results live in ``<cache-dir>/<key>/``; a run whose key already has a result
+is skipped, so after editing one strategy only that strategy's windows rerun.
+Data file digests are memoized by path, size and mtime so unchanged data is
+hashed once.
+
+The run writes ``walk_forward_index.json`` (every window with its key, result
+path and whether it was cached) and ``gate_manifest.json`` for
+``validate_backtest_gates.py --manifest``. Exits non-zero if any run fails.
+"""
+
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(ROOT, "user_data", "configs")
+STRATEGY_DIR = os.path.join(ROOT, "user_data", "strategies")
+SUPPORT_DIR = os.path.join(STRATEGY_DIR, "strategy_support")
+
+_STUB = re.compile(r"^(S\d+)_config_stub\.json$")
+_TIMEFRAME_ATTR = re.compile(r"^\s+\w*timeframe\w*\s*=\s*[\"'](\d+[mhdwM])[\"']", re.M)
+_HASH_CHUNK = 1 << 20
+
+
+def add_months(day: date, months: int) -> date:
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def parse_day(value: str) -> date:
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
+def timerange(start: date, stop: date) -> str:
+    return f"{start:%Y%m%d}-{stop:%Y%m%d}"
+
+
+def windows(start: date, end: date, train_months: int, test_months: int, step_months: int,
+            anchored: bool = False) -> list:
+    """``(train_timerange, test_timerange)`` pairs whose test window ends by ``end``."""
+    folds = []
+    fold = 0
+    while True:
+        train_start = start if anchored else add_months(start, fold * step_months)
+        train_stop = add_months(start, fold * step_months + train_months)
+        test_stop = add_months(train_stop, test_months)
+        if test_stop > end:
+            return folds
+        folds.append((timerange(train_start, train_stop), timerange(train_stop, test_stop)))
+        fold += 1
+
+
+def discover_strategies(selected=None) -> dict:
+    """Strategy id -> ``{"class", "config", "source"}`` from the config stubs."""
+    strategies = {}
+    for name in sorted(os.listdir(CONFIG_DIR)):
+        match = _STUB.match(name)
+        if not match or (selected and match.group(1) not in selected):
+            continue
+        config_path = os.path.join(CONFIG_DIR, name)
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        strategies[match.group(1)] = {
+            "class": config["strategy"],
+            "config": config_path,
+            "source": os.path.join(STRATEGY_DIR, f"{config['strategy']}.py"),
+            "pairs": config.get("exchange", {}).get("pair_whitelist", []),
+        }
+    missing = set(selected or ()) - set(strategies)
+    if missing:
+        raise SystemExit(f"no config stub for: {', '.join(sorted(missing))}")
+    return strategies
+
+
+class FileDigests:
+    """SHA-256 of files, memoized on disk by ``(path, size, mtime_ns)``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def digest(self, path: str) -> str:
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = self.entries.get(path)
+        if entry and entry["stamp"] == stamp:
+            return entry["sha256"]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+                sha.update(block)
+        self.entries[path] = {"stamp": stamp, "sha256": sha.hexdigest()}
+        return self.entries[path]["sha256"]
+
+    def save(self) -> None:
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(temporary, self.path)
+
+
+def strategy_timeframes(source: str) -> set:
+    with open(source, "r", encoding="utf-8") as f:
+        return set(_TIMEFRAME_ATTR.findall(f.read()))
+
+
+def data_files(datadir: str, pairs: list, timeframes: set) -> list:
+    """Data files freqtrade may load for ``pairs``: candles of ``timeframes`` plus mark/funding data."""
+    if not os.path.isdir(datadir):
+        return []
+    prefixes = tuple(pair.replace("/", "_").replace(":", "_") + "-" for pair in pairs)
+    found = []
+    for folder, _dirs, names in os.walk(datadir):
+        for name in names:
+            if not name.startswith(prefixes):
+                continue
+            parts = name.split("-")
+            if parts[1] in timeframes or "mark" in name or "funding_rate" in name:
+                found.append(os.path.join(folder, name))
+    return sorted(found)
+
+
+def support_files() -> list:
+    return sorted(
+        os.path.join(folder, name)
+        for folder, _dirs, names in os.walk(SUPPORT_DIR)
+        for name in names
+        if name.endswith(".py")
+    )
+
+
+def freqtrade_version(freqtrade: str) -> str:
+    """The freqtrade and CCXT versions of ``freqtrade --version`` (its whole output if neither is listed)."""
+    output = subprocess.run([freqtrade, "--version"], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    versions = re.findall(r"^(?:Freqtrade|CCXT) Version:\s*(.+?)\s*$", output, re.M)
+    return "; ".join(versions) or output.strip()
+
+
+def run_key(window: str, inputs: list, digests: FileDigests, extra_args: list, version: str) -> str:
+    sha = hashlib.sha256()
+    sha.update(f"freqtrade={version}\ntimerange={window}\nargs={json.dumps(extra_args)}\n".encode())
+    for path in inputs:
+        sha.update(f"{os.path.relpath(path, ROOT)}={digests.digest(path)}\n".encode())
+    return sha.hexdigest()[:24]
+
+
+def result_path(run_dir: str):
+    """The result freqtrade recorded in ``run_dir``, or None if the run has not completed."""
+    marker = os.path.join(run_dir, ".last_result.json")
+    if not os.path.exists(marker):
+        return None
+    with open(marker, "r", encoding="utf-8") as f:
+        latest = json.load(f).get("latest_backtest")
+    path = os.path.join(run_dir, latest) if latest else None
+    return path if path and os.path.exists(path) else None
+
+
+def backtest(job: dict, freqtrade: str, extra_args: list) -> dict:
+    run_dir = job["run_dir"]
+    os.makedirs(run_dir, exist_ok=True)
+    command = [
+        freqtrade, "backtesting",
+        "--config", job["config"],
+        "--strategy", job["class"],
+        "--strategy-path", STRATEGY_DIR,
+        "--timerange", job["timerange"],
+        "--export", "trades",
+        "--backtest-filename", run_dir,
+        *extra_args,
+    ]
+    with open(os.path.join(run_dir, "backtest.log"), "w", encoding="utf-8") as log:
+        returncode = subprocess.call(command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+    result = result_path(run_dir)
+    return dict(job, status="ok" if returncode == 0 and result else "failed", result=result,
+                returncode=returncode)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--strategies", nargs="*", help="strategy ids, e.g. S1 S4 (default: every config stub)")
+    p.add_argument("--start", required=True, help="first train day, YYYYMMDD")
+    p.add_argument("--end", required=True, help="last test window must end by this day, YYYYMMDD")
+    p.add_argument("--train-months", type=int, default=6)
+    p.add_argument("--test-months", type=int, default=3)
+    p.add_argument("--step-months", type=int, default=None, help="default: --test-months")
+    p.add_argument("--anchored", action="store_true", help="keep the train start fixed at --start")
+    p.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    p.add_argument("--datadir", default=os.path.join(ROOT, "user_data", "data", "binance"))
+    p.add_argument("--cache-dir", default=os.path.join(ROOT, "user_data", "backtest_results", "walk_forward"))
+    p.add_argument("--freqtrade", default="freqtrade", help="freqtrade executable")
+    p.add_argument("--plan", action="store_true", help="list the windows and cache state without running")
+    args, extra_args = p.parse_known_args()
+
+    folds = windows(parse_day(args.start), parse_day(args.end), args.train_months, args.test_months,
+                    args.step_months or args.test_months, args.anchored)
+    if not folds:
+        p.error("no complete train/test window fits between --start and --end")
+    strategies = discover_strategies(args.strategies)
+    try:
+        version = freqtrade_version(args.freqtrade)
+    except (OSError, subprocess.CalledProcessError) as err:
+        p.error(f"cannot run {args.freqtrade} --version: {err}")
+    os.makedirs(args.cache_dir, exist_ok=True)
+    digests = FileDigests(os.path.join(args.cache_dir, "file_digests.json"))
+    shared = support_files()
+
+    index, jobs = [], {}
+    for strategy_id, strategy in strategies.items():
+        inputs = [strategy["source"], strategy["config"], *shared,
+                  *data_files(args.datadir, strategy["pairs"], strategy_timeframes(strategy["source"]))]
+        for fold, pair in enumerate(folds):
+            entry = {"strategy": strategy_id, "fold": fold}
+            for role, window in zip(("train", "test"), pair):
+                key = run_key(window, inputs, digests, extra_args, version)
+                run_dir = os.path.join(args.cache_dir, key)
+                cached = result_path(run_dir)
+                entry[role] = {"timerange": window, "key": key, "result": cached, "cached": cached is not None}
+                if cached is None:
+                    jobs[key] = {"strategy": strategy_id, "class": strategy["class"],
+                                 "config": strategy["config"], "timerange": window, "run_dir": run_dir}
+            index.append(entry)
+    digests.save()
+
+    print(f"{len(index)} folds, {2 * len(index)} runs, {len(jobs)} to run, workers={args.workers}")
+    if args.plan:
+        for job in jobs.values():
+            print(f"  {job['strategy']} {job['timerange']} -> {job['run_dir']}")
+        return 0
+
+    # Each job is a freqtrade subprocess, so threads are enough to keep the pool full.
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        done = {}
+        for result in pool.map(lambda job: backtest(job, args.freqtrade, extra_args), jobs.values()):
+            done[os.path.basename(result["run_dir"])] = result
+            print(f"[{result['strategy']}] {result['timerange']}: {result['status']}")
+
+    failed = [result for result in done.values() if result["status"] != "ok"]
+    for entry in index:
+        for role in ("train", "test"):
+            run = done.get(entry[role]["key"])
+            if run is not None:
+                entry[role]["result"] = run["result"]
+
+    with open(os.path.join(args.cache_dir, "walk_forward_index.json"), "w", encoding="utf-8") as f:
+        json.dump({"folds": index, "failed": [result["run_dir"] for result in failed]}, f, indent=2)
+    manifest = [
+        {"strategy": entry["strategy"], "train": entry["train"]["result"], "test": entry["test"]["result"],
+         "label": f"fold{entry['fold']} {entry['test']['timerange']}"}
+        for entry in index
+        if entry["train"]["result"] and entry["test"]["result"]
+    ]
+    with open(os.path.join(args.cache_dir, "gate_manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"{len(jobs) - len(failed)}/{len(jobs)} runs succeeded; gate with: python scripts/validate_backtest_gates.py "
+          f"--manifest {os.path.join(args.cache_dir, 'gate_manifest.json')}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
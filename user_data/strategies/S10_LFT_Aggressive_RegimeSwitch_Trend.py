@@ -1,11 +1,17 @@
 from datetime import datetime
 from typing import Dict
 
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
+
+from strategy_support import cached_ta
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.range_extremes import RangeExtremeCache
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
 
 
 class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
@@ -21,6 +27,11 @@ class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
     informative_timeframe = "4h"
     anchor_timeframe = "1d"
     startup_candle_count = 500
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "4h": ["ema50", "ema200", "adx"],
+        "1d": ["ema50", "ema200"],
+    }
 
     adx_floor = IntParameter(18, 40, default=26, space="buy")
     breakout_buffer = DecimalParameter(0.002, 0.03, default=0.008, decimals=3, space="buy")
@@ -37,7 +48,7 @@ class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
     roi_t1 = IntParameter(18, 120, default=48, space="sell")
     roi_t2 = IntParameter(72, 360, default=168, space="sell")
 
-    @property
+    @roi_property("roi_fast", "roi_t1", "roi_mid", "roi_t2")
     def minimal_roi(self) -> Dict[str, float]:
         return {
             "0": float(self.roi_fast.value),
@@ -45,7 +56,7 @@ class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
             str(int(self.roi_t2.value)): 0.0,
         }
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 4},
@@ -69,25 +80,43 @@ class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
         pairs = self.dp.current_whitelist()
         return [(p, self.informative_timeframe) for p in pairs] + [(p, self.anchor_timeframe) for p in pairs]
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._extremes = RangeExtremeCache()
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_4h(self, inf4h: OverlayFrame, pair: str) -> OverlayFrame:
+        inf4h_ind = cached_ta(inf4h, pair, self.informative_timeframe)
+        inf4h["ema50"] = inf4h_ind.EMA(timeperiod=50)
+        inf4h["ema200"] = inf4h_ind.EMA(timeperiod=200)
+        inf4h["adx"] = inf4h_ind.ADX(timeperiod=14)
+        return inf4h
+
+    def _populate_informative_1d(self, inf1d: OverlayFrame, pair: str) -> OverlayFrame:
+        inf1d_ind = cached_ta(inf1d, pair, self.anchor_timeframe)
+        inf1d["ema50"] = inf1d_ind.EMA(timeperiod=50)
+        inf1d["ema200"] = inf1d_ind.EMA(timeperiod=200)
+        return inf1d
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["ema200"] = ta.EMA(dataframe, timeperiod=200)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["ema200"] = ind.EMA(timeperiod=200)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["high_48"] = dataframe["high"].rolling(48).max()
-        dataframe["low_48"] = dataframe["low"].rolling(48).min()
+        dataframe["high_48"] = self._extremes.rolling_max(metadata["pair"], dataframe, "high", 48)
+        dataframe["low_48"] = self._extremes.rolling_min(metadata["pair"], dataframe, "low", 48)
 
         inf4h = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf4h["ema50"] = ta.EMA(inf4h, timeperiod=50)
-        inf4h["ema200"] = ta.EMA(inf4h, timeperiod=200)
-        inf4h["adx"] = ta.ADX(inf4h, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf4h, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf4h, self._populate_informative_4h
+        )
 
         inf1d = self.dp.get_pair_dataframe(metadata["pair"], self.anchor_timeframe)
-        inf1d["ema50"] = ta.EMA(inf1d, timeperiod=50)
-        inf1d["ema200"] = ta.EMA(inf1d, timeperiod=200)
-        dataframe = merge_informative_pair(dataframe, inf1d, self.timeframe, self.anchor_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.anchor_timeframe, inf1d, self._populate_informative_1d
+        )
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -134,3 +163,7 @@ class S10_LFT_Aggressive_RegimeSwitch_Trend(IStrategy):
         if current_profit < -0.04 and (current_time - trade.open_date_utc).total_seconds() > 24 * 3600:
             return "s10_stale_loss"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
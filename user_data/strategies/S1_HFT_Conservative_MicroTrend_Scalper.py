@@ -1,18 +1,28 @@
+import logging
 from datetime import datetime
 from typing import Any, Dict
 
 import numpy as np
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
+from freqtrade.persistence import Order, Trade
 from freqtrade.strategy import (
     IStrategy,
     DecimalParameter,
     IntParameter,
-    merge_informative_pair,
 )
 
+from strategy_support import cached_ta
+from strategy_support.diagnostics import DiagnosticsSink
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.signal_batch import parameter_values, signal_columns
+from strategy_support.streaming import ADX, ATR, EMA, IncrementalIndicatorEngine, RollingMean, is_live_runmode
+from strategy_support.trade_index import LiveProtections
+
+logger = logging.getLogger(__name__)
+
 
 class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
     """
@@ -40,6 +50,12 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
     startup_candle_count = 300
     process_only_new_candles = True
 
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "3m": ["adx"],
+        "5m": ["ema_fast", "ema_slow"],
+    }
+
     # Dynamic ROI controls
     roi_t1 = IntParameter(6, 30, default=12, space="sell")
     roi_t2 = IntParameter(20, 70, default=35, space="sell")
@@ -50,6 +66,11 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
     adx_min = IntParameter(16, 40, default=24, space="buy")
     ema_gap_min = DecimalParameter(0.0003, 0.0030, default=0.0012, decimals=4, space="buy")
     volume_mult = DecimalParameter(0.8, 2.5, default=1.2, decimals=2, space="buy")
+    # Columns and parameters read by entry_signals (see strategy_support.signal_batch).
+    entry_signal_columns = (
+        "close", "ema_fast", "ema_slow", "adx", "atr_pct", "adx_3m", "ema_fast_5m", "ema_slow_5m", "volume", "vol_ma",
+    )
+    entry_signal_params = ("adx_min", "ema_gap_min", "volume_mult")
 
     # Stoploss / trailing
     stoploss = -0.018
@@ -63,7 +84,7 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
 
     use_custom_stoploss = False
 
-    @property
+    @roi_property("roi_p1", "roi_t1", "roi_p2", "roi_t2")
     def minimal_roi(self) -> Dict[str, float]:
         return {
             "0": float(self.roi_p1.value),
@@ -71,7 +92,7 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
             str(int(self.roi_t2.value)): 0.0,
         }
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 6},
@@ -97,54 +118,84 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
             (pair, self.informative_timeframe_2) for pair in pairs
         ]
 
+    def bot_start(self, **kwargs) -> None:
+        # Live/dry-run only: fold each new 1m candle into per-pair indicator state.
+        self._stream = IncrementalIndicatorEngine(self.timeframe, self._streaming_indicators)
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._diagnostics = DiagnosticsSink.from_config(self.config, logger)
+        self._protections = LiveProtections.attach(self)
+
+    @staticmethod
+    def _streaming_indicators():
+        return {
+            "ema_fast": EMA(8),
+            "ema_slow": EMA(21),
+            "adx": ADX(14),
+            "atr": ATR(14),
+            "vol_ma": RollingMean(20, "volume"),
+        }
+
+    def _populate_informative_3m(self, inf3: OverlayFrame, pair: str) -> OverlayFrame:
+        inf3_ind = cached_ta(inf3, pair, self.informative_timeframe_1)
+        inf3["ema_fast"] = inf3_ind.EMA(timeperiod=8)
+        inf3["ema_slow"] = inf3_ind.EMA(timeperiod=21)
+        inf3["adx"] = inf3_ind.ADX(timeperiod=14)
+        return inf3
+
+    def _populate_informative_5m(self, inf5: OverlayFrame, pair: str) -> OverlayFrame:
+        inf5_ind = cached_ta(inf5, pair, self.informative_timeframe_2)
+        inf5["ema_fast"] = inf5_ind.EMA(timeperiod=8)
+        inf5["ema_slow"] = inf5_ind.EMA(timeperiod=21)
+        return inf5
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema_fast"] = ta.EMA(dataframe, timeperiod=8)
-        dataframe["ema_slow"] = ta.EMA(dataframe, timeperiod=21)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        if is_live_runmode(self.dp):
+            for column, values in self._stream.update(metadata["pair"], dataframe).items():
+                dataframe[column] = values
+        else:
+            ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+            dataframe["ema_fast"] = ind.EMA(timeperiod=8)
+            dataframe["ema_slow"] = ind.EMA(timeperiod=21)
+            dataframe["adx"] = ind.ADX(timeperiod=14)
+            dataframe["atr"] = ind.ATR(timeperiod=14)
+            dataframe["vol_ma"] = dataframe["volume"].rolling(20).mean()
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["vol_ma"] = dataframe["volume"].rolling(20).mean()
 
         inf3 = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe_1)
-        inf3["ema_fast"] = ta.EMA(inf3, timeperiod=8)
-        inf3["ema_slow"] = ta.EMA(inf3, timeperiod=21)
-        inf3["adx"] = ta.ADX(inf3, timeperiod=14)
-
         inf5 = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe_2)
-        inf5["ema_fast"] = ta.EMA(inf5, timeperiod=8)
-        inf5["ema_slow"] = ta.EMA(inf5, timeperiod=21)
-
-        dataframe = merge_informative_pair(dataframe, inf3, self.timeframe, self.informative_timeframe_1, ffill=True)
-        dataframe = merge_informative_pair(dataframe, inf5, self.timeframe, self.informative_timeframe_2, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe_1, inf3, self._populate_informative_3m
+        )
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe_2, inf5, self._populate_informative_5m
+        )
         return dataframe
 
-    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        gap = (dataframe["ema_fast"] - dataframe["ema_slow"]) / dataframe["close"]
+    @staticmethod
+    def entry_signals(columns: Dict[str, np.ndarray], params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        gap = (columns["ema_fast"] - columns["ema_slow"]) / columns["close"]
 
-        long_regime = (
-            (dataframe["adx"] > self.adx_min.value)  # avoid chop
-            & (dataframe["atr_pct"] > 0.0007)
-            & (dataframe["adx_3m"] > self.adx_min.value)
-            & (dataframe["ema_fast_5m"] > dataframe["ema_slow_5m"])
-        )
-        short_regime = (
-            (dataframe["adx"] > self.adx_min.value)
-            & (dataframe["atr_pct"] > 0.0007)
-            & (dataframe["adx_3m"] > self.adx_min.value)
-            & (dataframe["ema_fast_5m"] < dataframe["ema_slow_5m"])
+        trending = (
+            (columns["adx"] > params["adx_min"])  # avoid chop
+            & (columns["atr_pct"] > 0.0007)
+            & (columns["adx_3m"] > params["adx_min"])
         )
+        long_regime = trending & (columns["ema_fast_5m"] > columns["ema_slow_5m"])
+        short_regime = trending & (columns["ema_fast_5m"] < columns["ema_slow_5m"])
 
-        volume_ok = dataframe["volume"] > dataframe["vol_ma"] * self.volume_mult.value
+        volume_ok = columns["volume"] > columns["vol_ma"] * params["volume_mult"]
 
-        dataframe.loc[
-            long_regime & volume_ok & (gap > self.ema_gap_min.value) & (dataframe["close"] > dataframe["ema_fast"]),
-            ["enter_long", "enter_tag"],
-        ] = (1, "s1_microtrend_long")
+        return {
+            "enter_long": long_regime & volume_ok & (gap > params["ema_gap_min"]) & (columns["close"] > columns["ema_fast"]),
+            "enter_short": short_regime & volume_ok & (gap < -params["ema_gap_min"]) & (columns["close"] < columns["ema_fast"]),
+        }
 
-        dataframe.loc[
-            short_regime & volume_ok & (gap < -self.ema_gap_min.value) & (dataframe["close"] < dataframe["ema_fast"]),
-            ["enter_short", "enter_tag"],
-        ] = (1, "s1_microtrend_short")
+    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        signals = self.entry_signals(
+            signal_columns(dataframe, self.entry_signal_columns), parameter_values(self, self.entry_signal_params)
+        )
+        dataframe.loc[signals["enter_long"], ["enter_long", "enter_tag"]] = (1, "s1_microtrend_long")
+        dataframe.loc[signals["enter_short"], ["enter_short", "enter_tag"]] = (1, "s1_microtrend_short")
         return dataframe
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -165,29 +216,25 @@ class S1_HFT_Conservative_MicroTrend_Scalper(IStrategy):
 
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float, time_in_force: str,
                             current_time: datetime, entry_tag: str | None, side: str, **kwargs) -> bool:
-        self.logger.info(
-            {
-                "event": "entry_confirm",
-                "strategy": "S1",
-                "pair": pair,
-                "side": side,
-                "entry_tag": entry_tag,
-                "rate": rate,
-                "timestamp": current_time.isoformat(),
-            }
+        self._diagnostics.emit(
+            "entry_confirm", pair, current_time, strategy="S1", side=side, entry_tag=entry_tag, rate=rate
         )
         return True
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        self.logger.info(
-            {
-                "event": "exit_monitor",
-                "strategy": "S1",
-                "pair": pair,
-                "side": trade.trade_direction,
-                "profit": round(current_profit, 5),
-                "open_minutes": int((current_time - trade.open_date_utc).total_seconds() / 60),
-            }
+        self._diagnostics.emit(
+            "exit_monitor",
+            pair,
+            current_time,
+            strategy="S1",
+            side=trade.trade_direction,
+            profit=round(current_profit, 5),
+            open_minutes=int((current_time - trade.open_date_utc).total_seconds() / 60),
+            trade_open=trade.open_date_utc,
         )
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
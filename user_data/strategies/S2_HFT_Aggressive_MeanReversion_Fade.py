@@ -1,12 +1,22 @@
+import logging
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict
 
-import talib.abstract as ta
+import numpy as np
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
+from freqtrade.persistence import Order, Trade
 from freqtrade.strategy import IStrategy, DecimalParameter, IntParameter
 
+from strategy_support import cached_ta
+from strategy_support.diagnostics import DiagnosticsSink
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.signal_batch import parameter_values, signal_columns
+from strategy_support.streaming import ADX, EMA, RSI, IncrementalIndicatorEngine, RollingStd, is_live_runmode
+from strategy_support.trade_index import LiveProtections
+
+logger = logging.getLogger(__name__)
+
 
 class S2_HFT_Aggressive_MeanReversion_Fade(IStrategy):
     """
@@ -32,6 +42,9 @@ class S2_HFT_Aggressive_MeanReversion_Fade(IStrategy):
     rsi_low = IntParameter(10, 40, default=24, space="buy")
     rsi_high = IntParameter(60, 90, default=76, space="buy")
     adx_max = IntParameter(14, 30, default=22, space="buy")
+    # Columns and parameters read by entry_signals (see strategy_support.signal_batch).
+    entry_signal_columns = ("adx", "ema_slope", "zscore", "rsi")
+    entry_signal_params = ("zscore_threshold", "rsi_low", "rsi_high", "adx_max")
 
     stoploss = -0.022
     trailing_stop = True
@@ -43,11 +56,11 @@ class S2_HFT_Aggressive_MeanReversion_Fade(IStrategy):
     roi_slow = DecimalParameter(0.0, 0.006, default=0.001, decimals=3, space="sell")
     roi_t = IntParameter(4, 25, default=10, space="sell")
 
-    @property
+    @roi_property("roi_fast", "roi_t", "roi_slow")
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": float(self.roi_fast.value), str(int(self.roi_t.value)): float(self.roi_slow.value)}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 10},
@@ -67,32 +80,59 @@ class S2_HFT_Aggressive_MeanReversion_Fade(IStrategy):
             },
         ]
 
+    def bot_start(self, **kwargs) -> None:
+        # Live/dry-run only: fold each new 1m candle into per-pair indicator state.
+        self._stream = IncrementalIndicatorEngine(self.timeframe, self._streaming_indicators)
+        self._diagnostics = DiagnosticsSink.from_config(self.config, logger)
+        self._protections = LiveProtections.attach(self)
+
+    @staticmethod
+    def _streaming_indicators():
+        return {
+            "ema": EMA(50),
+            "std": RollingStd(50),
+            "rsi": RSI(14),
+            "adx": ADX(14),
+        }
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["std"] = dataframe["close"].rolling(50).std()
+        if is_live_runmode(self.dp):
+            for column, values in self._stream.update(metadata["pair"], dataframe).items():
+                dataframe[column] = values
+        else:
+            ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+            dataframe["ema"] = ind.EMA(timeperiod=50)
+            dataframe["std"] = dataframe["close"].rolling(50).std()
+            dataframe["rsi"] = ind.RSI(timeperiod=14)
+            dataframe["adx"] = ind.ADX(timeperiod=14)
         dataframe["zscore"] = (dataframe["close"] - dataframe["ema"]) / dataframe["std"]
-        dataframe["rsi"] = ta.RSI(dataframe, timeperiod=14)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
         dataframe["ema_slope"] = dataframe["ema"].pct_change(5)
         return dataframe
 
-    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+    @staticmethod
+    def entry_signals(columns: Dict[str, np.ndarray], params: Dict[str, Any]) -> Dict[str, np.ndarray]:
         # Regime filter: avoid one-way trends for mean-reversion
-        mr_regime = (dataframe["adx"] < self.adx_max.value) & (dataframe["ema_slope"].abs() < 0.0035)
-
-        dataframe.loc[
-            mr_regime
-            & (dataframe["zscore"] < -self.zscore_threshold.value)
-            & (dataframe["rsi"] < self.rsi_low.value),
-            ["enter_long", "enter_tag"],
-        ] = (1, "s2_fade_long")
-
-        dataframe.loc[
-            mr_regime
-            & (dataframe["zscore"] > self.zscore_threshold.value)
-            & (dataframe["rsi"] > self.rsi_high.value),
-            ["enter_short", "enter_tag"],
-        ] = (1, "s2_fade_short")
+        mr_regime = (columns["adx"] < params["adx_max"]) & (np.abs(columns["ema_slope"]) < 0.0035)
+
+        return {
+            "enter_long": (
+                mr_regime
+                & (columns["zscore"] < -params["zscore_threshold"])
+                & (columns["rsi"] < params["rsi_low"])
+            ),
+            "enter_short": (
+                mr_regime
+                & (columns["zscore"] > params["zscore_threshold"])
+                & (columns["rsi"] > params["rsi_high"])
+            ),
+        }
+
+    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        signals = self.entry_signals(
+            signal_columns(dataframe, self.entry_signal_columns), parameter_values(self, self.entry_signal_params)
+        )
+        dataframe.loc[signals["enter_long"], ["enter_long", "enter_tag"]] = (1, "s2_fade_long")
+        dataframe.loc[signals["enter_short"], ["enter_short", "enter_tag"]] = (1, "s2_fade_short")
         return dataframe
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -106,15 +146,19 @@ class S2_HFT_Aggressive_MeanReversion_Fade(IStrategy):
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        self.logger.info(
-            {
-                "event": "diagnostic",
-                "strategy": "S2",
-                "pair": pair,
-                "direction": trade.trade_direction,
-                "entry_tag": trade.enter_tag,
-                "pnl": round(current_profit, 5),
-                "duration_min": int((current_time - trade.open_date_utc).total_seconds() / 60),
-            }
+        self._diagnostics.emit(
+            "diagnostic",
+            pair,
+            current_time,
+            strategy="S2",
+            direction=trade.trade_direction,
+            entry_tag=trade.enter_tag,
+            pnl=round(current_profit, 5),
+            duration_min=int((current_time - trade.open_date_utc).total_seconds() / 60),
+            trade_open=trade.open_date_utc,
         )
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
@@ -1,11 +1,20 @@
+import logging
 from datetime import datetime
 from typing import Dict
 
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import IStrategy, DecimalParameter, IntParameter, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import IStrategy, DecimalParameter, IntParameter
+
+from strategy_support import cached_ta
+from strategy_support.diagnostics import DiagnosticsSink
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
+
+logger = logging.getLogger(__name__)
 
 
 class S3_MFT_Conservative_TrendPullback(IStrategy):
@@ -28,6 +37,10 @@ class S3_MFT_Conservative_TrendPullback(IStrategy):
     timeframe = "15m"
     informative_timeframe = "1h"
     startup_candle_count = 300
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "1h": ["ema50", "ema200", "adx"],
+    }
 
     pullback_depth = DecimalParameter(0.002, 0.02, default=0.007, decimals=3, space="buy")
     adx_min = IntParameter(16, 40, default=24, space="buy")
@@ -44,11 +57,11 @@ class S3_MFT_Conservative_TrendPullback(IStrategy):
     roi2 = DecimalParameter(0.0, 0.03, default=0.008, decimals=3, space="sell")
     t1 = IntParameter(30, 180, default=90, space="sell")
 
-    @property
+    @roi_property("roi1", "t1", "roi2")
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": float(self.roi1.value), str(int(self.t1.value)): float(self.roi2.value), "360": 0.0}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 4},
@@ -71,18 +84,30 @@ class S3_MFT_Conservative_TrendPullback(IStrategy):
     def informative_pairs(self):
         return [(pair, self.informative_timeframe) for pair in self.dp.current_whitelist()]
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._diagnostics = DiagnosticsSink.from_config(self.config, logger)
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_1h(self, inf: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_ind = cached_ta(inf, pair, self.informative_timeframe)
+        inf["ema50"] = inf_ind.EMA(timeperiod=50)
+        inf["ema200"] = inf_ind.EMA(timeperiod=200)
+        inf["adx"] = inf_ind.ADX(timeperiod=14)
+        return inf
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema20"] = ta.EMA(dataframe, timeperiod=20)
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["rsi"] = ta.RSI(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema20"] = ind.EMA(timeperiod=20)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["rsi"] = ind.RSI(timeperiod=14)
 
         inf = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf["ema50"] = ta.EMA(inf, timeperiod=50)
-        inf["ema200"] = ta.EMA(inf, timeperiod=200)
-        inf["adx"] = ta.ADX(inf, timeperiod=14)
 
-        dataframe = merge_informative_pair(dataframe, inf, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf, self._populate_informative_1h
+        )
         dataframe["pullback"] = (dataframe["ema20"] - dataframe["close"]) / dataframe["close"]
         return dataframe
 
@@ -125,14 +150,19 @@ class S3_MFT_Conservative_TrendPullback(IStrategy):
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        self.logger.info(
-            {
-                "event": "diagnostic",
-                "strategy": "S3",
-                "pair": pair,
-                "entry_tag": trade.enter_tag,
-                "direction": trade.trade_direction,
-                "current_profit": round(current_profit, 5),
-            }
+        self._diagnostics.emit(
+            "diagnostic",
+            pair,
+            current_time,
+            strategy="S3",
+            entry_tag=trade.enter_tag,
+            direction=trade.trade_direction,
+            current_profit=round(current_profit, 5),
+            open_minutes=int((current_time - trade.open_date_utc).total_seconds() / 60),
+            trade_open=trade.open_date_utc,
         )
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
@@ -1,11 +1,21 @@
+import logging
 from datetime import datetime
 from typing import Dict
 
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import IStrategy, DecimalParameter, IntParameter, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import IStrategy, DecimalParameter, IntParameter
+
+from strategy_support import cached_ta
+from strategy_support.diagnostics import DiagnosticsSink
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.range_extremes import RangeExtremeCache
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
+
+logger = logging.getLogger(__name__)
 
 
 class S4_MFT_Progressive_BreakoutRetest(IStrategy):
@@ -28,6 +38,10 @@ class S4_MFT_Progressive_BreakoutRetest(IStrategy):
     timeframe = "15m"
     informative_timeframe = "1h"
     startup_candle_count = 350
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "1h": ["ema50", "ema200", "adx"],
+    }
 
     breakout_window = IntParameter(20, 100, default=55, space="buy")
     retest_buffer = DecimalParameter(0.0005, 0.008, default=0.002, decimals=4, space="buy")
@@ -43,11 +57,11 @@ class S4_MFT_Progressive_BreakoutRetest(IStrategy):
     roi_decay = DecimalParameter(0.0, 0.03, default=0.01, decimals=3, space="sell")
     roi_t = IntParameter(40, 220, default=120, space="sell")
 
-    @property
+    @roi_property("roi_initial", "roi_t", "roi_decay")
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": float(self.roi_initial.value), str(int(self.roi_t.value)): float(self.roi_decay.value), "600": 0.0}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 6},
@@ -70,21 +84,44 @@ class S4_MFT_Progressive_BreakoutRetest(IStrategy):
     def informative_pairs(self):
         return [(pair, self.informative_timeframe) for pair in self.dp.current_whitelist()]
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._extremes = RangeExtremeCache()
+        self._diagnostics = DiagnosticsSink.from_config(self.config, logger)
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_1h(self, inf: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_ind = cached_ta(inf, pair, self.informative_timeframe)
+        inf["ema50"] = inf_ind.EMA(timeperiod=50)
+        inf["ema200"] = inf_ind.EMA(timeperiod=200)
+        inf["adx"] = inf_ind.ADX(timeperiod=14)
+        return inf
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["hh"] = dataframe["high"].rolling(int(self.breakout_window.value)).max()
-        dataframe["ll"] = dataframe["low"].rolling(int(self.breakout_window.value)).min()
+        dataframe = self._breakout_levels(dataframe, metadata["pair"])
 
         inf = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf["ema50"] = ta.EMA(inf, timeperiod=50)
-        inf["ema200"] = ta.EMA(inf, timeperiod=200)
-        inf["adx"] = ta.ADX(inf, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf, self._populate_informative_1h
+        )
+        return dataframe
+
+    def _breakout_levels(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        # One range-extreme index per pair serves every breakout_window value, so a new window is a lookup.
+        window = int(self.breakout_window.value)
+        max_window = int(self.breakout_window.high)
+        dataframe["hh"] = self._extremes.rolling_max(pair, dataframe, "high", window, max_window)
+        dataframe["ll"] = self._extremes.rolling_min(pair, dataframe, "low", window, max_window)
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        # Refresh the levels for the current window; hyperopt changes it without re-running populate_indicators.
+        dataframe = self._breakout_levels(dataframe, metadata["pair"])
+
         # Regime filter: avoid chop for breakout systems.
         trend_ok = (
             (dataframe["adx"] > self.adx_min.value)
@@ -124,14 +161,19 @@ class S4_MFT_Progressive_BreakoutRetest(IStrategy):
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        self.logger.info(
-            {
-                "event": "diagnostic",
-                "strategy": "S4",
-                "pair": pair,
-                "side": trade.trade_direction,
-                "entry_tag": trade.enter_tag,
-                "profit": round(current_profit, 5),
-            }
+        self._diagnostics.emit(
+            "diagnostic",
+            pair,
+            current_time,
+            strategy="S4",
+            side=trade.trade_direction,
+            entry_tag=trade.enter_tag,
+            profit=round(current_profit, 5),
+            open_minutes=int((current_time - trade.open_date_utc).total_seconds() / 60),
+            trade_open=trade.open_date_utc,
         )
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
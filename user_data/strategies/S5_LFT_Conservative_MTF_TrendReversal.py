@@ -4,11 +4,17 @@ from datetime import datetime
 from typing import Dict
 
 import numpy as np
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
+
+from strategy_support import IncrementalIndicatorEngine, cached_ta, is_live_runmode
+from strategy_support.capital_state import CapitalStateService, StressScoreMachine
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
 
 
 class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
@@ -37,6 +43,11 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
     informative_timeframe = "4h"
     anchor_timeframe = "1d"
     startup_candle_count = 450
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "4h": ["ema50", "ema200"],
+        "1d": ["ema50", "ema200", "rsi"],
+    }
 
     adx_min = IntParameter(18, 38, default=24, space="buy")
     reversal_rsi_long = IntParameter(30, 48, default=40, space="buy")
@@ -49,11 +60,11 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
     trailing_stop_positive_offset = 0.03
     trailing_only_offset_is_reached = True
 
-    @property
+    @roi_property()
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": 0.035, "240": 0.015, "720": 0.0}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 6},
@@ -79,24 +90,26 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
         informative.extend((pair, self.anchor_timeframe) for pair in pairs)
         return informative
 
-    def _compute_capital_state(self, dataframe: DataFrame) -> DataFrame:
-        # Higher values indicate stressed market conditions.
-        dataframe["stress_score"] = (
-            (dataframe["atr_pct"] > dataframe["atr_pct"].rolling(120).quantile(0.85)).astype(int)
-            + (dataframe["volume"] > 1.8 * dataframe["volume"].rolling(48).mean()).astype(int)
-            + (dataframe["close"] < dataframe["ema200"]).astype(int)
+    @staticmethod
+    def _capital_state_machine() -> StressScoreMachine:
+        return StressScoreMachine(
+            quantile_window=120, quantile=0.85, volume_window=48, volume_mult=1.8, drop_lag=24, drop_limit=-0.08
         )
 
-        dataframe["capital_state"] = 0
-        dataframe.loc[dataframe["stress_score"] >= 2, "capital_state"] = 1
-        dataframe.loc[
-            (dataframe["stress_score"] >= 3)
-            | ((dataframe["close"] / dataframe["close"].shift(24) - 1) < -0.08),
-            "capital_state",
-        ] = 2
+    def _compute_capital_state(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        # Higher stress_score values indicate stressed market conditions.
+        if is_live_runmode(self.dp):
+            states = self._capital_stream.update(pair, dataframe)
+        else:
+            states = self._capital_state_machine().compute(dataframe)
+        for column, values in states.items():
+            dataframe[column] = values.astype(int)
         return dataframe
 
-    def _latest_capital_state(self, pair: str) -> int:
+    def _latest_capital_state(self, pair: str, current_time: datetime) -> int:
+        state = self._capital_states.lookup(pair, current_time)
+        if state is not None:
+            return state
         if not self.dp:
             return 0
         dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
@@ -104,31 +117,53 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
             return 0
         return int(dataframe["capital_state"].iloc[-1])
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._capital_states = CapitalStateService(self.timeframe)
+        self._capital_stream = IncrementalIndicatorEngine(
+            self.timeframe, lambda: self._capital_state_machine().outputs()
+        )
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_4h(self, inf_4h: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_4h_ind = cached_ta(inf_4h, pair, self.informative_timeframe)
+        inf_4h["ema50"] = inf_4h_ind.EMA(timeperiod=50)
+        inf_4h["ema200"] = inf_4h_ind.EMA(timeperiod=200)
+        inf_4h["adx"] = inf_4h_ind.ADX(timeperiod=14)
+        return inf_4h
+
+    def _populate_informative_1d(self, inf_1d: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_1d_ind = cached_ta(inf_1d, pair, self.anchor_timeframe)
+        inf_1d["ema50"] = inf_1d_ind.EMA(timeperiod=50)
+        inf_1d["ema200"] = inf_1d_ind.EMA(timeperiod=200)
+        inf_1d["rsi"] = inf_1d_ind.RSI(timeperiod=14)
+        return inf_1d
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["ema200"] = ta.EMA(dataframe, timeperiod=200)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["rsi"] = ta.RSI(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["ema200"] = ind.EMA(timeperiod=200)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["rsi"] = ind.RSI(timeperiod=14)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
 
         inf_4h = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf_4h["ema50"] = ta.EMA(inf_4h, timeperiod=50)
-        inf_4h["ema200"] = ta.EMA(inf_4h, timeperiod=200)
-        inf_4h["adx"] = ta.ADX(inf_4h, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf_4h, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf_4h, self._populate_informative_4h
+        )
 
         inf_1d = self.dp.get_pair_dataframe(metadata["pair"], self.anchor_timeframe)
-        inf_1d["ema50"] = ta.EMA(inf_1d, timeperiod=50)
-        inf_1d["ema200"] = ta.EMA(inf_1d, timeperiod=200)
-        inf_1d["rsi"] = ta.RSI(inf_1d, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf_1d, self.timeframe, self.anchor_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.anchor_timeframe, inf_1d, self._populate_informative_1d
+        )
 
         # Optional placeholders for exchange-specific derivatives data.
         dataframe["funding_rate_placeholder"] = np.nan
         dataframe["open_interest_placeholder"] = np.nan
 
-        dataframe = self._compute_capital_state(dataframe)
+        dataframe = self._compute_capital_state(dataframe, metadata["pair"])
+        self._capital_states.publish(metadata["pair"], dataframe)
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -175,12 +210,12 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
 
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float, time_in_force: str,
                             current_time: datetime, entry_tag: str | None, side: str, **kwargs) -> bool:
-        return self._latest_capital_state(pair) < 2
+        return self._latest_capital_state(pair, current_time) < 2
 
     def custom_stake_amount(self, pair: str, current_time: datetime, current_rate: float, proposed_stake: float,
                             min_stake: float | None, max_stake: float, leverage: float, entry_tag: str | None,
                             side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state >= 2:
             return 0.0
         if state == 1:
@@ -189,13 +224,17 @@ class S5_LFT_Conservative_MTF_TrendReversal(IStrategy):
 
     def leverage(self, pair: str, current_time: datetime, current_rate: float, proposed_leverage: float,
                  max_leverage: float, entry_tag: str | None, side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state == 1:
             return min(1.5, max_leverage)
         return min(2.0, max_leverage)
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        if self._latest_capital_state(pair) >= 2:
+        if self._latest_capital_state(pair, current_time) >= 2:
             return "s5_kill_switch_exit"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict
 
 import numpy as np
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
+
+from strategy_support import IncrementalIndicatorEngine, cached_ta, is_live_runmode
+from strategy_support.benchmark import BenchmarkBasket
+from strategy_support.capital_state import CapitalStateService, DrawdownMachine
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.panel import CrossSectionalPanel
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.signal_batch import parameter_values, shifted, signal_columns
+from strategy_support.trade_index import LiveProtections
 
 
 class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
@@ -31,10 +40,19 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
     timeframe = "1h"
     informative_timeframe = "4h"
     startup_candle_count = 450
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "4h": ["ema50", "ema200"],
+    }
 
     momentum_window = IntParameter(12, 72, default=24, space="buy")
     rs_threshold = DecimalParameter(0.002, 0.08, default=0.015, decimals=3, space="buy")
     adx_min = IntParameter(16, 40, default=22, space="buy")
+    # Columns and parameters read by entry_signals (see strategy_support.signal_batch); momentum_window
+    # changes the indicators themselves and is not batched.
+    entry_signal_columns = ("adx", "volume", "vol_ma", "atr_pct", "capital_state", "ema50_4h", "ema200_4h", "close",
+                            "ema20", "rs_score")
+    entry_signal_params = ("rs_threshold", "adx_min")
 
     stoploss = -0.055
     trailing_stop = True
@@ -44,11 +62,11 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
 
     benchmark_pairs = ["BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT"]
 
-    @property
+    @roi_property()
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": 0.04, "180": 0.018, "600": 0.0}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 6},
@@ -66,16 +84,26 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
         pairs.update(self.benchmark_pairs)
         return [(pair, self.informative_timeframe) for pair in pairs]
 
-    def _compute_capital_state(self, dataframe: DataFrame) -> DataFrame:
-        drawdown_48h = dataframe["close"] / dataframe["close"].rolling(48).max() - 1
-        dataframe["capital_state"] = 0
-        risk_off = (drawdown_48h < -0.06) | (dataframe["atr_pct"] > dataframe["atr_pct"].rolling(96).quantile(0.9))
-        kill_switch = (drawdown_48h < -0.1) & (dataframe["volume"] > 2.2 * dataframe["volume"].rolling(48).mean())
-        dataframe.loc[risk_off, "capital_state"] = 1
-        dataframe.loc[kill_switch, "capital_state"] = 2
+    @staticmethod
+    def _capital_state_machine() -> DrawdownMachine:
+        return DrawdownMachine(
+            drawdown_window=48, quantile_window=96, quantile=0.9, volume_window=48, volume_mult=2.2,
+            risk_off_drawdown=-0.06, kill_drawdown=-0.1,
+        )
+
+    def _compute_capital_state(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        if is_live_runmode(self.dp):
+            states = self._capital_stream.update(pair, dataframe)
+        else:
+            states = self._capital_state_machine().compute(dataframe)
+        for column, values in states.items():
+            dataframe[column] = values.astype(int)
         return dataframe
 
-    def _latest_capital_state(self, pair: str) -> int:
+    def _latest_capital_state(self, pair: str, current_time: datetime) -> int:
+        state = self._capital_states.lookup(pair, current_time)
+        if state is not None:
+            return state
         if not self.dp:
             return 0
         dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
@@ -91,65 +119,91 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
             return 0.0
         return float(informative["close"].iloc[-1] / informative["close"].iloc[-window] - 1)
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._capital_states = CapitalStateService(self.timeframe)
+        self._benchmark = BenchmarkBasket(self.benchmark_pairs, self.timeframe)
+        self._panel = CrossSectionalPanel(self.timeframe, self.benchmark_pairs)
+        self._capital_stream = IncrementalIndicatorEngine(
+            self.timeframe, lambda: self._capital_state_machine().outputs()
+        )
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_4h(self, inf: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_ind = cached_ta(inf, pair, self.informative_timeframe)
+        inf["ema50"] = inf_ind.EMA(timeperiod=50)
+        inf["ema200"] = inf_ind.EMA(timeperiod=200)
+        return inf
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema20"] = ta.EMA(dataframe, timeperiod=20)
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema20"] = ind.EMA(timeperiod=20)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
+        dataframe["vol_ma"] = dataframe["volume"].rolling(48).mean()
         dataframe["pair_ret"] = dataframe["close"].pct_change(int(self.momentum_window.value))
 
         inf = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf["ema50"] = ta.EMA(inf, timeperiod=50)
-        inf["ema200"] = ta.EMA(inf, timeperiod=200)
-        dataframe = merge_informative_pair(dataframe, inf, self.timeframe, self.informative_timeframe, ffill=True)
-
-        benchmark_returns = []
-        window = int(self.momentum_window.value)
-        for bench in self.benchmark_pairs:
-            bench_df = self.dp.get_pair_dataframe(bench, self.timeframe)
-            if bench_df is not None and len(bench_df) > window:
-                benchmark_returns.append(bench_df["close"].pct_change(window))
-
-        if benchmark_returns:
-            bench_mean_series = sum(benchmark_returns) / len(benchmark_returns)
-            aligned = bench_mean_series.reindex(dataframe.index).ffill()
-            dataframe["benchmark_ret"] = aligned
-        else:
-            dataframe["benchmark_ret"] = 0.0
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf, self._populate_informative_4h
+        )
+
+        # Basket mean return, built once per candle and window and joined on date.
+        benchmark_ret = self._benchmark.returns(self.dp, dataframe, int(self.momentum_window.value))
+        dataframe["benchmark_ret"] = benchmark_ret if benchmark_ret is not None else 0.0
 
         dataframe["rs_score"] = dataframe["pair_ret"] - dataframe["benchmark_ret"]
+
+        # Standing of this pair's relative strength across the whole whitelist at each candle.
+        cross_section = self._panel.pair_columns(
+            self.dp, metadata["pair"], dataframe, int(self.momentum_window.value)
+        )
+        for column in ("rs_rank", "rs_pct", "rs_zscore"):
+            dataframe[column] = cross_section[column]
+
         dataframe["funding_rate_placeholder"] = np.nan
         dataframe["open_interest_placeholder"] = np.nan
 
-        dataframe = self._compute_capital_state(dataframe)
+        dataframe = self._compute_capital_state(dataframe, metadata["pair"])
+        self._capital_states.publish(metadata["pair"], dataframe)
         return dataframe
 
-    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+    @staticmethod
+    def entry_signals(columns: Dict[str, np.ndarray], params: Dict[str, Any]) -> Dict[str, np.ndarray]:
         # When NOT to trade: weak trend quality, insufficient liquidity, and kill-switch risk.
         avoid_trading = (
-            (dataframe["adx"] < self.adx_min.value)
-            | (dataframe["volume"] < dataframe["volume"].rolling(48).mean() * 0.7)
-            | (dataframe["atr_pct"] > 0.07)
-            | (dataframe["capital_state"] >= 2)
+            (columns["adx"] < params["adx_min"])
+            | (columns["volume"] < columns["vol_ma"] * 0.7)
+            | (columns["atr_pct"] > 0.07)
+            | (columns["capital_state"] >= 2)
         )
 
+        rs_score = columns["rs_score"]
+        rs_prev = shifted(rs_score)
         long_signal = (
-            (dataframe["ema50_4h"] > dataframe["ema200_4h"])
-            & (dataframe["close"] > dataframe["ema20"])
-            & (dataframe["rs_score"] > self.rs_threshold.value)
-            & (dataframe["rs_score"] > dataframe["rs_score"].shift(1))
+            (columns["ema50_4h"] > columns["ema200_4h"])
+            & (columns["close"] > columns["ema20"])
+            & (rs_score > params["rs_threshold"])
+            & (rs_score > rs_prev)
         )
 
         short_signal = (
-            (dataframe["ema50_4h"] < dataframe["ema200_4h"])
-            & (dataframe["close"] < dataframe["ema20"])
-            & (dataframe["rs_score"] < -self.rs_threshold.value)
-            & (dataframe["rs_score"] < dataframe["rs_score"].shift(1))
+            (columns["ema50_4h"] < columns["ema200_4h"])
+            & (columns["close"] < columns["ema20"])
+            & (rs_score < -params["rs_threshold"])
+            & (rs_score < rs_prev)
         )
 
-        dataframe.loc[long_signal & ~avoid_trading, ["enter_long", "enter_tag"]] = (1, "s6_rotation_long")
-        dataframe.loc[short_signal & ~avoid_trading, ["enter_short", "enter_tag"]] = (1, "s6_rotation_short")
+        return {"enter_long": long_signal & ~avoid_trading, "enter_short": short_signal & ~avoid_trading}
+
+    def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        signals = self.entry_signals(
+            signal_columns(dataframe, self.entry_signal_columns), parameter_values(self, self.entry_signal_params)
+        )
+        dataframe.loc[signals["enter_long"], ["enter_long", "enter_tag"]] = (1, "s6_rotation_long")
+        dataframe.loc[signals["enter_short"], ["enter_short", "enter_tag"]] = (1, "s6_rotation_short")
         return dataframe
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -165,12 +219,12 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
 
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float, time_in_force: str,
                             current_time: datetime, entry_tag: str | None, side: str, **kwargs) -> bool:
-        return self._latest_capital_state(pair) < 2
+        return self._latest_capital_state(pair, current_time) < 2
 
     def custom_stake_amount(self, pair: str, current_time: datetime, current_rate: float, proposed_stake: float,
                             min_stake: float | None, max_stake: float, leverage: float, entry_tag: str | None,
                             side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state >= 2:
             return 0.0
         if state == 1:
@@ -179,13 +233,17 @@ class S6_LFT_Progressive_Momentum_Rotation(IStrategy):
 
     def leverage(self, pair: str, current_time: datetime, current_rate: float, proposed_leverage: float,
                  max_leverage: float, entry_tag: str | None, side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state == 1:
             return min(1.8, max_leverage)
         return min(2.3, max_leverage)
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        if self._latest_capital_state(pair) >= 2:
+        if self._latest_capital_state(pair, current_time) >= 2:
             return "s6_kill_switch_exit"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
@@ -4,12 +4,17 @@ from datetime import datetime
 from typing import Dict
 
 import numpy as np
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
+from freqtrade.persistence import Order, Trade
 from freqtrade.strategy import IStrategy
 
+from strategy_support import IncrementalIndicatorEngine, cached_ta, is_live_runmode
+from strategy_support.capital_state import CapitalStateService, ShockMachine
+from strategy_support.rolling_quantile import rolling_quantile_series, rolling_quantiles
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
+
 
 class S7_Event_Volatility_Shock_Strategy(IStrategy):
     """
@@ -36,11 +41,11 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
     trailing_stop_positive_offset = 0.03
     trailing_only_offset_is_reached = True
 
-    @property
+    @roi_property()
     def minimal_roi(self) -> Dict[str, float]:
         return {"0": 0.03, "90": 0.012, "360": 0.0}
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 8},
@@ -60,15 +65,23 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
             },
         ]
 
-    def _compute_capital_state(self, dataframe: DataFrame) -> DataFrame:
-        recent_drop = dataframe["close"] / dataframe["close"].shift(32) - 1
-        stress = (dataframe["volatility_burst"] & dataframe["volume_spike"]).astype(int) + (recent_drop < -0.07).astype(int)
-        dataframe["capital_state"] = 0
-        dataframe.loc[stress >= 1, "capital_state"] = 1
-        dataframe.loc[(stress >= 2) | (recent_drop < -0.12), "capital_state"] = 2
+    @staticmethod
+    def _capital_state_machine() -> ShockMachine:
+        return ShockMachine(drop_lag=32, stress_drop=-0.07, kill_drop=-0.12)
+
+    def _compute_capital_state(self, dataframe: DataFrame, pair: str) -> DataFrame:
+        if is_live_runmode(self.dp):
+            states = self._capital_stream.update(pair, dataframe)
+        else:
+            states = self._capital_state_machine().compute(dataframe)
+        for column, values in states.items():
+            dataframe[column] = values.astype(int)
         return dataframe
 
-    def _latest_capital_state(self, pair: str) -> int:
+    def _latest_capital_state(self, pair: str, current_time: datetime) -> int:
+        state = self._capital_states.lookup(pair, current_time)
+        if state is not None:
+            return state
         if not self.dp:
             return 0
         dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
@@ -76,18 +89,28 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
             return 0
         return int(dataframe["capital_state"].iloc[-1])
 
+    def bot_start(self, **kwargs) -> None:
+        self._capital_states = CapitalStateService(self.timeframe)
+        self._capital_stream = IncrementalIndicatorEngine(
+            self.timeframe, lambda: self._capital_state_machine().outputs()
+        )
+        self._protections = LiveProtections.attach(self)
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema20"] = ta.EMA(dataframe, timeperiod=20)
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema20"] = ind.EMA(timeperiod=20)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["rsi"] = ta.RSI(dataframe, timeperiod=14)
+        dataframe["rsi"] = ind.RSI(timeperiod=14)
 
-        dataframe["volatility_burst"] = dataframe["atr_pct"] > dataframe["atr_pct"].rolling(96).quantile(0.9)
+        # Both atr_pct quantiles come from one pass over the same 96-candle window.
+        atr_pct_q90, dataframe["atr_pct_q40"] = rolling_quantiles(dataframe["atr_pct"], 96, (0.9, 0.4))
+        dataframe["volatility_burst"] = dataframe["atr_pct"] > atr_pct_q90
         dataframe["volume_spike"] = dataframe["volume"] > dataframe["volume"].rolling(96).mean() * 2.0
 
         dataframe["true_range"] = (dataframe["high"] - dataframe["low"]) / dataframe["close"]
-        dataframe["range_expansion"] = dataframe["true_range"] > dataframe["true_range"].rolling(96).quantile(0.9)
+        dataframe["range_expansion"] = dataframe["true_range"] > rolling_quantile_series(dataframe["true_range"], 96, 0.9)
 
         # Follow-through uses the already closed previous candle to avoid lookahead.
         dataframe["bull_follow_through"] = dataframe["close"].shift(1) > dataframe["high"].shift(2)
@@ -103,7 +126,8 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
         dataframe["funding_rate_placeholder"] = np.nan
         dataframe["open_interest_placeholder"] = np.nan
 
-        dataframe = self._compute_capital_state(dataframe)
+        dataframe = self._compute_capital_state(dataframe, metadata["pair"])
+        self._capital_states.publish(metadata["pair"], dataframe)
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -111,7 +135,7 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
         avoid_trading = (
             (dataframe["capital_state"] >= 2)
             | (dataframe["volume"] < dataframe["volume"].rolling(48).mean() * 0.8)
-            | (dataframe["atr_pct"] < dataframe["atr_pct"].rolling(96).quantile(0.4))
+            | (dataframe["atr_pct"] < dataframe["atr_pct_q40"])
         )
 
         dataframe.loc[
@@ -139,12 +163,12 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
 
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float, time_in_force: str,
                             current_time: datetime, entry_tag: str | None, side: str, **kwargs) -> bool:
-        return self._latest_capital_state(pair) < 2
+        return self._latest_capital_state(pair, current_time) < 2
 
     def custom_stake_amount(self, pair: str, current_time: datetime, current_rate: float, proposed_stake: float,
                             min_stake: float | None, max_stake: float, leverage: float, entry_tag: str | None,
                             side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state >= 2:
             return 0.0
         if state == 1:
@@ -153,13 +177,17 @@ class S7_Event_Volatility_Shock_Strategy(IStrategy):
 
     def leverage(self, pair: str, current_time: datetime, current_rate: float, proposed_leverage: float,
                  max_leverage: float, entry_tag: str | None, side: str, **kwargs) -> float:
-        state = self._latest_capital_state(pair)
+        state = self._latest_capital_state(pair, current_time)
         if state == 1:
             return min(1.4, max_leverage)
         return min(2.0, max_leverage)
 
     def custom_exit(self, pair: str, trade: Trade, current_time: datetime, current_rate: float, current_profit: float,
                     **kwargs) -> str | None:
-        if self._latest_capital_state(pair) >= 2:
+        if self._latest_capital_state(pair, current_time) >= 2:
             return "s7_kill_switch_exit"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
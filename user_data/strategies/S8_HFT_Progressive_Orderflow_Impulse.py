@@ -1,11 +1,17 @@
 from datetime import datetime
 from typing import Dict
 
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
+
+from strategy_support import cached_ta
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.streaming import ADX, ATR, EMA, IncrementalIndicatorEngine, RollingMean, is_live_runmode
+from strategy_support.trade_index import LiveProtections
 
 
 class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
@@ -20,6 +26,10 @@ class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
     timeframe = "1m"
     informative_timeframe = "5m"
     startup_candle_count = 320
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "5m": ["ema21", "ema55", "adx"],
+    }
 
     adx_floor = IntParameter(14, 36, default=20, space="buy")
     impulse_threshold = DecimalParameter(0.0008, 0.0060, default=0.0022, decimals=4, space="buy")
@@ -36,7 +46,7 @@ class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
     roi_t1 = IntParameter(4, 22, default=10, space="sell")
     roi_t2 = IntParameter(16, 64, default=28, space="sell")
 
-    @property
+    @roi_property("roi_fast", "roi_t1", "roi_slow", "roi_t2")
     def minimal_roi(self) -> Dict[str, float]:
         return {
             "0": float(self.roi_fast.value),
@@ -44,7 +54,7 @@ class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
             str(int(self.roi_t2.value)): 0.0,
         }
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 4},
@@ -67,20 +77,47 @@ class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
     def informative_pairs(self):
         return [(pair, self.informative_timeframe) for pair in self.dp.current_whitelist()]
 
+    def bot_start(self, **kwargs) -> None:
+        # Live/dry-run only: fold each new 1m candle into per-pair indicator state.
+        self._stream = IncrementalIndicatorEngine(self.timeframe, self._streaming_indicators)
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._protections = LiveProtections.attach(self)
+
+    @staticmethod
+    def _streaming_indicators():
+        return {
+            "ema9": EMA(9),
+            "ema21": EMA(21),
+            "adx": ADX(14),
+            "atr": ATR(14),
+            "vol_ma": RollingMean(20, "volume"),
+        }
+
+    def _populate_informative_5m(self, inf: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_ind = cached_ta(inf, pair, self.informative_timeframe)
+        inf["ema21"] = inf_ind.EMA(timeperiod=21)
+        inf["ema55"] = inf_ind.EMA(timeperiod=55)
+        inf["adx"] = inf_ind.ADX(timeperiod=14)
+        return inf
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema9"] = ta.EMA(dataframe, timeperiod=9)
-        dataframe["ema21"] = ta.EMA(dataframe, timeperiod=21)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        if is_live_runmode(self.dp):
+            for column, values in self._stream.update(metadata["pair"], dataframe).items():
+                dataframe[column] = values
+        else:
+            ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+            dataframe["ema9"] = ind.EMA(timeperiod=9)
+            dataframe["ema21"] = ind.EMA(timeperiod=21)
+            dataframe["adx"] = ind.ADX(timeperiod=14)
+            dataframe["atr"] = ind.ATR(timeperiod=14)
+            dataframe["vol_ma"] = dataframe["volume"].rolling(20).mean()
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["vol_ma"] = dataframe["volume"].rolling(20).mean()
         dataframe["impulse"] = (dataframe["close"] - dataframe["open"]) / dataframe["open"]
 
         inf = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf["ema21"] = ta.EMA(inf, timeperiod=21)
-        inf["ema55"] = ta.EMA(inf, timeperiod=55)
-        inf["adx"] = ta.ADX(inf, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf, self._populate_informative_5m
+        )
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -121,3 +158,7 @@ class S8_HFT_Progressive_Orderflow_Impulse(IStrategy):
         if current_profit < -0.015 and (current_time - trade.open_date_utc).total_seconds() > 25 * 60:
             return "s8_time_stop"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
@@ -1,11 +1,16 @@
 from datetime import datetime
 from typing import Dict
 
-import talib.abstract as ta
 from pandas import DataFrame
 
-from freqtrade.persistence import Trade
-from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy, merge_informative_pair
+from freqtrade.persistence import Order, Trade
+from freqtrade.strategy import DecimalParameter, IntParameter, IStrategy
+
+from strategy_support import cached_ta
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.schedules import parameter_property, roi_property
+from strategy_support.trade_index import LiveProtections
 
 
 class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
@@ -20,6 +25,10 @@ class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
     timeframe = "15m"
     informative_timeframe = "1h"
     startup_candle_count = 350
+    # Informative columns read by the entry/exit logic; only these are merged onto the base frame.
+    informative_columns = {
+        "1h": ["ema50", "ema200", "adx"],
+    }
 
     adx_floor = IntParameter(16, 38, default=24, space="buy")
     roc_threshold = DecimalParameter(0.004, 0.03, default=0.012, decimals=3, space="buy")
@@ -36,7 +45,7 @@ class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
     roi_t1 = IntParameter(12, 72, default=24, space="sell")
     roi_t2 = IntParameter(40, 180, default=90, space="sell")
 
-    @property
+    @roi_property("roi_fast", "roi_t1", "roi_mid", "roi_t2")
     def minimal_roi(self) -> Dict[str, float]:
         return {
             "0": float(self.roi_fast.value),
@@ -44,7 +53,7 @@ class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
             str(int(self.roi_t2.value)): 0.0,
         }
 
-    @property
+    @parameter_property()
     def protections(self):
         return [
             {"method": "CooldownPeriod", "stop_duration_candles": 3},
@@ -67,20 +76,31 @@ class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
     def informative_pairs(self):
         return [(pair, self.informative_timeframe) for pair in self.dp.current_whitelist()]
 
+    def bot_start(self, **kwargs) -> None:
+        self._informative = InformativeCache(self.timeframe, self.informative_columns)
+        self._protections = LiveProtections.attach(self)
+
+    def _populate_informative_1h(self, inf: OverlayFrame, pair: str) -> OverlayFrame:
+        inf_ind = cached_ta(inf, pair, self.informative_timeframe)
+        inf["ema50"] = inf_ind.EMA(timeperiod=50)
+        inf["ema200"] = inf_ind.EMA(timeperiod=200)
+        inf["adx"] = inf_ind.ADX(timeperiod=14)
+        return inf
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe["ema20"] = ta.EMA(dataframe, timeperiod=20)
-        dataframe["ema50"] = ta.EMA(dataframe, timeperiod=50)
-        dataframe["adx"] = ta.ADX(dataframe, timeperiod=14)
-        dataframe["atr"] = ta.ATR(dataframe, timeperiod=14)
+        ind = cached_ta(dataframe, metadata["pair"], self.timeframe)
+        dataframe["ema20"] = ind.EMA(timeperiod=20)
+        dataframe["ema50"] = ind.EMA(timeperiod=50)
+        dataframe["adx"] = ind.ADX(timeperiod=14)
+        dataframe["atr"] = ind.ATR(timeperiod=14)
         dataframe["atr_pct"] = dataframe["atr"] / dataframe["close"]
-        dataframe["roc"] = ta.ROC(dataframe, timeperiod=6) / 100
-        dataframe["rsi"] = ta.RSI(dataframe, timeperiod=14)
+        dataframe["roc"] = ind.ROC(timeperiod=6) / 100
+        dataframe["rsi"] = ind.RSI(timeperiod=14)
 
         inf = self.dp.get_pair_dataframe(metadata["pair"], self.informative_timeframe)
-        inf["ema50"] = ta.EMA(inf, timeperiod=50)
-        inf["ema200"] = ta.EMA(inf, timeperiod=200)
-        inf["adx"] = ta.ADX(inf, timeperiod=14)
-        dataframe = merge_informative_pair(dataframe, inf, self.timeframe, self.informative_timeframe, ffill=True)
+        dataframe = self._informative.merge(
+            dataframe, metadata["pair"], self.informative_timeframe, inf, self._populate_informative_1h
+        )
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -121,3 +141,7 @@ class S9_MFT_Aggressive_TrendAcceleration(IStrategy):
         if current_profit < -0.03 and (current_time - trade.open_date_utc).total_seconds() > 8 * 3600:
             return "s9_timeout_loss"
         return None
+
+    def order_filled(self, pair: str, trade: Trade, order: Order, current_time: datetime, **kwargs) -> None:
+        if self._protections is not None:
+            self._protections.trade_closed(self, trade, current_time)
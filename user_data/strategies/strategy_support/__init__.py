@@ -0,0 +1,89 @@
+"""
+Shared runtime helpers for the S1-S10 strategy pack.
+
+Freqtrade puts the strategy directory on ``sys.path`` while loading a strategy
+file, so strategies import this package as ``strategy_support``. It contains no
+``IStrategy`` subclasses and is skipped by the strategy resolver.
+"""
+
+from strategy_support.allocation import InverseVolAllocator
+from strategy_support.benchmark import BenchmarkBasket
+from strategy_support.capital_state import (
+    CapitalStateMachine,
+    CapitalStateService,
+    DrawdownMachine,
+    ShockMachine,
+    StressScoreMachine,
+)
+from strategy_support.correlation_throttle import CorrelationThrottle, RollingCorrelation
+from strategy_support.diagnostics import DiagnosticsSink
+from strategy_support.event_recorder import EventLog, EventRecorder
+from strategy_support.exit_simulator import ExitSimulation, compare_trades, simulate_exits
+from strategy_support.indicator_cache import INDICATOR_CACHE, CachedTA, IndicatorCache, cached_ta
+from strategy_support.informative import InformativeCache
+from strategy_support.overlay import OverlayFrame
+from strategy_support.panel import CrossSectionalPanel
+from strategy_support.portfolio import (
+    PortfolioPolicy,
+    PortfolioResult,
+    PortfolioSimulator,
+    ProfileSweep,
+    SweepResult,
+    profile_variants,
+)
+from strategy_support.protection_simulator import ProtectionReplay, protection_grid, replay_protections
+from strategy_support.range_extremes import RangeExtremeCache, RangeExtremeIndex
+from strategy_support.rolling_quantile import RollingQuantiles, rolling_quantile_series, rolling_quantiles
+from strategy_support.schedules import RoiTable, parameter_property, roi_property
+from strategy_support.signal_batch import evaluate_entry_signals, iter_entry_signals
+from strategy_support.streaming import IncrementalIndicatorEngine, StreamingIndicator, is_live_runmode
+from strategy_support.trade_index import ClosedTradeIndex, LiveProtections
+
+__all__ = [
+    "INDICATOR_CACHE",
+    "BenchmarkBasket",
+    "CachedTA",
+    "CapitalStateMachine",
+    "CapitalStateService",
+    "ClosedTradeIndex",
+    "CorrelationThrottle",
+    "CrossSectionalPanel",
+    "DiagnosticsSink",
+    "DrawdownMachine",
+    "EventLog",
+    "EventRecorder",
+    "ExitSimulation",
+    "IncrementalIndicatorEngine",
+    "IndicatorCache",
+    "InformativeCache",
+    "InverseVolAllocator",
+    "LiveProtections",
+    "OverlayFrame",
+    "PortfolioPolicy",
+    "PortfolioResult",
+    "PortfolioSimulator",
+    "ProfileSweep",
+    "ProtectionReplay",
+    "RangeExtremeCache",
+    "RangeExtremeIndex",
+    "RoiTable",
+    "RollingCorrelation",
+    "RollingQuantiles",
+    "ShockMachine",
+    "StreamingIndicator",
+    "StressScoreMachine",
+    "SweepResult",
+    "cached_ta",
+    "compare_trades",
+    "evaluate_entry_signals",
+    "is_live_runmode",
+    "iter_entry_signals",
+    "parameter_property",
+    "profile_variants",
+    "protection_grid",
+    "replay_protections",
+    "roi_property",
+    "rolling_quantile_series",
+    "rolling_quantiles",
+    "simulate_exits",
+]
@@ -0,0 +1,22 @@
+"""
+Optional numba acceleration for the array kernels in this package.
+
+numba is not a freqtrade dependency. When it is installed, kernels decorated
+with :func:`njit` are compiled on first use; otherwise the decorator is a no-op
+and callers are expected to pick a NumPy fallback via ``HAVE_NUMBA``.
+"""
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+
+__all__ = ["HAVE_NUMBA", "njit"]
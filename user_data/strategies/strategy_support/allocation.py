@@ -0,0 +1,267 @@
+"""
+Incremental inverse-volatility allocation for live deployment.
+
+``allocation_policy`` in ``user_data/configs/portfolio_orchestration_profiles.yaml``
+sizes buckets and strategies by inverse volatility:
+
+- the volatility is an EWMA (``ewma_lambda``) of daily returns, per strategy
+  and per bucket,
+- a bucket stays equal-weight until all its strategies have
+  ``min_trade_history`` closed trades,
+- weights are limited by the bucket caps and a minimum active bucket weight.
+
+Recomputing that from the whole trade history on every allocation cycle gets
+slower as the history grows.
+
+:class:`InverseVolAllocator` keeps only the EWMA variances and the return of
+the current UTC day per strategy:
+
+- trade closes and mark-to-market ticks add to the day's return in O(1);
+- crossing a day boundary folds the finished day into the variances, with the
+  empty days of a gap decayed in closed form;
+- :meth:`~InverseVolAllocator.weights` re-normalizes the capped weights on
+  demand and reuses them until a variance or a history threshold changes.
+
+Given a ``path``, the state (a few hundred bytes of JSON) is written after
+every recorded close and at every day roll, and read back on construction,
+so a restarted bot resumes without replaying its history. Marks and return
+increments between those points are saved by the next close or day roll, or
+by calling :meth:`~InverseVolAllocator.save` directly.
+:class:`~strategy_support.portfolio.PortfolioSimulator` allocates with the same
+class, so replays and live allocation agree.
+
+Typical live wiring, with the orchestration YAML loaded once::
+
+    allocator = InverseVolAllocator.from_policy(
+        PortfolioPolicy.from_yaml("user_data/configs/portfolio_orchestration_profiles.yaml"),
+        slots={"S1": 3, "S3": 4}, path="user_data/allocation_state.json")
+    allocator.record_close("S1", trade.close_date_utc, trade.close_profit)  # on every exit fill
+    allocator.mark("S3", current_time, open_profit_per_slot)               # optional, per tick
+    stake_fraction = allocator.weights()["S1"] / 3
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+DAY = 86400
+
+_STATE_VERSION = 1
+
+
+def capped_weights(raw: Mapping[str, float], caps: Mapping[str, float], floor: float = 0.0) -> Dict[str, float]:
+    """
+    Normalize ``raw`` to sum to one, then clamp to ``[floor, caps[key]]``.
+
+    Clamped keys are fixed and the remainder is re-spread pro rata over the
+    others until nothing moves; if the caps cannot absorb the whole weight the
+    rest stays unallocated.
+    """
+    free = {key: max(float(value), 0.0) for key, value in raw.items()}
+    fixed: Dict[str, float] = {}
+    while free:
+        budget = 1.0 - sum(fixed.values())
+        total = sum(free.values())
+        if total <= 0.0:
+            shares = {key: budget / len(free) for key in free}
+        else:
+            shares = {key: budget * value / total for key, value in free.items()}
+        clamped = {}
+        for key, share in shares.items():
+            cap = caps.get(key, 1.0)
+            if share > cap:
+                clamped[key] = cap
+            elif share < floor <= cap:
+                clamped[key] = floor
+        if not clamped:
+            fixed.update(shares)
+            break
+        fixed.update(clamped)
+        for key in clamped:
+            free.pop(key)
+    return fixed
+
+
+def _seconds(at: Union[datetime, int, float]) -> int:
+    return int(at.timestamp()) if isinstance(at, datetime) else int(at)
+
+
+class InverseVolAllocator:
+    """
+    Inverse-vol strategy weights from incrementally updated EWMA variances.
+
+    ``buckets`` maps each strategy id to its bucket and ``settings`` is the
+    ``allocation_policy`` section. :meth:`record_close` spreads a closed
+    trade's ``profit_ratio`` over the strategy's ``slots`` (its
+    ``max_open_trades``); :meth:`record_return` adds a return increment as
+    is; :meth:`mark` takes the strategy's current unrealized return and adds
+    its change since the previous mark, so marks plus closes sum to the
+    strategy's realized-and-unrealized daily return.
+    """
+
+    def __init__(self, buckets: Mapping[str, str], settings: Optional[Mapping[str, Any]] = None,
+                 slots: Optional[Mapping[str, int]] = None, default_slots: int = 3,
+                 enabled: Optional[Sequence[str]] = None, path: Optional[str] = None):
+        settings = settings or {}
+        self.strategies = list(buckets)
+        self.bucket_of = dict(buckets)
+        self.buckets = list(dict.fromkeys(self.bucket_of.values()))
+        self.enabled = list(self.strategies if enabled is None else enabled)
+        self.slots = dict(slots or {})
+        self.default_slots = int(default_slots)
+        self.lam = float(settings.get("ewma_lambda", 0.94))
+        self.lookback_days = int(settings.get("lookback_days", 20))
+        self.bucket_caps = {bucket: float(value) for bucket, value in settings.get("bucket_caps", {}).items()}
+        self.bucket_floor = float(settings.get("bucket_min_active_weight", 0.0))
+        self.min_history = int(settings.get("strategy_weighting", {}).get("min_trade_history", 100))
+        self.path = path
+
+        self.day: Optional[int] = None
+        self.days_seen = 0
+        self.day_returns = {strategy: 0.0 for strategy in self.strategies}
+        self.strategy_var = {strategy: 0.0 for strategy in self.strategies}
+        self.bucket_var = {bucket: 0.0 for bucket in self.buckets}
+        self.closed_count = {strategy: 0 for strategy in self.strategies}
+        self.marks = {strategy: 0.0 for strategy in self.strategies}
+        self._weights: Dict[str, float] = {}
+        self._weights_key = None
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @classmethod
+    def from_policy(cls, policy, **kwargs) -> "InverseVolAllocator":
+        """Allocator for a :class:`~strategy_support.portfolio.PortfolioPolicy`."""
+        buckets = {strategy: entry["bucket"] for strategy, entry in policy.strategy_map.items()}
+        enabled = [strategy for strategy in buckets if policy.enabled(strategy)]
+        return cls(buckets, policy.allocation, enabled=enabled, **kwargs)
+
+    def _check(self, strategy: str) -> None:
+        if strategy not in self.day_returns:
+            raise ValueError(f"unknown strategy {strategy!r}; expected one of {self.strategies}")
+
+    def advance(self, at: Union[datetime, int, float]) -> bool:
+        """Fold finished UTC days into the variances; True when a day boundary was crossed."""
+        day = _seconds(at) // DAY
+        if self.day is None:
+            self.day = day
+            return False
+        if day <= self.day:
+            return False
+        lam = self.lam
+        # The first rolled day carries the accumulated returns, the rest of a gap only decays.
+        decay = lam ** (day - self.day - 1)
+        bucket_returns = dict.fromkeys(self.buckets, 0.0)
+        bucket_members = dict.fromkeys(self.buckets, 0)
+        for strategy in self.strategies:
+            value = self.day_returns[strategy]
+            self.strategy_var[strategy] = (lam * self.strategy_var[strategy] + (1.0 - lam) * value * value) * decay
+            bucket_returns[self.bucket_of[strategy]] += value
+            bucket_members[self.bucket_of[strategy]] += 1
+            self.day_returns[strategy] = 0.0
+        for bucket in self.buckets:
+            value = bucket_returns[bucket] / max(bucket_members[bucket], 1)
+            self.bucket_var[bucket] = (lam * self.bucket_var[bucket] + (1.0 - lam) * value * value) * decay
+        self.days_seen += day - self.day
+        self.day = day
+        if self.path:
+            self.save()
+        return True
+
+    def record_close(self, strategy: str, at: Union[datetime, int, float], profit_ratio: float) -> None:
+        """A closed trade of ``strategy``: its return per slot and one more trade of history; saved given a path."""
+        self._check(strategy)
+        self.advance(at)
+        self.day_returns[strategy] += profit_ratio / self.slots.get(strategy, self.default_slots)
+        self.closed_count[strategy] += 1
+        if self.path:
+            self.save()
+
+    def record_return(self, strategy: str, at: Union[datetime, int, float], value: float) -> None:
+        self._check(strategy)
+        self.advance(at)
+        self.day_returns[strategy] += value
+
+    def mark(self, strategy: str, at: Union[datetime, int, float], unrealized: float) -> None:
+        """Mark-to-market tick: ``unrealized`` is the strategy's whole open return now, on the slot scale."""
+        self._check(strategy)
+        self.advance(at)
+        self.day_returns[strategy] += unrealized - self.marks[strategy]
+        self.marks[strategy] = unrealized
+
+    def volatility(self, strategy: str) -> float:
+        """Daily EWMA volatility of ``strategy``."""
+        return math.sqrt(self.strategy_var[strategy])
+
+    def weights(self, active: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """
+        Equity fraction of each active strategy (default: the enabled ones).
+
+        Buckets are weighted by capped inverse vol once ``lookback_days`` have
+        passed, strategies inside a bucket by inverse vol once all of them
+        have ``min_trade_history`` trades; equal weights before that.
+        """
+        active = self.enabled if active is None else active
+        key = (tuple(active), self.days_seen, tuple(self.closed_count[s] >= self.min_history for s in active))
+        if key == self._weights_key:
+            return self._weights
+        by_bucket: Dict[str, List[str]] = {}
+        for strategy in active:
+            by_bucket.setdefault(self.bucket_of[strategy], []).append(strategy)
+        bucket_var, strategy_var = self.bucket_var, self.strategy_var
+        if self.days_seen >= self.lookback_days and all(bucket_var[bucket] > 0.0 for bucket in by_bucket):
+            raw = {bucket: 1.0 / math.sqrt(bucket_var[bucket]) for bucket in by_bucket}
+        else:
+            raw = {bucket: 1.0 for bucket in by_bucket}
+        bucket_weights = capped_weights(raw, self.bucket_caps, self.bucket_floor)
+        weights = {}
+        for bucket, members in by_bucket.items():
+            if all(self.closed_count[s] >= self.min_history and strategy_var[s] > 0.0 for s in members):
+                inverse = {s: 1.0 / math.sqrt(strategy_var[s]) for s in members}
+            else:
+                inverse = {s: 1.0 for s in members}
+            total = sum(inverse.values())
+            for strategy in members:
+                weights[strategy] = bucket_weights[bucket] * inverse[strategy] / total
+        self._weights_key, self._weights = key, weights
+        return weights
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "version": _STATE_VERSION,
+            "day": self.day,
+            "days_seen": self.days_seen,
+            "day_returns": self.day_returns,
+            "strategy_var": self.strategy_var,
+            "bucket_var": self.bucket_var,
+            "closed_count": self.closed_count,
+            "marks": self.marks,
+        }
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the state atomically to ``path`` (default: the allocator's own path)."""
+        path = path or self.path
+        if not path:
+            raise ValueError("no state path given")
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.state(), handle)
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> None:
+        """Restore a saved state; strategies and buckets not in the current map are ignored."""
+        with open(path, "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+        if state.get("version") != _STATE_VERSION:
+            raise ValueError(f"{path}: unsupported allocator state version {state.get('version')!r}")
+        self.day = state["day"]
+        self.days_seen = int(state["days_seen"])
+        for name in ("day_returns", "strategy_var", "bucket_var", "closed_count", "marks"):
+            current = getattr(self, name)
+            for key, value in state[name].items():
+                if key in current:
+                    current[key] = type(current[key])(value)
+        self._weights_key = None
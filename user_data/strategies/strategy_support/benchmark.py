@@ -0,0 +1,100 @@
+"""
+Shared benchmark basket returns for relative-strength strategies.
+
+S6 compares every whitelisted pair's momentum with the mean ``pct_change`` of
+a fixed benchmark basket. Rebuilding that mean inside each pair's analysis
+costs O(pairs x benchmarks) frame fetches and rolling passes per candle.
+
+:class:`BenchmarkBasket` builds the basket return once per momentum window
+and candle: each benchmark's return is computed on its own dates, the basket
+mean is formed on the union of benchmark dates (each benchmark carried
+forward to that date), and every pair receives the basket aligned to its own
+``date`` column with an as-of join. Frames of different lengths or with
+missing candles therefore line up by time, not by row position.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+
+def _dates(frame: DataFrame) -> np.ndarray:
+    # Naive UTC datetime64 values; tz-aware ``to_numpy()`` would yield slow object arrays.
+    return frame["date"].to_numpy(dtype="datetime64[ns]")
+
+
+class _BasketEntry:
+    __slots__ = ("built_for", "dates", "returns")
+
+    def __init__(self, built_for, dates: np.ndarray, returns: np.ndarray):
+        self.built_for = built_for
+        self.dates = dates
+        self.returns = returns
+
+
+def asof_positions(source_dates: np.ndarray, target_dates: np.ndarray) -> np.ndarray:
+    """Index of the last ``source_dates`` entry at or before each target date; ``-1`` if none."""
+    return np.searchsorted(source_dates, target_dates, side="right") - 1
+
+
+def asof_take(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Gather ``values`` at as-of ``positions``, NaN where no source row precedes the target."""
+    matched = positions >= 0
+    taken = values[np.where(matched, positions, 0)] if len(values) else np.full(len(positions), np.nan)
+    if not matched.all():
+        taken = np.where(matched, taken, np.nan)
+    return taken
+
+
+class BenchmarkBasket:
+    """
+    Mean ``pct_change(window)`` of ``pairs`` on ``timeframe``, shared by all pairs of a strategy.
+
+    A basket is rebuilt only when a pair is analyzed on a candle newer than the
+    one it was built for (or for a new window); other pairs on the same candle
+    reuse it. Benchmarks with ``window`` candles of history or fewer are left
+    out of the mean.
+    """
+
+    def __init__(self, pairs: Sequence[str], timeframe: str):
+        self.pairs = list(pairs)
+        self.timeframe = timeframe
+        self._entries: Dict[int, _BasketEntry] = {}
+        self.builds = 0
+
+    def returns(self, dp, dataframe: DataFrame, window: int) -> Optional[np.ndarray]:
+        """Basket return for each row of ``dataframe``; ``None`` when no benchmark has enough history."""
+        window = int(window)
+        dates = _dates(dataframe)
+        if len(dates) == 0:
+            return np.empty(0)
+        entry = self._entries.get(window)
+        if entry is None or entry.built_for < dates[-1]:
+            entry = self._build(dp, window, dates[-1])
+            self._entries[window] = entry
+        if entry.dates is None:
+            return None
+        return asof_take(entry.returns, asof_positions(entry.dates, dates))
+
+    def _build(self, dp, window: int, built_for) -> _BasketEntry:
+        self.builds += 1
+        series = []
+        for pair in self.pairs:
+            frame = dp.get_pair_dataframe(pair, self.timeframe) if dp else None
+            if frame is None or len(frame) <= window:
+                continue
+            series.append((_dates(frame), frame["close"].pct_change(window).to_numpy()))
+        if not series:
+            return _BasketEntry(built_for, None, None)
+
+        union = np.unique(np.concatenate([bench_dates for bench_dates, _ in series]))
+        total = np.zeros(len(union))
+        for bench_dates, bench_returns in series:
+            total += asof_take(bench_returns, asof_positions(bench_dates, union))
+        return _BasketEntry(built_for, union, total / len(series))
+
+    def reset(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,463 @@
+"""
+Capital-protection state shared between analysis and trade callbacks.
+
+S5, S6 and S7 compute ``capital_state`` (0 normal, 1 risk_off, 2 kill_switch)
+in ``populate_indicators`` and read it back from ``confirm_trade_entry``,
+``custom_stake_amount``, ``leverage`` and ``custom_exit``. ``custom_exit`` runs
+every bot loop for every open trade, so each read used to fetch the analyzed
+dataframe and call ``.iloc[-1]``.
+
+:class:`CapitalStateService` records the state column once per analysis and
+answers ``(pair, current_time)`` lookups without touching pandas. A lookup
+resolves to the latest candle closed at or before ``current_time``, which is
+the candle the data provider would expose at that moment in both live and
+backtest runs.
+
+The state rules themselves are single-pass machines (:class:`StressScoreMachine`
+for S5, :class:`DrawdownMachine` for S6, :class:`ShockMachine` for S7). Each
+one evaluates a whole history in one compiled loop (numba when installed,
+vectorized pandas otherwise) and, as a :class:`StreamingIndicator`, also
+advances one candle at a time from its saved windows, so live bots plug it
+into :class:`IncrementalIndicatorEngine` instead of re-running the history.
+Both paths follow pandas' rolling kernels and comparison rules and give the
+same states.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.exchange import timeframe_to_seconds
+
+from strategy_support._numba import HAVE_NUMBA, njit
+from strategy_support.rolling_quantile import RollingQuantiles, rolling_quantiles
+from strategy_support.streaming import RollingMax, RollingMean, StreamingIndicator
+
+
+def epoch_seconds(dataframe: DataFrame, column: str = "date") -> np.ndarray:
+    """Candle open times as int64 epoch seconds, independent of the column's datetime resolution."""
+    return dataframe[column].dt.as_unit("s").astype("int64").to_numpy()
+
+
+class _PairStates:
+    __slots__ = ("dates", "states", "first", "last", "last_state", "memo_candle", "memo_state")
+
+    def __init__(self, dates: np.ndarray, states: np.ndarray):
+        self.dates = dates
+        self.states = states
+        self.first = int(dates[0])
+        self.last = int(dates[-1])
+        self.last_state = int(states[-1])
+        self.memo_candle: Optional[int] = None
+        self.memo_state = 0
+
+
+class CapitalStateService:
+    """Per-strategy store of ``capital_state`` by (pair, candle open time)."""
+
+    def __init__(self, timeframe: str, column: str = "capital_state"):
+        self.timeframe = timeframe
+        self.column = column
+        self._step = timeframe_to_seconds(timeframe)
+        self._pairs: Dict[str, _PairStates] = {}
+
+    def publish(self, pair: str, dataframe: DataFrame) -> None:
+        """Record the state column of a freshly analyzed frame; replaces the previous candle's entry."""
+        if dataframe.empty or self.column not in dataframe.columns:
+            self._pairs.pop(pair, None)
+            return
+        states = dataframe[self.column].to_numpy(dtype=np.int8)
+        self._pairs[pair] = _PairStates(epoch_seconds(dataframe), states)
+
+    def lookup(self, pair: str, current_time: datetime) -> Optional[int]:
+        """State of the latest candle closed by ``current_time``; ``None`` if the pair was never published."""
+        entry = self._pairs.get(pair)
+        if entry is None:
+            return None
+        step = self._step
+        candle = int(current_time.timestamp()) // step * step - step
+        if candle >= entry.last:
+            # Live fast path, and stale-by-a-candle lookups before the next analysis.
+            return entry.last_state
+        if candle == entry.memo_candle:
+            return entry.memo_state
+        if candle < entry.first:
+            return 0
+
+        index = (candle - entry.first) // step
+        if index >= len(entry.dates) or entry.dates[index] != candle:
+            # Gaps in the candle grid: fall back to a binary search.
+            index = int(np.searchsorted(entry.dates, candle, side="right")) - 1
+        entry.memo_candle = candle
+        entry.memo_state = int(entry.states[index])
+        return entry.memo_state
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        if pair is None:
+            self._pairs.clear()
+        else:
+            self._pairs.pop(pair, None)
+
+
+# Rolling-mean carry, laid out like pandas' roll_mean locals.
+_NOBS, _SUM, _COMP_ADD, _COMP_REMOVE, _NEGATIVES, _SAME, _PREV = range(7)
+
+
+@njit(cache=True)
+def _mean_carry():
+    carry = np.zeros(7)
+    carry[_PREV] = np.nan
+    return carry
+
+
+@njit(cache=True)
+def _mean_add(carry, value):
+    if value != value:
+        return
+    carry[_NOBS] += 1
+    y = value - carry[_COMP_ADD]
+    t = carry[_SUM] + y
+    carry[_COMP_ADD] = t - carry[_SUM] - y
+    carry[_SUM] = t
+    if math.copysign(1.0, value) < 0:
+        carry[_NEGATIVES] += 1
+    if value == carry[_PREV]:
+        carry[_SAME] += 1
+    else:
+        carry[_SAME] = 1
+    carry[_PREV] = value
+
+
+@njit(cache=True)
+def _mean_remove(carry, value):
+    if value != value:
+        return
+    carry[_NOBS] -= 1
+    y = -value - carry[_COMP_REMOVE]
+    t = carry[_SUM] + y
+    carry[_COMP_REMOVE] = t - carry[_SUM] - y
+    carry[_SUM] = t
+    if math.copysign(1.0, value) < 0:
+        carry[_NEGATIVES] -= 1
+
+
+@njit(cache=True)
+def _mean_value(carry, window):
+    nobs = carry[_NOBS]
+    if nobs < window or nobs == 0:
+        return np.nan
+    if carry[_SAME] >= nobs:
+        return carry[_PREV]
+    result = carry[_SUM] / nobs
+    if carry[_NEGATIVES] == 0 and result < 0:
+        return 0.0
+    if carry[_NEGATIVES] == nobs and result > 0:
+        return 0.0
+    return result
+
+
+@njit(cache=True)
+def _change_below(current, base, limit):
+    # ``current / base - 1 < limit`` without raising on a zero base (pandas yields +/-inf or NaN there).
+    if base == 0:
+        return current < 0
+    return current / base - 1 < limit
+
+
+def _change_below_scalar(current: float, base: float, limit: float) -> bool:
+    if math.isnan(base):
+        return False
+    if base == 0:
+        return current < 0
+    return current / base - 1 < limit
+
+
+@njit(cache=True)
+def _stress_score_kernel(close, volume, atr_pct, atr_threshold, ema200, volume_window, volume_mult, drop_lag,
+                         drop_limit):
+    n = close.shape[0]
+    stress = np.zeros(n, np.int8)
+    states = np.zeros(n, np.int8)
+    carry = _mean_carry()
+    for i in range(n):
+        if i >= volume_window:
+            _mean_remove(carry, volume[i - volume_window])
+        _mean_add(carry, volume[i])
+        score = 0
+        if atr_pct[i] > atr_threshold[i]:
+            score += 1
+        if volume[i] > volume_mult * _mean_value(carry, volume_window):
+            score += 1
+        if close[i] < ema200[i]:
+            score += 1
+        state = 0
+        if score >= 2:
+            state = 1
+        if score >= 3 or (i >= drop_lag and _change_below(close[i], close[i - drop_lag], drop_limit)):
+            state = 2
+        stress[i] = score
+        states[i] = state
+    return stress, states
+
+
+@njit(cache=True)
+def _drawdown_kernel(close, volume, atr_pct, atr_threshold, drawdown_window, volume_window, volume_mult,
+                     risk_off_drawdown, kill_drawdown):
+    n = close.shape[0]
+    states = np.zeros(n, np.int8)
+    carry = _mean_carry()
+    # Monotonic deque of row positions for the rolling close maximum.
+    candidates = np.empty(n, np.int64)
+    head = 0
+    tail = 0
+    for i in range(n):
+        while tail > head and close[candidates[tail - 1]] <= close[i]:
+            tail -= 1
+        candidates[tail] = i
+        tail += 1
+        if candidates[head] <= i - drawdown_window:
+            head += 1
+        if i >= volume_window:
+            _mean_remove(carry, volume[i - volume_window])
+        _mean_add(carry, volume[i])
+
+        risk_off = atr_pct[i] > atr_threshold[i]
+        kill_switch = False
+        if i + 1 >= drawdown_window:
+            peak = close[candidates[head]]
+            risk_off = risk_off or _change_below(close[i], peak, risk_off_drawdown)
+            kill_switch = (_change_below(close[i], peak, kill_drawdown)
+                           and volume[i] > volume_mult * _mean_value(carry, volume_window))
+        if kill_switch:
+            states[i] = 2
+        elif risk_off:
+            states[i] = 1
+    return states
+
+
+@njit(cache=True)
+def _shock_kernel(close, volatility_burst, volume_spike, drop_lag, stress_drop, kill_drop):
+    n = close.shape[0]
+    states = np.zeros(n, np.int8)
+    for i in range(n):
+        stress = 1 if (volatility_burst[i] and volume_spike[i]) else 0
+        kill = False
+        if i >= drop_lag:
+            if _change_below(close[i], close[i - drop_lag], stress_drop):
+                stress += 1
+            kill = _change_below(close[i], close[i - drop_lag], kill_drop)
+        if stress >= 2 or kill:
+            states[i] = 2
+        elif stress >= 1:
+            states[i] = 1
+    return states
+
+
+def _column(dataframe: DataFrame, column: str) -> np.ndarray:
+    return np.ascontiguousarray(dataframe[column].to_numpy(dtype=np.float64))
+
+
+class CapitalStateMachine(StreamingIndicator):
+    """
+    Base class for the capital-state rules.
+
+    :meth:`compute` evaluates a full frame; :meth:`update` advances the
+    machine by one candle from its current windows and returns the new state.
+    Machines are plain picklable objects, so a saved instance resumes exactly
+    where it stopped.
+    """
+
+    def compute(self, dataframe: DataFrame) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def outputs(self) -> Dict[str, StreamingIndicator]:
+        """``IncrementalIndicatorEngine`` factory mapping for this machine."""
+        return {"capital_state": self}
+
+
+class _Readout(StreamingIndicator):
+    """Engine column that reports an attribute of the machine listed before it."""
+
+    sources = ()
+
+    def __init__(self, machine: CapitalStateMachine, attribute: str):
+        self._machine = machine
+        self._attribute = attribute
+
+    def reset(self) -> None:
+        pass
+
+    def update(self) -> float:
+        return float(getattr(self._machine, self._attribute))
+
+
+class StressScoreMachine(CapitalStateMachine):
+    """
+    S5: ``stress_score`` counts an ATR% spike above its rolling quantile, a
+    volume surge and a close below EMA200. Two points mean risk-off, three
+    points or a sharp drop over ``drop_lag`` candles trip the kill switch.
+    """
+
+    sources = ("close", "volume", "atr_pct", "ema200")
+
+    def __init__(self, quantile_window: int = 120, quantile: float = 0.85, volume_window: int = 48,
+                 volume_mult: float = 1.8, drop_lag: int = 24, drop_limit: float = -0.08):
+        self.quantile_window = int(quantile_window)
+        self.quantile = float(quantile)
+        self.volume_window = int(volume_window)
+        self.volume_mult = float(volume_mult)
+        self.drop_lag = int(drop_lag)
+        self.drop_limit = float(drop_limit)
+        self.reset()
+
+    def reset(self) -> None:
+        self._atr_quantile = RollingQuantiles(self.quantile_window, (self.quantile,))
+        self._volume_mean = RollingMean(self.volume_window, "volume")
+        self._closes: deque = deque(maxlen=self.drop_lag + 1)
+        self.stress = 0
+
+    def outputs(self) -> Dict[str, StreamingIndicator]:
+        return {"capital_state": self, "stress_score": _Readout(self, "stress")}
+
+    def update(self, close: float, volume: float, atr_pct: float, ema200: float) -> float:
+        threshold = self._atr_quantile.update(atr_pct)[0]
+        volume_mean = self._volume_mean.update(volume)
+        self._closes.append(close)
+        self.stress = int(atr_pct > threshold) + int(volume > self.volume_mult * volume_mean) + int(close < ema200)
+        dropped = len(self._closes) > self.drop_lag and _change_below_scalar(close, self._closes[0], self.drop_limit)
+        if self.stress >= 3 or dropped:
+            return 2.0
+        return 1.0 if self.stress >= 2 else 0.0
+
+    def compute(self, dataframe: DataFrame) -> Dict[str, np.ndarray]:
+        atr_pct = _column(dataframe, "atr_pct")
+        threshold = rolling_quantiles(atr_pct, self.quantile_window, (self.quantile,))[0]
+        if HAVE_NUMBA:
+            stress, states = _stress_score_kernel(
+                _column(dataframe, "close"), _column(dataframe, "volume"), atr_pct, threshold,
+                _column(dataframe, "ema200"), self.volume_window, self.volume_mult, self.drop_lag, self.drop_limit,
+            )
+            return {"capital_state": states, "stress_score": stress}
+
+        close = dataframe["close"]
+        volume = dataframe["volume"]
+        stress = (
+            (atr_pct > threshold).astype(np.int8)
+            + (volume > self.volume_mult * volume.rolling(self.volume_window).mean()).to_numpy(dtype=np.int8)
+            + (close < dataframe["ema200"]).to_numpy(dtype=np.int8)
+        )
+        dropped = ((close / close.shift(self.drop_lag) - 1) < self.drop_limit).to_numpy()
+        states = np.where((stress >= 3) | dropped, 2, np.where(stress >= 2, 1, 0)).astype(np.int8)
+        return {"capital_state": states, "stress_score": stress}
+
+
+class DrawdownMachine(CapitalStateMachine):
+    """
+    S6: risk-off on a drawdown from the rolling close high or an ATR% spike;
+    kill switch on a deeper drawdown confirmed by a volume surge.
+    """
+
+    sources = ("close", "volume", "atr_pct")
+
+    def __init__(self, drawdown_window: int = 48, quantile_window: int = 96, quantile: float = 0.9,
+                 volume_window: int = 48, volume_mult: float = 2.2, risk_off_drawdown: float = -0.06,
+                 kill_drawdown: float = -0.1):
+        self.drawdown_window = int(drawdown_window)
+        self.quantile_window = int(quantile_window)
+        self.quantile = float(quantile)
+        self.volume_window = int(volume_window)
+        self.volume_mult = float(volume_mult)
+        self.risk_off_drawdown = float(risk_off_drawdown)
+        self.kill_drawdown = float(kill_drawdown)
+        self.reset()
+
+    def reset(self) -> None:
+        self._peak = RollingMax(self.drawdown_window, "close")
+        self._atr_quantile = RollingQuantiles(self.quantile_window, (self.quantile,))
+        self._volume_mean = RollingMean(self.volume_window, "volume")
+
+    def update(self, close: float, volume: float, atr_pct: float) -> float:
+        peak = self._peak.update(close)
+        threshold = self._atr_quantile.update(atr_pct)[0]
+        volume_mean = self._volume_mean.update(volume)
+        if (_change_below_scalar(close, peak, self.kill_drawdown)
+                and volume > self.volume_mult * volume_mean):
+            return 2.0
+        if _change_below_scalar(close, peak, self.risk_off_drawdown) or atr_pct > threshold:
+            return 1.0
+        return 0.0
+
+    def compute(self, dataframe: DataFrame) -> Dict[str, np.ndarray]:
+        atr_pct = _column(dataframe, "atr_pct")
+        threshold = rolling_quantiles(atr_pct, self.quantile_window, (self.quantile,))[0]
+        if HAVE_NUMBA:
+            states = _drawdown_kernel(
+                _column(dataframe, "close"), _column(dataframe, "volume"), atr_pct, threshold,
+                self.drawdown_window, self.volume_window, self.volume_mult, self.risk_off_drawdown,
+                self.kill_drawdown,
+            )
+            return {"capital_state": states}
+
+        close = dataframe["close"]
+        volume = dataframe["volume"]
+        drawdown = close / close.rolling(self.drawdown_window).max() - 1
+        risk_off = ((drawdown < self.risk_off_drawdown).to_numpy()) | (atr_pct > threshold)
+        kill_switch = (
+            (drawdown < self.kill_drawdown)
+            & (volume > self.volume_mult * volume.rolling(self.volume_window).mean())
+        ).to_numpy()
+        states = np.where(kill_switch, 2, np.where(risk_off, 1, 0)).astype(np.int8)
+        return {"capital_state": states}
+
+
+class ShockMachine(CapitalStateMachine):
+    """
+    S7: one stress point for a volatility burst with a volume spike and one
+    for a drop over ``drop_lag`` candles; any point is risk-off, two points
+    or a crash-sized drop trip the kill switch. The burst and spike flags are
+    read from the frame, where S7 already computes them for its entries.
+    """
+
+    sources = ("close", "volatility_burst", "volume_spike")
+
+    def __init__(self, drop_lag: int = 32, stress_drop: float = -0.07, kill_drop: float = -0.12):
+        self.drop_lag = int(drop_lag)
+        self.stress_drop = float(stress_drop)
+        self.kill_drop = float(kill_drop)
+        self.reset()
+
+    def reset(self) -> None:
+        self._closes: deque = deque(maxlen=self.drop_lag + 1)
+
+    def update(self, close: float, volatility_burst: float, volume_spike: float) -> float:
+        self._closes.append(close)
+        stress = int(bool(volatility_burst) and bool(volume_spike))
+        kill = False
+        if len(self._closes) > self.drop_lag:
+            base = self._closes[0]
+            stress += int(_change_below_scalar(close, base, self.stress_drop))
+            kill = _change_below_scalar(close, base, self.kill_drop)
+        if stress >= 2 or kill:
+            return 2.0
+        return 1.0 if stress >= 1 else 0.0
+
+    def compute(self, dataframe: DataFrame) -> Dict[str, np.ndarray]:
+        burst = dataframe["volatility_burst"].to_numpy(dtype=np.bool_)
+        spike = dataframe["volume_spike"].to_numpy(dtype=np.bool_)
+        if HAVE_NUMBA:
+            states = _shock_kernel(_column(dataframe, "close"), burst, spike, self.drop_lag, self.stress_drop,
+                                   self.kill_drop)
+            return {"capital_state": states}
+
+        close = dataframe["close"]
+        recent_drop = close / close.shift(self.drop_lag) - 1
+        stress = (burst & spike).astype(np.int8) + (recent_drop < self.stress_drop).to_numpy(dtype=np.int8)
+        kill = (stress >= 2) | (recent_drop < self.kill_drop).to_numpy()
+        states = np.where(kill, 2, np.where(stress >= 1, 1, 0)).astype(np.int8)
+        return {"capital_state": states}
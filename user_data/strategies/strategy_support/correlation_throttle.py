@@ -0,0 +1,271 @@
+"""
+Online estimators behind ``correlation_throttle`` of the orchestration policy.
+
+``allocation_policy.correlation_throttle`` in
+``user_data/configs/portfolio_orchestration_profiles.yaml`` scales new risk
+down when the book is crowded:
+
+- ``level_1`` / ``level_2`` fire when the ``enter_long`` / ``enter_short``
+  signals on BTC, ETH and SOL over the last
+  ``signal_alignment_window_hours`` point the same way,
+- ``strategy_corr_guard`` fires when the mean pairwise correlation of the
+  strategies' hourly PnL over ``pnl_correlation_window_days`` is high,
+- ``joint_extreme`` applies when both fire and also rate-limits new entries.
+
+Both inputs are rolling windows that would otherwise be recomputed over the
+whole window before every order. :class:`RollingCorrelation` keeps windowed
+sums and cross-products, so adding an hourly PnL row updates the covariance
+matrix in O(k²) for k strategies. :class:`CorrelationThrottle` buckets PnL
+into hours, keeps a ring buffer of signal directions per asset with running
+long/short counts, and refreshes the mean correlation only when an hour
+closes, so :meth:`~CorrelationThrottle.state` and
+:meth:`~CorrelationThrottle.multiplier` are constant time at order time.
+:class:`~strategy_support.portfolio.PortfolioSimulator` throttles through the
+same class.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+HOUR = 3600
+
+
+def _seconds(at: Union[datetime, int, float]) -> int:
+    return int(at.timestamp()) if isinstance(at, datetime) else int(at)
+
+
+class RollingCorrelation:
+    """
+    Covariance and correlation of the last ``window`` rows, from running sums and cross-products.
+
+    :meth:`push` costs O(width²) for the added row and for the row that
+    leaves the window; ``None`` stands for an all-zero row (an hour without
+    PnL) and costs nothing to add or drop. Every ``window`` pushes the sums
+    are rebuilt from the rows in the window, so the rounding error that
+    adding and subtracting rows leaves behind cannot build up; amortized
+    that is O(width²) per push as well.
+    """
+
+    __slots__ = ("window", "rows", "sum", "cross", "nonzero", "upper", "pushes")
+
+    def __init__(self, width: int, window: int):
+        self.window = window
+        self.rows: deque = deque()
+        self.sum = np.zeros(width)
+        self.cross = np.zeros((width, width))
+        self.nonzero = np.zeros(width, dtype=np.int64)
+        self.upper = np.triu(np.ones((width, width), dtype=bool), k=1)
+        self.pushes = 0
+
+    def push(self, row: Optional[np.ndarray]) -> None:
+        self.rows.append(row)
+        if row is not None:
+            self.sum += row
+            self.cross += row[:, None] * row[None, :]
+            self.nonzero += row != 0.0
+        while len(self.rows) > self.window:
+            old = self.rows.popleft()
+            if old is not None:
+                self.sum -= old
+                self.cross -= old[:, None] * old[None, :]
+                self.nonzero -= old != 0.0
+        self.pushes += 1
+        if self.pushes >= self.window:
+            self.resum()
+
+    def resum(self) -> None:
+        """Recompute the sums and cross-products from the rows in the window."""
+        self.pushes = 0
+        rows = [row for row in self.rows if row is not None]
+        width = len(self.sum)
+        block = np.array(rows) if rows else np.zeros((0, width))
+        self.sum = block.sum(axis=0)
+        self.cross = block.T @ block
+        self.nonzero = np.count_nonzero(block, axis=0).astype(np.int64)
+
+    def push_empty(self, count: int) -> None:
+        for _ in range(min(count, self.window)):
+            self.push(None)
+
+    def covariance(self) -> np.ndarray:
+        count = max(len(self.rows), 1)
+        mean = self.sum / count
+        return self.cross / count - mean[:, None] * mean[None, :]
+
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix; NaN where a column has fewer than two nonzero rows or no variance."""
+        cov = self.covariance()
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / (std[:, None] * std[None, :])
+        live = self.nonzero >= 2
+        corr[~(live[:, None] & live[None, :])] = np.nan
+        return corr
+
+    def mean_correlation(self) -> float:
+        count = len(self.rows)
+        # Columns need two nonzero rows to have a variance worth trusting after running updates.
+        live = self.nonzero >= 2
+        pairs = self.upper & live[:, None] & live[None, :]
+        if count < 2 or not pairs.any():
+            return 0.0
+        mean = self.sum / count
+        cov = self.cross / count - mean[:, None] * mean[None, :]
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov[pairs] / (std[:, None] * std[None, :])[pairs]
+        corr = corr[np.isfinite(corr)]
+        return float(corr.mean()) if len(corr) else 0.0
+
+
+class _SignalRing:
+    """Entry signal times and directions of one asset, oldest first; doubles when full."""
+
+    __slots__ = ("times", "directions", "head", "size")
+
+    def __init__(self, capacity: int):
+        self.times = [0] * capacity
+        self.directions = [0] * capacity
+        self.head = 0
+        self.size = 0
+
+    def append(self, time: int, direction: int) -> None:
+        capacity = len(self.times)
+        if self.size == capacity:
+            order = [(self.head + offset) % capacity for offset in range(capacity)]
+            self.times = [self.times[i] for i in order] + [0] * capacity
+            self.directions = [self.directions[i] for i in order] + [0] * capacity
+            self.head = 0
+            capacity *= 2
+        slot = (self.head + self.size) % capacity
+        self.times[slot] = time
+        self.directions[slot] = direction
+        self.size += 1
+
+    def expire(self, cutoff: int, counts: Dict[int, int]) -> None:
+        """Drop signals stamped at or before ``cutoff``, taking them off ``counts``."""
+        times, capacity = self.times, len(self.times)
+        while self.size and times[self.head] <= cutoff:
+            counts[self.directions[self.head]] -= 1
+            self.head = (self.head + 1) % capacity
+            self.size -= 1
+
+
+class CorrelationThrottle:
+    """
+    Signal alignment and strategy PnL correlation, with the throttle's decisions.
+
+    ``strategies`` fixes the columns of the PnL correlation; ``settings`` is
+    the ``correlation_throttle`` section. Feed it with :meth:`record_signal`
+    for every entry signal (``direction`` 1 for ``enter_long``, -1 for
+    ``enter_short``) and :meth:`record_pnl` for realized strategy PnL; only
+    signals on the configured ``assets`` count towards the alignment, which
+    needs signals on at least two of them.
+    """
+
+    def __init__(self, strategies: Sequence[str], settings: Optional[Mapping[str, Any]] = None,
+                 ring_capacity: int = 64):
+        settings = settings or {}
+        self.strategies = list(strategies)
+        self.level_1 = dict(settings.get("level_1", {}))
+        self.level_2 = dict(settings.get("level_2", {}))
+        self.corr_guard = dict(settings.get("strategy_corr_guard", {}))
+        self.joint = dict(settings.get("joint_extreme", {}))
+        self.assets = list(settings.get("assets", ("BTC", "ETH", "SOL")))
+        self.level_1_gte = float(self.level_1.get("alignment_gte", 0.75))
+        self.level_2_gte = float(self.level_2.get("alignment_gte", 0.90))
+        self.corr_gte = float(self.corr_guard.get("mean_pairwise_corr_gte", 0.65))
+        self.joint_levels = "level_2" in self.joint.get("apply_if", ())
+        self.joint_spacing = 900 // max(int(self.joint.get("max_new_entries_per_15m", 1)), 1)
+
+        self.signal_window = int(float(settings.get("signal_alignment_window_hours", 24)) * HOUR)
+        self.rings = {asset: _SignalRing(ring_capacity) for asset in self.assets}
+        self.signal_counts = {1: 0, -1: 0}
+        self.pnl = RollingCorrelation(len(self.strategies),
+                                      int(float(settings.get("pnl_correlation_window_days", 7)) * 24))
+        self.strategy_index = {strategy: position for position, strategy in enumerate(self.strategies)}
+        self.hour: Optional[int] = None
+        self.hour_row = np.zeros(len(self.strategies))
+        self.mean_correlation = 0.0
+        self.last_joint_entry: Optional[int] = None
+
+    @classmethod
+    def from_policy(cls, policy, **kwargs) -> "CorrelationThrottle":
+        """Throttle for a :class:`~strategy_support.portfolio.PortfolioPolicy`."""
+        return cls(list(policy.strategy_map), policy.allocation.get("correlation_throttle", {}), **kwargs)
+
+    def advance(self, at: Union[datetime, int, float]) -> None:
+        """Close the finished hours of PnL; the mean correlation is refreshed once per close."""
+        hour = _seconds(at) // HOUR
+        if self.hour is None:
+            self.hour = hour
+        if hour > self.hour:
+            self.pnl.push(self.hour_row if self.hour_row.any() else None)
+            self.pnl.push_empty(hour - self.hour - 1)
+            self.hour_row = np.zeros(len(self.strategies))
+            self.hour = hour
+            self.mean_correlation = self.pnl.mean_correlation()
+
+    def record_pnl(self, strategy: str, at: Union[datetime, int, float], pnl: float) -> None:
+        self.advance(at)
+        self.hour_row[self.strategy_index[strategy]] += pnl
+
+    def _expire(self, now: int) -> None:
+        cutoff = now - self.signal_window
+        for ring in self.rings.values():
+            ring.expire(cutoff, self.signal_counts)
+
+    def record_signal(self, pair: str, at: Union[datetime, int, float], direction: int) -> None:
+        """An entry signal on ``pair`` (or a bare asset like ``BTC``)."""
+        ring = self.rings.get(pair.split("/", 1)[0])
+        now = _seconds(at)
+        self._expire(now)
+        if ring is not None:
+            ring.append(now, direction)
+            self.signal_counts[direction] += 1
+
+    def alignment(self, at: Union[datetime, int, float]) -> float:
+        """Share of the windowed signals on the majority side, 0 with signals on fewer than two assets."""
+        self._expire(_seconds(at))
+        if sum(1 for ring in self.rings.values() if ring.size) < 2:
+            return 0.0
+        counts = self.signal_counts
+        return max(counts[1], counts[-1]) / (counts[1] + counts[-1])
+
+    def state(self, at: Union[datetime, int, float]) -> Tuple[int, bool, bool]:
+        """``(alignment level 0/1/2, corr guard hit, joint extreme hit)`` at ``at``."""
+        alignment = self.alignment(at)
+        level = 2 if alignment >= self.level_2_gte else (1 if alignment >= self.level_1_gte else 0)
+        corr_hit = self.mean_correlation >= self.corr_gte
+        return level, corr_hit, level == 2 and corr_hit and self.joint_levels
+
+    def multiplier(self, at: Union[datetime, int, float]) -> float:
+        """Size multiplier for a new entry at ``at``; the joint extreme replaces the others."""
+        level, corr_hit, joint_hit = self.state(at)
+        if joint_hit:
+            return float(self.joint.get("position_size_multiplier", 0.60))
+        multiplier = 1.0
+        if level == 2:
+            multiplier *= float(self.level_2.get("new_risk_multiplier", 0.55))
+        elif level == 1:
+            multiplier *= float(self.level_1.get("new_risk_multiplier", 0.75))
+        if corr_hit:
+            multiplier *= float(self.corr_guard.get("position_size_multiplier", 0.80))
+        return multiplier
+
+    def entry_allowed(self, at: Union[datetime, int, float]) -> bool:
+        """False while the joint extreme holds and the last entry under it is within the rate limit."""
+        now = _seconds(at)
+        return not (self.state(now)[2] and self.last_joint_entry is not None
+                    and now - self.last_joint_entry < self.joint_spacing)
+
+    def record_entry(self, at: Union[datetime, int, float]) -> None:
+        """An entry was placed; under the joint extreme it starts the rate-limit interval."""
+        now = _seconds(at)
+        if self.state(now)[2]:
+            self.last_joint_entry = now
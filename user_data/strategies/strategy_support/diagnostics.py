@@ -0,0 +1,258 @@
+"""
+Asynchronous JSON-lines sink for callback diagnostics.
+
+``custom_exit`` in S1-S4 and ``confirm_trade_entry`` in S1 used to call
+``self.logger.info({...})`` for every open trade on every bot iteration,
+formatting and writing synchronously inside the trading loop.
+:class:`DiagnosticsSink` moves that work off the loop: :meth:`emit` applies
+the per-pair sampling and rate limit, then enqueues the raw fields without
+blocking; a daemon thread drains the queue in batches, formats each event as
+one JSON line and writes the batch to a file or, by default, to the strategy
+logger. With a ``recorder`` section the same events are also appended to the
+binary day files of :class:`~strategy_support.event_recorder.EventRecorder`.
+
+Sampling and rate limits are keyed by ``(event, pair)`` and clocked by the
+event's own timestamp when one is given (candle time in backtests, wall time
+live), so backtests are thinned the same way live runs are. Events that find
+the queue full are dropped and counted rather than blocking the caller; a
+batch that fails to write adds its events to ``failed`` and the worker carries on;
+if ``path`` cannot be opened the events go to the logger instead.
+The sink pickles (hyperopt ships the strategy to its worker processes) without
+its queue, lock and thread, which each process rebuilds for itself.
+
+Settings come from the optional ``strategy_diagnostics`` config section;
+unknown keys are logged and ignored::
+
+    "strategy_diagnostics": {
+        "enabled": true,
+        "path": "user_data/logs/diagnostics.jsonl",
+        "min_interval_seconds": 0,
+        "sample_every": 1,
+        "pair_overrides": {"BTC/USDT:USDT": {"min_interval_seconds": 60}},
+        "recorder": {"directory": "user_data/logs/events", "capacity": 1048576},
+        "json_lines": true
+    }
+"""
+
+from __future__ import annotations
+
+import atexit
+import inspect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from strategy_support.event_recorder import EventRecorder
+
+_STOP = object()
+
+
+def _known_settings(function, settings: Mapping[str, Any], section: str, logger: logging.Logger,
+                    exclude: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """``settings`` restricted to the keyword parameters of ``function``; the rest is logged and dropped."""
+    accepted = [name for name in list(inspect.signature(function).parameters)[1:] if name not in exclude]
+    unknown = sorted(set(settings) - set(accepted))
+    if unknown:
+        logger.warning("%s: ignoring unknown setting(s) %s; accepted: %s", section, ", ".join(unknown),
+                       ", ".join(accepted))
+    return {key: value for key, value in settings.items() if key in accepted}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class DiagnosticsSink:
+    """
+    Non-blocking diagnostics queue with a background JSON-lines writer.
+
+    ``min_interval_seconds`` keeps at most one event per ``(event, pair)`` in
+    that interval; ``sample_every`` keeps every n-th event that passes the
+    rate limit. ``pair_overrides`` maps a pair to its own values of both.
+    """
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None,
+                 min_interval_seconds: float = 0.0, sample_every: int = 1,
+                 pair_overrides: Optional[Mapping[str, Mapping[str, Any]]] = None, enabled: bool = True,
+                 recorder: Optional[Mapping[str, Any]] = None, json_lines: bool = True,
+                 max_queue: int = 10000, batch_size: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.min_interval_seconds = float(min_interval_seconds)
+        self.sample_every = max(int(sample_every), 1)
+        self.pair_overrides = {pair: dict(values) for pair, values in (pair_overrides or {}).items()}
+        self.enabled = enabled
+        self.recorder = EventRecorder(**recorder) if recorder else None
+        self.json_lines = json_lines
+        self.max_queue = int(max_queue)
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self._start_worker_state()
+
+    def _start_worker_state(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in ("_queue", "_thread", "_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._start_worker_state()
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]], logger: Optional[logging.Logger] = None
+                    ) -> "DiagnosticsSink":
+        """Sink from the ``strategy_diagnostics`` section; unknown keys are warned about and ignored."""
+        warn_to = logger or logging.getLogger(__name__)
+        settings = _known_settings(cls.__init__, dict((config or {}).get("strategy_diagnostics", {})),
+                                   "strategy_diagnostics", warn_to, exclude=("logger",))
+        if settings.get("recorder"):
+            settings["recorder"] = _known_settings(EventRecorder.__init__, dict(settings["recorder"]),
+                                                   "strategy_diagnostics.recorder", warn_to)
+        return cls(logger=logger, **settings)
+
+    def _limits(self, pair: str) -> Tuple[float, int]:
+        override = self.pair_overrides.get(pair)
+        if override is None:
+            return self.min_interval_seconds, self.sample_every
+        return (float(override.get("min_interval_seconds", self.min_interval_seconds)),
+                max(int(override.get("sample_every", self.sample_every)), 1))
+
+    def emit(self, event: str, pair: str, at: Optional[datetime] = None, **fields: Any) -> bool:
+        """Queue one event unless sampled out, rate limited or the queue is full; never blocks."""
+        if not self.enabled:
+            return False
+        key = (event, pair)
+        interval, every = self._limits(pair)
+        if interval > 0:
+            now = at.timestamp() if at is not None else time.monotonic()
+            last = self._last.get(key)
+            if last is not None and now - last < interval:
+                return False
+            self._last[key] = now
+        if every > 1:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+            if seen % every:
+                return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((event, pair, at, fields))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="strategy-diagnostics", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _open(self):
+        """The JSON-lines file, or None to write through the logger (also when ``path`` cannot be opened)."""
+        if not (self.path and self.json_lines):
+            return None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            return open(self.path, "a", encoding="utf-8")
+        except OSError:
+            self.logger.exception("Diagnostics: cannot open %s, writing events to the logger instead", self.path)
+            return None
+
+    def _run(self) -> None:
+        handle = None
+        try:
+            handle = self._open()
+            while True:
+                batch: List[tuple] = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                stop = item is _STOP
+                if not stop:
+                    batch.append(item)
+                while not stop and len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                    else:
+                        batch.append(item)
+                if batch:
+                    try:
+                        self._record(batch)
+                        if self.json_lines:
+                            self._write(handle, [self._format(*item) for item in batch])
+                    except Exception:
+                        self.failed += len(batch)
+                        self.logger.exception("Diagnostics: dropped a batch of %d events", len(batch))
+                if stop:
+                    return
+        finally:
+            if handle is not None:
+                handle.close()
+            if self.recorder is not None:
+                self.recorder.close()
+
+    @staticmethod
+    def _format(event: str, pair: str, at: Optional[datetime], fields: Mapping[str, Any]) -> str:
+        record = {"event": event, "pair": pair, **fields}
+        if at is not None:
+            record.setdefault("timestamp", at)
+        return json.dumps(record, default=_default)
+
+    def _record(self, batch: List[tuple]) -> None:
+        if self.recorder is None:
+            return
+        for event, pair, at, fields in batch:
+            if at is not None:
+                self.recorder.record_fields(event, pair, at, fields)
+        self.recorder.flush()
+
+    def _write(self, handle, lines: List[str]) -> None:
+        if handle is not None:
+            handle.write("\n".join(lines) + "\n")
+            handle.flush()
+        else:
+            for line in lines:
+                self.logger.info(line)
+        self.written += len(lines)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the worker, waiting at most about ``timeout`` seconds for each."""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self.logger.warning("Diagnostics: queue still full after %.1fs, not waiting for the writer", timeout)
+            return
+        thread.join(timeout)
+        self._thread = None
@@ -0,0 +1,266 @@
+"""
+Memory-mapped columnar recorder for trade monitoring events.
+
+The ``exit_monitor``/``diagnostic`` events of S1-S4 ``custom_exit`` carry the
+same few fields every time (strategy, pair, side, entry tag, profit, trade
+open time, open minutes). As text they are costly to write and slow to analyze.
+:class:`EventRecorder` appends them to one fixed-schema file per UTC day:
+
+- a 64-byte header (magic, version, capacity, total records appended),
+- one contiguous column per field, ``capacity`` slots long, used as a ring
+  buffer (record ``n`` lives in slot ``n % capacity``),
+- strings dictionary-encoded as ``uint16`` codes (0 is "missing"), the
+  dictionary kept next to the file as ``<file>.strings.json``.
+
+:class:`EventLog` maps a day file read-only and hands out the columns as
+NumPy views (zero-copy unless the ring has wrapped) or as a pandas frame with
+categorical strings, so profit paths per trade are a ``groupby`` on
+``(strategy, pair, trade_open)`` instead of a log parse.
+
+One process writes a file at a time; readers may open it while it is being
+written and see every record whose header update has landed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"SEVTLOG1"
+VERSION = 1
+HEADER_BYTES = 64
+_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("pad", "<u4"), ("capacity", "<u8"), ("cursor", "<u8")])
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("time", "<i8"),          # event time, epoch milliseconds
+    ("trade_open", "<i8"),    # trade.open_date_utc, epoch seconds (-1 unknown)
+    ("profit", "<f8"),
+    ("open_minutes", "<i4"),  # -1 unknown
+    ("event", "<u2"),
+    ("strategy", "<u2"),
+    ("pair", "<u2"),
+    ("side", "<u2"),
+    ("entry_tag", "<u2"),
+)
+STRING_COLUMNS = ("event", "strategy", "pair", "side", "entry_tag")
+
+# Field names the strategies use for the same quantity.
+_ALIASES = {
+    "side": ("side", "direction"),
+    "profit": ("profit", "pnl", "current_profit"),
+    "open_minutes": ("open_minutes", "duration_min"),
+}
+
+
+def _layout(capacity: int) -> Dict[str, Tuple[int, np.dtype]]:
+    offsets, offset = {}, HEADER_BYTES
+    for name, dtype in COLUMNS:
+        dtype = np.dtype(dtype)
+        offsets[name] = (offset, dtype)
+        offset += -(-capacity * dtype.itemsize // 8) * 8
+    return offsets
+
+
+def _file_bytes(capacity: int) -> int:
+    offset, dtype = _layout(capacity)[COLUMNS[-1][0]]
+    return offset + -(-capacity * dtype.itemsize // 8) * 8
+
+
+def day_path(directory: str, day: date) -> str:
+    return os.path.join(directory, f"events-{day.isoformat()}.evt")
+
+
+class _DayFile:
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        exists = os.path.exists(path)
+        if exists:
+            header = np.fromfile(path, dtype=_HEADER, count=1)[0]
+            if header["magic"] != MAGIC or header["version"] != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} event file")
+            capacity = int(header["capacity"])
+        self.capacity = capacity
+        self._map = np.memmap(path, dtype=np.uint8, mode="r+" if exists else "w+", shape=(_file_bytes(capacity),))
+        self.header = self._map[:_HEADER.itemsize].view(_HEADER)
+        if not exists:
+            self.header["magic"] = MAGIC
+            self.header["version"] = VERSION
+            self.header["capacity"] = capacity
+            self.header["cursor"] = 0
+        self.columns = {
+            name: self._map[offset: offset + capacity * dtype.itemsize].view(dtype)
+            for name, (offset, dtype) in _layout(capacity).items()
+        }
+        self.strings: List[str] = [""]
+        self.codes: Dict[str, int] = {"": 0}
+        strings_path = path + ".strings.json"
+        if exists and os.path.exists(strings_path):
+            with open(strings_path, encoding="utf-8") as handle:
+                self.strings = json.load(handle)
+            self.codes = {value: code for code, value in enumerate(self.strings)}
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return 0
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.strings) > np.iinfo(np.uint16).max:
+                raise ValueError(f"{self.path}: string dictionary is full")
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+            temporary = self.path + ".strings.json.tmp"
+            with open(temporary, "w", encoding="utf-8") as handle:
+                json.dump(self.strings, handle)
+            os.replace(temporary, self.path + ".strings.json")
+        return code
+
+    def append(self, values: Mapping[str, Any]) -> None:
+        cursor = int(self.header["cursor"][0])
+        slot = cursor % self.capacity
+        for name, column in self.columns.items():
+            column[slot] = values[name]
+        # Publish the record only after its columns are written.
+        self.header["cursor"] = cursor + 1
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self.flush()
+        del self._map
+
+
+class EventRecorder:
+    """Append-only, per-UTC-day ring-buffer recorder of monitoring events under ``directory``."""
+
+    def __init__(self, directory: str, capacity: int = 1 << 20):
+        self.directory = directory
+        self.capacity = int(capacity)
+        self._day: Optional[date] = None
+        self._file: Optional[_DayFile] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The mapped day file is reopened on the next record.
+        state = self.__dict__.copy()
+        state["_day"] = state["_file"] = None
+        return state
+
+    def _file_for(self, day: date) -> _DayFile:
+        if day != self._day:
+            if self._file is not None:
+                self._file.close()
+            self._file = _DayFile(day_path(self.directory, day), self.capacity)
+            self._day = day
+        return self._file
+
+    def record(self, event: str, at: datetime, strategy: Optional[str] = None, pair: Optional[str] = None,
+               side: Optional[str] = None, entry_tag: Optional[str] = None, profit: Optional[float] = None,
+               open_minutes: Optional[int] = None, trade_open: Optional[datetime] = None) -> None:
+        """
+        Append one event.
+
+        ``trade_open`` is the trade's own ``open_date_utc``, stored as given so
+        every event of a trade shares it; it is not derived from
+        ``open_minutes``, which is rounded and measured against ``at``.
+        """
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        at = at.astimezone(timezone.utc)
+        if trade_open is not None and trade_open.tzinfo is None:
+            trade_open = trade_open.replace(tzinfo=timezone.utc)
+        day_file = self._file_for(at.date())
+        day_file.append(
+            {
+                "time": int(at.timestamp() * 1000),
+                "trade_open": -1 if trade_open is None else int(trade_open.timestamp()),
+                "profit": np.nan if profit is None else float(profit),
+                "open_minutes": -1 if open_minutes is None else int(open_minutes),
+                "event": day_file.code(event),
+                "strategy": day_file.code(strategy),
+                "pair": day_file.code(pair),
+                "side": day_file.code(side),
+                "entry_tag": day_file.code(entry_tag),
+            }
+        )
+
+    def record_fields(self, event: str, pair: str, at: datetime, fields: Mapping[str, Any]) -> None:
+        """:meth:`record` from a diagnostics event's fields, accepting each strategy's field names."""
+        values = {name: next((fields[alias] for alias in aliases if alias in fields), None)
+                  for name, aliases in _ALIASES.items()}
+        self.record(event, at, strategy=fields.get("strategy"), pair=pair, entry_tag=fields.get("entry_tag"),
+                    trade_open=fields.get("trade_open"), **values)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+
+class EventLog:
+    """Read-only view of one day file written by :class:`EventRecorder`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        header = np.fromfile(path, dtype=_HEADER, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} event file")
+        self.capacity = int(header["capacity"])
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        self._header = self._map[:_HEADER.itemsize].view(_HEADER)
+        self._columns = {
+            name: self._map[offset: offset + self.capacity * dtype.itemsize].view(dtype)
+            for name, (offset, dtype) in _layout(self.capacity).items()
+        }
+        strings_path = path + ".strings.json"
+        self.strings: List[str] = [""]
+        if os.path.exists(strings_path):
+            with open(strings_path, encoding="utf-8") as handle:
+                self.strings = json.load(handle)
+
+    @classmethod
+    def for_day(cls, directory: str, day: date) -> "EventLog":
+        return cls(day_path(directory, day))
+
+    @property
+    def appended(self) -> int:
+        """Records appended since the file was created (older ones are overwritten past ``capacity``)."""
+        return int(self._header["cursor"][0])
+
+    def __len__(self) -> int:
+        return min(self.appended, self.capacity)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Columns oldest first; views into the mapped file unless the ring has wrapped."""
+        appended = self.appended
+        if appended <= self.capacity:
+            return {name: column[:appended] for name, column in self._columns.items()}
+        start = appended % self.capacity
+        return {name: np.concatenate([column[start:], column[:start]]) for name, column in self._columns.items()}
+
+    def frame(self) -> pd.DataFrame:
+        """Events as a frame with UTC datetimes and categorical strings; unknowns are NaN/NaT or -1."""
+        columns = self.columns()
+        categories = pd.Index(self.strings)
+        data: Dict[str, Any] = {
+            "time": pd.to_datetime(columns["time"], unit="ms", utc=True),
+            "trade_open": pd.to_datetime(np.where(columns["trade_open"] < 0, np.nan, columns["trade_open"]),
+                                         unit="s", utc=True),
+            "profit": columns["profit"],
+            "open_minutes": columns["open_minutes"],
+        }
+        for name in STRING_COLUMNS:
+            codes = columns[name].astype(np.int32) - 1
+            data[name] = pd.Categorical.from_codes(codes, categories=categories[1:], validate=False)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,493 @@
+"""
+Exit simulation for sell-space parameters over fixed entries.
+
+Sell-space hyperopt (``roi_*`` in S1-S4 and S8-S10, trailing settings) reruns
+the full event-driven backtest every epoch although the entry signals never
+change. :func:`simulate_exits` takes an analyzed frame (OHLC plus
+``enter_*``/``exit_*`` columns) once and replays, for every parameter set, the
+exits freqtrade's backtesting would take:
+
+- ``minimal_roi`` (compared with the candle high/low, exit at the ROI rate),
+- the fixed ``stoploss`` and the trailing stop (``trailing_stop_positive``,
+  ``trailing_stop_positive_offset``, ``trailing_only_offset_is_reached``),
+  adjusted with the candle high/low before the stop is checked,
+- exit signals (``use_exit_signal``) and a forced exit at the last candle's open,
+
+with freqtrade's priority (exit signal, stoploss, ROI, trailing stop), its
+close-rate rules (gaps, new ROI steps, trailing hits on the entry candle) and
+one open trade at a time, reversing on the exit candle when an opposite entry
+signal is due. Entries happen at the open of the candle after the signal, as
+in backtesting.
+
+Not simulated: ``custom_exit``/``custom_stoploss``, protections, pair locks,
+``max_open_trades``, funding fees and wallet effects. Exit rates are not
+rounded to the exchange's price precision; freqtrade occasionally rounds a
+rate clamped to the candle low/high just outside the candle and fills that
+exit a candle later. Compare :meth:`ExitSimulation.trades` with a freqtrade
+backtest on a sample range via :func:`compare_trades` before trusting a sweep
+for a strategy that relies on those.
+
+With numba the whole sweep runs in one compiled kernel; the fallback resolves
+each trade with vectorized NumPy over growing candle windows.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.exchange import timeframe_to_minutes
+
+from strategy_support._numba import HAVE_NUMBA, njit
+from strategy_support.schedules import RoiTable
+
+ROI, STOP_LOSS, TRAILING_STOP_LOSS, EXIT_SIGNAL, FORCE_EXIT = 0, 1, 2, 3, 4
+EXIT_REASONS = ("roi", "stop_loss", "trailing_stop_loss", "exit_signal", "force_exit")
+
+EXIT_SETTINGS = (
+    "stoploss",
+    "trailing_stop",
+    "trailing_stop_positive",
+    "trailing_stop_positive_offset",
+    "trailing_only_offset_is_reached",
+)
+
+
+@njit(cache=True)
+def _profit_ratio(open_rate, rate, side, fee, leverage):
+    if side > 0:
+        return (rate * (1.0 - fee) / (open_rate * (1.0 + fee)) - 1.0) * leverage
+    return (1.0 - rate * (1.0 + fee) / (open_rate * (1.0 - fee))) * leverage
+
+
+def _profit_ratios(open_rates, rates, sides, fee, leverage):
+    """:func:`_profit_ratio` for arrays of rates and/or sides."""
+    long = rates * (1.0 - fee) / (open_rates * (1.0 + fee)) - 1.0
+    short = 1.0 - rates * (1.0 + fee) / (open_rates * (1.0 - fee))
+    return np.where(np.asarray(sides) > 0, long, short) * leverage
+
+
+@njit(cache=True)
+def _stop_rate(price, value, side, leverage):
+    return price * (1.0 - side * abs(value) / leverage)
+
+
+@njit(cache=True)
+def _stop_close_rate(side, stop, stop_pct, trailing_hit, trade_minutes, row_open, row_high, row_low,
+                     trailing, tsp, offset, only_offset, leverage):
+    # Stop already beyond the whole candle: exit at the open.
+    if (side > 0 and stop > row_high) or (side < 0 and stop < row_low):
+        return row_open
+    if trailing_hit and trade_minutes == 0:
+        # Trailing stop hit on the entry candle: assume the most pessimistic path.
+        if trailing and only_offset and not np.isnan(tsp) and tsp != 0.0:
+            rate = row_open * (1.0 + side * abs(offset) - side * abs(tsp / leverage))
+        else:
+            rate = row_open * (1.0 - side * abs(stop_pct / leverage))
+        return max(row_low, rate) if side > 0 else min(row_high, rate)
+    return stop
+
+
+@njit(cache=True)
+def _roi_close_rate(side, open_rate, trade_minutes, roi_minutes, roi, row_open, row_high, row_low, timeframe_minutes,
+                    fee, leverage):
+    """
+    ROI exit rate as ``_get_close_rate_for_roi`` computes it.
+
+    Backtesting's rejection of ROI on a red (short: green) entry candle also
+    needs the trade to be opened below (short: above) the candle open; entries
+    here fill at the open, so it never applies.
+    """
+    if roi == -1.0 and roi_minutes % timeframe_minutes == 0:
+        return row_open
+    # Rate at which the fee-adjusted profit ratio equals ``roi`` (``Trade.calc_close_rate_for_roi``).
+    close_rate = open_rate * (1.0 + side * roi / leverage) * (1.0 + side * fee) / (1.0 - side * fee)
+    is_new_roi = row_open < close_rate if side < 0 else row_open > close_rate
+    if trade_minutes > 0 and trade_minutes == roi_minutes and roi_minutes % timeframe_minutes == 0 and is_new_roi:
+        return row_open
+    return min(max(close_rate, row_low), row_high)
+
+
+@njit(cache=True)
+def _resolve_exit(side, open_rate, trade_minutes, row_open, row_high, row_low, exit_signal,
+                  stop_hit, stop, initial_stop, stop_pct, roi_hit, roi_minutes, roi,
+                  trailing, tsp, offset, only_offset, timeframe_minutes, fee, leverage):
+    """``(reason, close rate)`` backtesting takes on this candle; reason ``-1`` for no exit."""
+    if exit_signal:
+        return EXIT_SIGNAL, row_open
+    trailing_hit = stop_hit and stop != initial_stop
+    if stop_hit and not trailing_hit:
+        return STOP_LOSS, _stop_close_rate(side, stop, stop_pct, False, trade_minutes, row_open, row_high, row_low,
+                                           trailing, tsp, offset, only_offset, leverage)
+    if roi_hit:
+        return ROI, _roi_close_rate(side, open_rate, trade_minutes, roi_minutes, roi, row_open, row_high, row_low,
+                                    timeframe_minutes, fee, leverage)
+    if trailing_hit:
+        return TRAILING_STOP_LOSS, _stop_close_rate(side, stop, stop_pct, True, trade_minutes, row_open, row_high,
+                                                    row_low, trailing, tsp, offset, only_offset, leverage)
+    return -1, np.nan
+
+
+@njit(cache=True)
+def _trade_kernel(start, side, minutes, opens, highs, lows, exit_signals, roi_minutes, roi_values,
+                  roi_count, stoploss, trailing, tsp, offset, only_offset, timeframe_minutes, fee, leverage):
+    open_rate = opens[start]
+    stop = _stop_rate(open_rate, stoploss, side, leverage)
+    initial_stop = stop
+    stop_pct = -abs(stoploss)
+    rows = len(opens)
+    for row in range(start, rows):
+        trade_minutes = minutes[row] - minutes[start]
+        bound = highs[row] if side > 0 else lows[row]
+        adverse = lows[row] if side > 0 else highs[row]
+        bound_profit = _profit_ratio(open_rate, bound, side, fee, leverage)
+        if trailing and side * stop < side * adverse:
+            if not (only_offset and bound_profit < offset):
+                value = stoploss
+                if not np.isnan(tsp) and bound_profit > offset:
+                    value = tsp
+                candidate = _stop_rate(bound, value, side, leverage)
+                if side * candidate > side * stop:
+                    stop = candidate
+                    stop_pct = -abs(value)
+        stop_hit = side * stop >= side * adverse
+        entry = -1
+        for step in range(roi_count):
+            if roi_minutes[step] > trade_minutes:
+                break
+            entry = step
+        roi_hit = entry >= 0 and bound_profit > roi_values[entry]
+        reason, rate = _resolve_exit(
+            side, open_rate, trade_minutes, opens[row], highs[row], lows[row], exit_signals[row],
+            stop_hit, stop, initial_stop, stop_pct, roi_hit, roi_minutes[max(entry, 0)], roi_values[max(entry, 0)],
+            trailing, tsp, offset, only_offset, timeframe_minutes, fee, leverage,
+        )
+        if reason >= 0:
+            return row, reason, rate
+    return rows - 1, FORCE_EXIT, opens[rows - 1]
+
+
+def _trade_numpy(start, side, minutes, opens, highs, lows, exit_signals, roi_minutes, roi_values,
+                 roi_count, stoploss, trailing, tsp, offset, only_offset, timeframe_minutes, fee, leverage):
+    """:func:`_trade_kernel` over growing windows of candles, in signed price space (higher = tighter stop)."""
+    open_rate = opens[start]
+    initial_stop = _stop_rate(open_rate, stoploss, side, leverage)
+    carry = side * initial_stop
+    breakpoints = roi_minutes[:roi_count]
+    rows = len(opens)
+    first, size = start, 64
+    while first < rows:
+        last = min(first + size, rows)
+        window = slice(first, last)
+        bound = highs[window] if side > 0 else lows[window]
+        adverse = side * (lows[window] if side > 0 else highs[window])
+        bound_profit = _profit_ratios(open_rate, bound, side, fee, leverage)
+        values = np.full(last - first, stoploss)
+        if trailing:
+            armed = ~(only_offset & (bound_profit < offset))
+            if not np.isnan(tsp):
+                values = np.where(bound_profit > offset, tsp, stoploss)
+            candidates = np.where(armed, side * bound * (1.0 - side * np.abs(values) / leverage), -np.inf)
+        else:
+            candidates = np.full(last - first, -np.inf)
+        after = np.maximum.accumulate(np.maximum(candidates, carry))
+        before = np.concatenate([[carry], after[:-1]])
+        # The stop only trails while it is still below the candle's adverse extreme.
+        stops = np.where(before < adverse, after, before)
+        stop_hit = stops >= adverse
+        trade_minutes = minutes[window] - minutes[start]
+        entries = np.searchsorted(breakpoints, trade_minutes, side="right") - 1
+        rois = roi_values[np.maximum(entries, 0)]
+        roi_hit = (entries >= 0) & (bound_profit > rois)
+        events = np.flatnonzero(exit_signals[window] | stop_hit | roi_hit)
+        for offset_row in events:
+            row = first + offset_row
+            stop = side * stops[offset_row]
+            stop_pct = -abs(values[offset_row]) if stop != initial_stop else -abs(stoploss)
+            entry = max(entries[offset_row], 0)
+            reason, rate = _resolve_exit(
+                side, open_rate, trade_minutes[offset_row], opens[row], highs[row], lows[row], exit_signals[row],
+                stop_hit[offset_row], stop, initial_stop, stop_pct, roi_hit[offset_row], roi_minutes[entry],
+                roi_values[entry], trailing, tsp, offset, only_offset, timeframe_minutes, fee, leverage,
+            )
+            if reason >= 0:
+                return row, reason, rate
+        carry = after[-1]
+        first, size = last, size * 2
+    return rows - 1, FORCE_EXIT, opens[rows - 1]
+
+
+@njit(cache=True)
+def _simulate_kernel(candidates, long_entries, minutes, opens, highs, lows, exit_long, exit_short,
+                     roi_minutes, roi_values, roi_counts, stoploss, trailing, tsp, offset, only_offset,
+                     timeframe_minutes, fee, leverage, counts, entry_rows, exit_rows, sides, close_rates, reasons):
+    rows = len(opens)
+    for index in range(len(stoploss)):
+        count = 0
+        last_entry = last_exit = -1
+        last_side = 0.0
+        for start in candidates:
+            if start >= rows - 1:
+                break
+            side = 1.0 if long_entries[start] else -1.0
+            # A trade closing on a candle it did not open on lets an opposite signal enter on that candle.
+            if start < last_exit or (start == last_exit and (last_entry == last_exit or side == last_side)):
+                continue
+            exit_row, reason, rate = _trade_kernel(
+                start, side, minutes, opens, highs, lows, exit_long if side > 0 else exit_short,
+                roi_minutes[index], roi_values[index], roi_counts[index], stoploss[index], trailing[index],
+                tsp[index], offset[index], only_offset[index], timeframe_minutes, fee, leverage,
+            )
+            entry_rows[index, count] = start
+            exit_rows[index, count] = exit_row
+            sides[index, count] = side
+            close_rates[index, count] = rate
+            reasons[index, count] = reason
+            count += 1
+            last_entry, last_exit, last_side = start, exit_row, side
+        counts[index] = count
+
+
+def _simulate_numpy(candidates, long_entries, minutes, opens, highs, lows, exit_long, exit_short,
+                    roi_minutes, roi_values, roi_counts, stoploss, trailing, tsp, offset, only_offset,
+                    timeframe_minutes, fee, leverage, counts, entry_rows, exit_rows, sides, close_rates, reasons):
+    rows = len(opens)
+    for index in range(len(stoploss)):
+        count = 0
+        last_entry = last_exit = -1
+        last_side = 0.0
+        for start in candidates:
+            if start >= rows - 1:
+                break
+            side = 1.0 if long_entries[start] else -1.0
+            # A trade closing on a candle it did not open on lets an opposite signal enter on that candle.
+            if start < last_exit or (start == last_exit and (last_entry == last_exit or side == last_side)):
+                continue
+            exit_row, reason, rate = _trade_numpy(
+                start, side, minutes, opens, highs, lows, exit_long if side > 0 else exit_short,
+                roi_minutes[index], roi_values[index], roi_counts[index], stoploss[index], trailing[index],
+                tsp[index], offset[index], only_offset[index], timeframe_minutes, fee, leverage,
+            )
+            entry_rows[index, count] = start
+            exit_rows[index, count] = exit_row
+            sides[index, count] = side
+            close_rates[index, count] = rate
+            reasons[index, count] = reason
+            count += 1
+            last_entry, last_exit, last_side = start, exit_row, side
+        counts[index] = count
+
+
+def exit_settings(strategy, params: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Exit settings of ``strategy`` with ``params`` applied.
+
+    ``params`` may name any of :data:`EXIT_SETTINGS`, ``minimal_roi`` (a full
+    table) or the strategy's own hyperopt parameters that ``minimal_roi`` is
+    built from (``roi_t1``, ``roi_fast``, ...). S1's ``tsl_positive`` and
+    ``tsl_offset`` do not feed its trailing settings; pass
+    ``trailing_stop_positive``/``trailing_stop_positive_offset`` instead.
+    """
+    settings = {name: getattr(strategy, name, None) for name in EXIT_SETTINGS}
+    overrides = {}
+    for name, value in params.items():
+        if name in EXIT_SETTINGS:
+            settings[name] = value
+        elif name != "minimal_roi":
+            parameter = getattr(strategy, name, None)
+            if not hasattr(parameter, "value"):
+                raise ValueError(f"Unknown exit parameter: {name}")
+            overrides[name] = value
+    if "minimal_roi" in params:
+        settings["minimal_roi"] = RoiTable(params["minimal_roi"])
+        return settings
+
+    previous = {name: getattr(strategy, name).value for name in overrides}
+    try:
+        for name, value in overrides.items():
+            getattr(strategy, name).value = value
+        settings["minimal_roi"] = RoiTable(strategy.minimal_roi)
+    finally:
+        for name, value in previous.items():
+            getattr(strategy, name).value = value
+    return settings
+
+
+def stack_exit_settings(settings: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    """Kernel arrays for resolved :func:`exit_settings`; ROI tables are padded to the longest one."""
+    width = max((len(item["minimal_roi"]) for item in settings), default=0) or 1
+    roi_minutes = np.full((len(settings), width), np.iinfo(np.int64).max, dtype=np.int64)
+    roi_values = np.full((len(settings), width), np.nan)
+    for index, item in enumerate(settings):
+        table = item["minimal_roi"]
+        roi_minutes[index, : len(table)] = table.breakpoints
+        roi_values[index, : len(table)] = table.rois
+    positive = [item["trailing_stop_positive"] for item in settings]
+    return {
+        "roi_minutes": roi_minutes,
+        "roi_values": roi_values,
+        "roi_counts": np.array([len(item["minimal_roi"]) for item in settings], dtype=np.int64),
+        "stoploss": np.array([item["stoploss"] for item in settings], dtype=np.float64),
+        "trailing": np.array([bool(item["trailing_stop"]) for item in settings]),
+        "tsp": np.array([np.nan if value is None else value for value in positive], dtype=np.float64),
+        "offset": np.array([item["trailing_stop_positive_offset"] or 0.0 for item in settings], dtype=np.float64),
+        "only_offset": np.array([bool(item["trailing_only_offset_is_reached"]) for item in settings]),
+    }
+
+
+def _signal(dataframe: DataFrame, column: str) -> np.ndarray:
+    if column not in dataframe:
+        return np.zeros(len(dataframe), dtype=bool)
+    return (dataframe[column].fillna(0).to_numpy() == 1)
+
+
+def _executed(signals: np.ndarray) -> np.ndarray:
+    # Backtesting acts on a candle's signal at the next candle's open.
+    out = np.zeros_like(signals)
+    out[1:] = signals[:-1]
+    return out
+
+
+class ExitSimulation:
+    """Simulated trades of every parameter set, ``(sets x trades)`` arrays padded past ``counts``."""
+
+    def __init__(self, dataframe: DataFrame, param_sets: Sequence[Mapping[str, Any]], fee: float, leverage: float,
+                 counts: np.ndarray, entry_rows: np.ndarray, exit_rows: np.ndarray, sides: np.ndarray,
+                 close_rates: np.ndarray, reasons: np.ndarray):
+        self.param_sets = list(param_sets)
+        self.fee = fee
+        self.leverage = leverage
+        self.counts = counts
+        self.entry_rows = entry_rows
+        self.exit_rows = exit_rows
+        self.sides = sides
+        self.close_rates = close_rates
+        self.reasons = reasons
+        self._dates = dataframe["date"].reset_index(drop=True)
+        self.open_rates = dataframe["open"].to_numpy(dtype=np.float64)[entry_rows]
+        self.profits = np.where(
+            np.arange(entry_rows.shape[1])[None, :] < counts[:, None],
+            _profit_ratios(self.open_rates, close_rates, sides, fee, leverage),
+            np.nan,
+        )
+
+    def __len__(self) -> int:
+        return len(self.param_sets)
+
+    def trades(self, index: int) -> DataFrame:
+        """Trades of parameter set ``index`` with freqtrade's backtest column names."""
+        count = int(self.counts[index])
+        entry_rows = self.entry_rows[index, :count]
+        exit_rows = self.exit_rows[index, :count]
+        open_dates = self._dates.iloc[entry_rows].reset_index(drop=True)
+        close_dates = self._dates.iloc[exit_rows].reset_index(drop=True)
+        return DataFrame(
+            {
+                "open_date": open_dates,
+                "close_date": close_dates,
+                "is_short": self.sides[index, :count] < 0,
+                "open_rate": self.open_rates[index, :count],
+                "close_rate": self.close_rates[index, :count],
+                "profit_ratio": self.profits[index, :count],
+                "exit_reason": np.array(EXIT_REASONS, dtype=object)[self.reasons[index, :count]],
+                "trade_duration": ((close_dates - open_dates).dt.total_seconds() // 60).astype("int64"),
+            }
+        )
+
+    def summary(self) -> DataFrame:
+        """One row per parameter set: its parameters, trade counts, profit and exit-reason counts."""
+        profits = np.nan_to_num(self.profits)
+        valid = ~np.isnan(self.profits)
+        wins = ((self.profits > 0) & valid).sum(axis=1)
+        equity = np.cumsum(profits, axis=1)
+        drawdown = (np.maximum.accumulate(np.maximum(equity, 0.0), axis=1) - equity).max(axis=1, initial=0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            summary = DataFrame(
+                {
+                    "trades": self.counts,
+                    "wins": wins,
+                    "winrate": np.where(self.counts > 0, wins / self.counts, np.nan),
+                    "profit_sum": profits.sum(axis=1),
+                    "profit_mean": np.where(self.counts > 0, profits.sum(axis=1) / self.counts, np.nan),
+                    "max_drawdown": drawdown,
+                }
+            )
+        for code, reason in enumerate(EXIT_REASONS):
+            summary[reason] = ((self.reasons == code) & valid).sum(axis=1)
+        params = DataFrame(self.param_sets, index=summary.index)
+        params = params.drop(columns=[column for column in params if column == "minimal_roi"])
+        return params.join(summary)
+
+
+def simulate_exits(strategy, dataframe: DataFrame, param_sets: Sequence[Mapping[str, Any]], fee: float = 0.0,
+                   leverage: float = 1.0, use_exit_signal: Optional[bool] = None) -> ExitSimulation:
+    """
+    Replay ``dataframe``'s entries under each of ``param_sets`` (see :func:`exit_settings`).
+
+    ``dataframe`` is a frame after ``populate_entry_trend``/``populate_exit_trend``
+    for one pair; ``fee`` is the per-side fee ratio and ``leverage`` the
+    leverage every trade is opened with.
+    """
+    settings = [exit_settings(strategy, params) for params in param_sets]
+    arrays = stack_exit_settings(settings)
+    if use_exit_signal is None:
+        use_exit_signal = getattr(strategy, "use_exit_signal", True)
+
+    enter_long, exit_long = _signal(dataframe, "enter_long"), _signal(dataframe, "exit_long")
+    enter_short, exit_short = _signal(dataframe, "enter_short"), _signal(dataframe, "exit_short")
+    if not getattr(strategy, "can_short", False):
+        enter_short = np.zeros_like(enter_short)
+    # Entry on an opposing exit signal is skipped; an exit signal is ignored alongside an entry signal.
+    long_entries = _executed(enter_long & ~exit_long)
+    short_entries = _executed(enter_short & ~exit_short) & ~long_entries
+    if use_exit_signal:
+        long_exits, short_exits = _executed(exit_long & ~enter_long), _executed(exit_short & ~enter_short)
+    else:
+        long_exits = short_exits = np.zeros(len(dataframe), dtype=bool)
+
+    minutes = (dataframe["date"].dt.as_unit("s").astype("int64").to_numpy() // 60).astype(np.int64)
+    candidates = np.flatnonzero(long_entries | short_entries).astype(np.int64)
+    sets, slots = len(settings), max(len(candidates), 1)
+    counts = np.zeros(sets, dtype=np.int64)
+    entry_rows = np.zeros((sets, slots), dtype=np.int64)
+    exit_rows = np.zeros((sets, slots), dtype=np.int64)
+    sides = np.ones((sets, slots))
+    close_rates = np.full((sets, slots), np.nan)
+    reasons = np.zeros((sets, slots), dtype=np.int64)
+
+    simulate = _simulate_kernel if HAVE_NUMBA else _simulate_numpy
+    simulate(
+        candidates, long_entries, minutes,
+        dataframe["open"].to_numpy(dtype=np.float64), dataframe["high"].to_numpy(dtype=np.float64),
+        dataframe["low"].to_numpy(dtype=np.float64), long_exits, short_exits,
+        arrays["roi_minutes"], arrays["roi_values"], arrays["roi_counts"],
+        arrays["stoploss"], arrays["trailing"], arrays["tsp"], arrays["offset"], arrays["only_offset"],
+        timeframe_to_minutes(strategy.timeframe), float(fee), float(leverage),
+        counts, entry_rows, exit_rows, sides, close_rates, reasons,
+    )
+    return ExitSimulation(dataframe, param_sets, fee, leverage, counts, entry_rows, exit_rows, sides, close_rates,
+                          reasons)
+
+
+def compare_trades(simulated: DataFrame, backtest: DataFrame, tolerance: float = 1e-6) -> DataFrame:
+    """
+    Join simulated trades with a freqtrade backtest's trades (same pair) on ``open_date``/``is_short``.
+
+    ``backtest`` is the pair's slice of the exported trades (``load_backtest_data``).
+    Rows missing on either side or whose close date, exit reason or profit
+    (beyond ``tolerance``) differ have ``match`` set to False.
+    """
+    columns: List[str] = ["open_date", "is_short", "close_date", "exit_reason", "close_rate", "profit_ratio"]
+    merged = simulated[columns].merge(
+        backtest[columns], on=["open_date", "is_short"], how="outer", suffixes=("_sim", "_bt"), indicator=True
+    )
+    merged["match"] = (
+        (merged["_merge"] == "both")
+        & (merged["close_date_sim"] == merged["close_date_bt"])
+        & (merged["exit_reason_sim"] == merged["exit_reason_bt"])
+        & ((merged["profit_ratio_sim"] - merged["profit_ratio_bt"]).abs() <= tolerance)
+    )
+    return merged.drop(columns="_merge").sort_values("open_date", ignore_index=True)
+
@@ -0,0 +1,183 @@
+"""
+Shared, memoizing indicator layer for the S1-S10 strategy pack.
+
+Strategies running in the same process (backtesting with ``--strategy-list``,
+hyperopt workers, or several strategies hosted by one bot) ask for the same
+EMA/ADX/ATR series on the same pair and timeframe over and over. This module
+computes each series once per candle and serves every later request from a
+bounded LRU cache.
+
+Cache key: (pair, timeframe, indicator, params, first candle, last candle, rows).
+The first candle and row count are part of the key because EMA/Wilder seeds
+depend on where the history starts, so frames trimmed to different startup
+windows must not share results.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import talib.abstract as ta
+from pandas import DataFrame, Series
+
+CacheKey = Tuple[Hashable, ...]
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def frame_signature(dataframe: DataFrame) -> Tuple[Any, Any, int]:
+    rows = len(dataframe)
+    if rows == 0:
+        return None, None, 0
+    if "date" in dataframe.columns:
+        dates = dataframe["date"]
+        return dates.iloc[0], dates.iloc[-1], rows
+    return dataframe.index[0], dataframe.index[-1], rows
+
+
+def _freeze(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values)
+    values.flags.writeable = False
+    return values
+
+
+def _run_talib(function: Any, frame: Any, params: Dict[str, Any]) -> Any:
+    if isinstance(frame, DataFrame):
+        return function(frame, **params)
+    # OverlayFrame: feed talib the shared OHLCV arrays instead of materializing a DataFrame.
+    result = function(frame.talib_inputs(), **params)
+    if isinstance(result, list):
+        return DataFrame(dict(zip(function.output_names, result)))
+    return result
+
+
+class IndicatorCache:
+    """
+    Bounded LRU cache of indicator outputs.
+
+    Entries are stored as read-only NumPy arrays and evicted least-recently-used
+    first once the total stored bytes exceed ``max_bytes``. Hit, miss and
+    eviction counters are exposed through :meth:`stats`.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(pair: str, timeframe: str, indicator: str, params: Dict[str, Any],
+                 dataframe: DataFrame) -> CacheKey:
+        return (pair, timeframe, indicator, tuple(sorted(params.items())), *frame_signature(dataframe))
+
+    def get_or_compute(self, key: CacheKey, dataframe: DataFrame,
+                       compute: Callable[[DataFrame], Any]) -> Series | DataFrame:
+        """Return the cached result for ``key`` or compute, store and return it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._restore(entry[0], dataframe)
+            self.misses += 1
+
+        result = compute(dataframe)
+        stored, nbytes = self._store_form(result)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (stored, nbytes)
+            self._bytes += nbytes
+            self._evict()
+        return self._restore(stored, dataframe)
+
+    def indicator(self, dataframe: DataFrame, pair: str, timeframe: str, indicator: str,
+                  **params: Any) -> Series | DataFrame:
+        """Cached equivalent of ``talib.abstract.<indicator>(dataframe, **params)``."""
+        key = self.make_key(pair, timeframe, indicator, params, dataframe)
+        function = getattr(ta, indicator)
+        return self.get_or_compute(key, dataframe, lambda frame: _run_talib(function, frame, params))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        # Always keep the newest entry, even if it alone exceeds the budget.
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    @staticmethod
+    def _store_form(result: Any) -> Tuple[Any, int]:
+        if isinstance(result, DataFrame):
+            columns = {name: _freeze(result[name].to_numpy(copy=True)) for name in result.columns}
+            return columns, sum(values.nbytes for values in columns.values())
+        if isinstance(result, Series):
+            result = result.to_numpy(copy=True)
+        values = _freeze(np.array(result, copy=True))
+        return values, values.nbytes
+
+    @staticmethod
+    def _restore(stored: Any, dataframe: DataFrame) -> Series | DataFrame:
+        if isinstance(stored, dict):
+            return DataFrame(stored, index=dataframe.index)
+        return Series(stored, index=dataframe.index)
+
+
+class CachedTA:
+    """
+    Drop-in stand-in for ``talib.abstract`` bound to one pair/timeframe frame.
+
+    ``cached_ta(df, pair, tf).EMA(timeperiod=50)`` returns the same series as
+    ``ta.EMA(df, timeperiod=50)`` but computes it at most once per candle.
+    """
+
+    def __init__(self, cache: IndicatorCache, dataframe: DataFrame, pair: str, timeframe: str):
+        self._cache = cache
+        self._dataframe = dataframe
+        self._pair = pair
+        self._timeframe = timeframe
+
+    def __getattr__(self, indicator: str) -> Callable[..., Series | DataFrame]:
+        if indicator.startswith("_"):
+            raise AttributeError(indicator)
+
+        def call(**params: Any) -> Series | DataFrame:
+            return self._cache.indicator(self._dataframe, self._pair, self._timeframe, indicator, **params)
+
+        return call
+
+
+INDICATOR_CACHE = IndicatorCache()
+
+
+def cached_ta(dataframe: DataFrame, pair: str, timeframe: str, cache: Optional[IndicatorCache] = None) -> CachedTA:
+    """Return a talib-like accessor backed by the process-wide indicator cache."""
+    return CachedTA(cache if cache is not None else INDICATOR_CACHE, dataframe, pair, timeframe)
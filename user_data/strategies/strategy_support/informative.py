@@ -0,0 +1,165 @@
+"""
+Informative-timeframe layer cache.
+
+A 1m strategy with 3m/5m context sees a new 3m candle only every third base
+candle, yet ``populate_indicators`` used to recompute the informative
+indicators and re-run ``merge_informative_pair`` on every call.
+:class:`InformativeCache` keeps, per (pair, informative timeframe), the
+populated informative frame and its merge keys, and only rebuilds them when
+the informative frame's last closed candle changes.
+
+Merging is an as-of lookup: each base row takes the latest informative candle
+whose close (``date + informative timeframe - base timeframe``) is at or before
+the base candle's date, which is what ``merge_informative_pair(..., ffill=True)``
+produces on gap-free data.
+
+Strategies pass the informative ``columns`` they actually read; only those are
+gathered through the cached integer alignment index and written onto the base
+frame as ``<column>_<timeframe>``, instead of carrying every suffixed OHLCV
+column across.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.exchange import timeframe_to_minutes
+
+from strategy_support.indicator_cache import frame_signature
+from strategy_support.overlay import OverlayFrame
+
+
+class _InformativeEntry:
+    def __init__(self, signature: Tuple[Any, Any, int], frame: OverlayFrame, merge_dates: np.ndarray):
+        self.signature = signature
+        self.frame = frame
+        self.merge_dates = merge_dates
+        self.alignment_key: Optional[Tuple[Any, Any, int]] = None
+        self.alignment: Optional[np.ndarray] = None
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def array(self, column: str) -> np.ndarray:
+        values = self._arrays.get(column)
+        if values is None:
+            values = self._arrays[column] = self.frame[column].to_numpy()
+        return values
+
+
+class InformativeCache:
+    """
+    Per-strategy cache of populated informative frames and their base-frame alignment.
+
+    ``populate(informative, pair)`` receives an :class:`OverlayFrame` over the
+    data provider's frame and must return it with the informative indicators
+    added; the provider's frame itself is never written to. It is only called
+    when a new informative candle has closed (or the history changed).
+
+    ``columns`` maps an informative timeframe to the columns the strategy reads
+    from it; timeframes without an entry are merged in full.
+    """
+
+    def __init__(self, timeframe: str, columns: Optional[Dict[str, Sequence[str]]] = None):
+        self.timeframe = timeframe
+        self.columns = dict(columns or {})
+        self._entries: Dict[Tuple[str, str], _InformativeEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pair: str, timeframe_inf: str, informative: DataFrame,
+            populate: Callable[[OverlayFrame, str], OverlayFrame]) -> _InformativeEntry:
+        signature = frame_signature(informative)
+        entry = self._entries.get((pair, timeframe_inf))
+        if entry is not None and entry.signature == signature:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        frame = populate(OverlayFrame(informative), pair)
+        offset = pd.to_timedelta(timeframe_to_minutes(timeframe_inf) - timeframe_to_minutes(self.timeframe), "m")
+        if offset < pd.Timedelta(0):
+            raise ValueError("Tried to merge a faster timeframe to a slower timeframe.")
+        # Naive datetime64 keys; tz-aware ``to_numpy()`` would make searchsorted compare Timestamp objects.
+        merge_dates = (frame["date"] + offset).to_numpy(dtype="datetime64[ns]")
+        entry = _InformativeEntry(signature, frame, merge_dates)
+        self._entries[(pair, timeframe_inf)] = entry
+        return entry
+
+    def merge(self, dataframe: DataFrame, pair: str, timeframe_inf: str, informative: DataFrame,
+              populate: Callable[[OverlayFrame, str], OverlayFrame],
+              columns: Optional[Sequence[str]] = None) -> DataFrame:
+        """
+        Cached ``merge_informative_pair(dataframe, populate(informative, pair), ..., ffill=True)``.
+
+        With ``columns`` (or a declared column list for ``timeframe_inf``) only
+        those informative columns are joined; otherwise every column is.
+        """
+        if columns is None:
+            columns = self.columns.get(timeframe_inf)
+        entry = self.get(pair, timeframe_inf, informative, populate)
+        positions = self._alignment(entry, dataframe)
+        if columns is None:
+            return _join_suffixed(dataframe, entry.frame, positions, entry.frame.columns, timeframe_inf)
+        return _take_columns(dataframe, entry, positions, columns, timeframe_inf)
+
+    @staticmethod
+    def _alignment(entry: _InformativeEntry, dataframe: DataFrame) -> np.ndarray:
+        key = frame_signature(dataframe)
+        if entry.alignment_key != key:
+            base_dates = dataframe["date"].to_numpy(dtype="datetime64[ns]")
+            entry.alignment = np.searchsorted(entry.merge_dates, base_dates, side="right") - 1
+            entry.alignment_key = key
+        return entry.alignment
+
+    def reset(self) -> None:
+        self._entries.clear()
+
+
+def _join_suffixed(dataframe: DataFrame, informative: OverlayFrame, positions: np.ndarray, columns,
+                   timeframe_inf: str) -> DataFrame:
+    matched = positions >= 0
+    if informative.empty:
+        taken = DataFrame(np.nan, index=dataframe.index, columns=list(columns))
+    else:
+        taken = informative[list(columns)].iloc[np.where(matched, positions, 0)]
+        taken.index = dataframe.index
+    if not matched.all():
+        taken = taken.where(pd.Series(matched, index=dataframe.index), axis=0)
+    taken.columns = [f"{column}_{timeframe_inf}" for column in taken.columns]
+    existing = [column for column in taken.columns if column in dataframe.columns]
+    if existing:
+        dataframe = dataframe.drop(columns=existing)
+    return pd.concat([dataframe, taken], axis=1)
+
+
+def _take_columns(dataframe: DataFrame, entry: _InformativeEntry, positions: np.ndarray, columns: Sequence[str],
+                  timeframe_inf: str) -> DataFrame:
+    matched = positions >= 0
+    all_matched = bool(matched.all())
+    safe = np.where(matched, positions, 0)
+    for column in columns:
+        if entry.frame.empty:
+            values = np.full(len(dataframe), np.nan)
+        else:
+            values = entry.array(column)[safe]
+            if not all_matched:
+                values = _blank_unmatched(values, matched)
+        dataframe[f"{column}_{timeframe_inf}"] = values
+    return dataframe
+
+
+def _blank_unmatched(values: np.ndarray, matched: np.ndarray) -> np.ndarray:
+    if values.dtype.kind in "mM":
+        values[~matched] = np.datetime64("NaT")
+        return values
+    if values.dtype.kind in "biu":
+        values = values.astype(float)
+    elif values.dtype.kind != "f":
+        values = values.astype(object)
+        values[~matched] = None
+        return values
+    values[~matched] = np.nan
+    return values
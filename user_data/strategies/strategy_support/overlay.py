@@ -0,0 +1,89 @@
+"""
+Non-mutating, zero-copy views over data-provider frames.
+
+``self.dp.get_pair_dataframe(...)`` hands strategies a frame that other
+strategies (S3/S4/S9 on 1h, S5/S6/S10 on 4h) read for the same pair and
+timeframe. Writing indicator columns into it either corrupts that shared data
+or, with a defensive ``.copy()``, doubles memory on every call.
+
+:class:`OverlayFrame` shares the provider's OHLCV arrays through read-only
+NumPy views and keeps every column a strategy assigns in a private overlay.
+It supports the small DataFrame surface the strategies and helpers use:
+column get/set, ``columns``, ``index``, ``len`` and ``empty``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+from pandas import DataFrame, Series
+
+TALIB_INPUTS = ("open", "high", "low", "close", "volume")
+
+
+class OverlayFrame:
+    """Read-only base frame plus a private overlay of derived columns."""
+
+    def __init__(self, base: DataFrame):
+        self._base = base
+        self._overlay: Dict[str, np.ndarray] = {}
+        self._readonly: Dict[str, np.ndarray] = {}
+        self.index = base.index
+
+    @property
+    def base(self) -> DataFrame:
+        return self._base
+
+    @property
+    def columns(self) -> List[str]:
+        base_columns = list(self._base.columns)
+        return base_columns + [column for column in self._overlay if column not in self._base.columns]
+
+    @property
+    def empty(self) -> bool:
+        return len(self._base) == 0
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._overlay or column in self._base.columns
+
+    def __getitem__(self, key: Any) -> Series | DataFrame:
+        if isinstance(key, list):
+            return DataFrame({column: self.column_array(column) for column in key}, index=self.index)
+        return Series(self.column_array(key), index=self.index, name=key, copy=False)
+
+    def __setitem__(self, column: str, value: Any) -> None:
+        if isinstance(value, Series) and not value.index.equals(self.index):
+            value = value.reindex(self.index)
+        values = np.asarray(value)
+        if values.ndim == 0:
+            values = np.full(len(self), values)
+        if len(values) != len(self):
+            raise ValueError(f"Length of values ({len(values)}) does not match length of frame ({len(self)})")
+        self._overlay[column] = values
+
+    def column_array(self, column: str) -> np.ndarray:
+        """Overlay column, or a read-only view of the shared base column."""
+        values = self._overlay.get(column)
+        if values is not None:
+            return values
+        values = self._readonly.get(column)
+        if values is None:
+            values = self._base[column].to_numpy().view()
+            values.flags.writeable = False
+            self._readonly[column] = values
+        return values
+
+    def talib_inputs(self) -> Dict[str, np.ndarray]:
+        """``talib.abstract`` input dict built from the shared OHLCV arrays without copying float64 data."""
+        return {
+            name: np.asarray(self.column_array(name), dtype=np.float64)
+            for name in TALIB_INPUTS if name in self
+        }
+
+    def to_frame(self) -> DataFrame:
+        """Materialize base plus overlay as a new DataFrame (copies; for full-width merges only)."""
+        return self._base.assign(**{column: values for column, values in self._overlay.items()})
@@ -0,0 +1,245 @@
+"""
+Cross-sectional (time x pair) panel for relative-strength ranking.
+
+Scoring each pair on its own against the benchmark basket tells S6 nothing
+about where the pair stands in the whitelist. :class:`CrossSectionalPanel`
+keeps ``close`` and ``volume`` for every whitelisted and benchmark pair as 2D
+NumPy arrays on a shared date grid (one row per candle, one column per pair)
+and derives, per momentum window and in one vectorized pass over all pairs:
+
+- ``rs_score``: pair return minus the mean benchmark return,
+- ``rs_rank``: 1 for the strongest pair at that candle,
+- ``rs_pct``: the rank as a percentile (1.0 strongest, 0.0 weakest),
+- ``rs_zscore``: ``rs_score`` standardized across the pairs at that candle.
+
+Returns are taken ``window`` grid rows back, i.e. on candle time; a missing
+candle leaves a NaN that is excluded from the ranking. New candles are
+appended and only the new rows are scored, so the per-candle cost does not
+grow with history, and the first pair analyzed on a candle pays for all
+others.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+from strategy_support.benchmark import asof_positions
+
+PANEL_COLUMNS = ("rs_score", "rs_rank", "rs_pct", "rs_zscore")
+
+
+def _dates(frame: DataFrame) -> np.ndarray:
+    return frame["date"].to_numpy(dtype="datetime64[ns]")
+
+
+class _WindowStats:
+    def __init__(self, capacity: int, pairs: int):
+        self.rows = 0
+        self.values = {column: np.full((capacity, pairs), np.nan) for column in PANEL_COLUMNS}
+
+    def grow(self, rows: int) -> None:
+        for column, values in self.values.items():
+            if len(values) < rows:
+                grown = np.full((max(rows, 2 * len(values)), values.shape[1]), np.nan)
+                grown[: len(values)] = values
+                self.values[column] = grown
+
+    def drop_head(self, rows: int) -> None:
+        for column, values in self.values.items():
+            self.values[column] = np.concatenate([values[rows:], np.full((rows, values.shape[1]), np.nan)])
+        self.rows = max(self.rows - rows, 0)
+
+
+class CrossSectionalPanel:
+    """
+    Shared ``close``/``volume`` panel for a strategy's whitelist on one timeframe.
+
+    ``keep_rows`` bounds the grid kept between candles; it never drops below the
+    longest pair history seen at the last full build.
+    """
+
+    def __init__(self, timeframe: str, benchmark_pairs: Sequence[str] = (), keep_rows: int = 1500):
+        self.timeframe = timeframe
+        self.benchmark_pairs = list(benchmark_pairs)
+        self.keep_rows = int(keep_rows)
+        self.pairs: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._close = np.empty((0, 0))
+        self._volume = np.empty((0, 0))
+        self._rows = 0
+        self._limit = self.keep_rows
+        self._stats: Dict[int, _WindowStats] = {}
+        self.full_builds = 0
+        self.incremental_updates = 0
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[: self._rows]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._close[: self._rows]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._volume[: self._rows]
+
+    def update(self, dp, pairs: Optional[Sequence[str]] = None) -> None:
+        """Fold in the candles the data provider has beyond the panel's last row."""
+        if pairs is None:
+            pairs = dp.current_whitelist() if dp else []
+        universe = list(dict.fromkeys([*pairs, *self.benchmark_pairs]))
+        frames = {pair: dp.get_pair_dataframe(pair, self.timeframe) for pair in universe} if dp else {}
+        frames = {pair: frame for pair, frame in frames.items() if frame is not None and not frame.empty}
+        if self._rows == 0 or any(pair not in self._index for pair in frames):
+            self._build(frames)
+        else:
+            self._append(frames)
+
+    def _build(self, frames: Dict[str, DataFrame]) -> None:
+        self.full_builds += 1
+        self.pairs = list(frames)
+        self._index = {pair: column for column, pair in enumerate(self.pairs)}
+        self._stats.clear()
+        if not frames:
+            self._rows = 0
+            return
+        dates = {pair: _dates(frame) for pair, frame in frames.items()}
+        grid = np.unique(np.concatenate(list(dates.values())))
+        self._limit = max(self.keep_rows, max(len(frame) for frame in frames.values()))
+        grid = grid[-self._limit:]
+        self._dates = grid
+        self._close = np.full((len(grid), len(self.pairs)), np.nan)
+        self._volume = np.full((len(grid), len(self.pairs)), np.nan)
+        self._rows = len(grid)
+        for pair, frame in frames.items():
+            self._scatter(self._index[pair], dates[pair], frame, 0)
+
+    def _append(self, frames: Dict[str, DataFrame]) -> None:
+        last = self._dates[self._rows - 1]
+        fresh = {}
+        for pair, frame in frames.items():
+            dates = _dates(frame)
+            start = int(np.searchsorted(dates, last, side="right"))
+            if start < len(dates):
+                fresh[pair] = (dates[start:], frame.iloc[start:])
+        if not fresh:
+            return
+        self.incremental_updates += 1
+        new_dates = np.unique(np.concatenate([dates for dates, _ in fresh.values()]))
+        self._reserve(self._rows + len(new_dates))
+        first = self._rows
+        self._dates[first: first + len(new_dates)] = new_dates
+        self._rows += len(new_dates)
+        for pair, (dates, frame) in fresh.items():
+            self._scatter(self._index[pair], dates, frame, first)
+        # Trim in batches so the head shift is amortized over many candles.
+        if self._rows > self._limit + max(self._limit // 4, 1):
+            self._drop_head(self._rows - self._limit)
+
+    def _scatter(self, column: int, dates: np.ndarray, frame: DataFrame, first: int) -> None:
+        grid = self._dates[first: self._rows]
+        positions = np.searchsorted(grid, dates)
+        inside = (positions < len(grid)) & (grid[np.minimum(positions, len(grid) - 1)] == dates)
+        rows = first + positions[inside]
+        self._close[rows, column] = frame["close"].to_numpy(dtype=np.float64)[inside]
+        self._volume[rows, column] = frame["volume"].to_numpy(dtype=np.float64)[inside]
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= len(self._dates):
+            return
+        capacity = max(rows, 2 * len(self._dates))
+        dates = np.empty(capacity, dtype="datetime64[ns]")
+        dates[: self._rows] = self._dates[: self._rows]
+        self._dates = dates
+        for name in ("_close", "_volume"):
+            values = getattr(self, name)
+            grown = np.full((capacity, values.shape[1]), np.nan)
+            grown[: self._rows] = values[: self._rows]
+            setattr(self, name, grown)
+
+    def _drop_head(self, rows: int) -> None:
+        keep = self._rows - rows
+        self._dates[:keep] = self._dates[rows: self._rows]
+        self._close[:keep] = self._close[rows: self._rows]
+        self._volume[:keep] = self._volume[rows: self._rows]
+        self._close[keep: self._rows] = np.nan
+        self._volume[keep: self._rows] = np.nan
+        self._rows = keep
+        for stats in self._stats.values():
+            stats.drop_head(rows)
+
+    def cross_section(self, window: int) -> Dict[str, np.ndarray]:
+        """``{column: (rows x pairs) array}`` for ``window``, scoring only rows not scored before."""
+        window = int(window)
+        stats = self._stats.get(window)
+        if stats is None:
+            stats = self._stats[window] = _WindowStats(len(self._dates), len(self.pairs))
+        stats.grow(len(self._dates))
+        if stats.rows < self._rows:
+            self._score(stats, window, stats.rows, self._rows)
+            stats.rows = self._rows
+        return {column: values[: self._rows] for column, values in stats.values.items()}
+
+    def _score(self, stats: _WindowStats, window: int, start: int, stop: int) -> None:
+        close = self._close
+        rs = np.full((stop - start, len(self.pairs)), np.nan)
+        lagged_start = max(start, window)
+        if lagged_start < stop:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = close[lagged_start:stop] / close[lagged_start - window: stop - window] - 1
+            benchmarks = [self._index[pair] for pair in self.benchmark_pairs if pair in self._index]
+            benchmark = returns[:, benchmarks].mean(axis=1) if benchmarks else np.zeros(len(returns))
+            rs[lagged_start - start:] = returns - benchmark[:, None]
+
+        valid = np.isfinite(rs)
+        count = valid.sum(axis=1)
+        # Strongest first; invalid cells sort last and are blanked below.
+        order = np.argsort(np.where(valid, -rs, np.inf), axis=1, kind="stable")
+        rank = np.empty_like(rs)
+        np.put_along_axis(rank, order, np.arange(1, rs.shape[1] + 1, dtype=np.float64)[None, :], axis=1)
+        rank[~valid] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct = np.where(count[:, None] > 1, (count[:, None] - rank) / (count[:, None] - 1), 1.0)
+            pct[~valid] = np.nan
+            masked = np.where(valid, rs, 0.0)
+            mean = masked.sum(axis=1) / count
+            std = np.sqrt((np.where(valid, rs - mean[:, None], 0.0) ** 2).sum(axis=1) / count)
+            zscore = np.where(valid & (std[:, None] > 0), (rs - mean[:, None]) / std[:, None], np.nan)
+
+        stats.values["rs_score"][start:stop] = np.where(valid, rs, np.nan)
+        stats.values["rs_rank"][start:stop] = rank
+        stats.values["rs_pct"][start:stop] = pct
+        stats.values["rs_zscore"][start:stop] = zscore
+
+    def pair_columns(self, dp, pair: str, dataframe: DataFrame, window: int) -> Dict[str, np.ndarray]:
+        """
+        Cross-sectional columns for ``pair`` aligned to ``dataframe`` by date.
+
+        Refreshes the panel first when ``dataframe`` reaches a candle the panel
+        has not seen, so only the first pair analyzed on a candle pays for it.
+        """
+        rows = len(dataframe)
+        dates = _dates(dataframe)
+        if rows and (self._rows == 0 or dates[-1] > self._dates[self._rows - 1]):
+            self.update(dp)
+        column = self._index.get(pair)
+        if column is None or rows == 0:
+            return {name: np.full(rows, np.nan) for name in PANEL_COLUMNS}
+
+        section = self.cross_section(window)
+        grid = self.dates
+        positions = asof_positions(grid, dates)
+        exact = (positions >= 0) & (grid[np.maximum(positions, 0)] == dates)
+        safe = np.where(exact, positions, 0)
+        return {name: np.where(exact, values[safe, column], np.nan) for name, values in section.items()}
+
+    def reset(self) -> None:
+        self.pairs = []
+        self._index = {}
+        self._rows = 0
+        self._stats.clear()
@@ -0,0 +1,1061 @@
+"""
+Event-driven replay of the S1-S7 portfolio orchestration policy.
+
+``user_data/configs/portfolio_orchestration_profiles.yaml`` (explained in
+``docs/Portfolio Playbook.md``) describes how the orchestrator sizes and gates
+the entries of the individual strategies. :class:`PortfolioSimulator` executes
+that policy over the exported trade lists of the strategies: all trades are
+merged into one stream of entry and exit events, and every entry is sized and
+gated by the policy state at its ``open_date``:
+
+- inverse-vol bucket weights (EWMA of daily bucket returns), bucket caps and
+  the minimum active bucket weight, then inverse-vol strategy weights inside a
+  bucket with an equal-weight fallback below ``min_trade_history`` trades,
+- per-strategy caps (from the deployment profile), per-asset and top-3 asset
+  caps, the profile's per-trade risk budget and ``max_open_trades``,
+- correlation throttles: signal alignment over BTC/ETH/SOL entries, mean
+  pairwise correlation of hourly strategy PnL, and their joint extreme,
+- daily loss limits, the rolling drawdown breaker, the consecutive-loss
+  cooldown (with the profile step-down) and, given a volatility proxy series,
+  the volatility regime switch.
+
+All state is incremental (running sums, sliding windows, day roll-overs), so
+each event costs O(strategies) and multi-year replays of all strategies take
+seconds. Signals, strategy returns and edge scores come from every trade in
+the stream, taken or not: the strategies emit them regardless of the
+portfolio's decision. Sizes and PnL come only from taken trades.
+
+Interpretation of the policy where a trade list is all there is:
+
+- weights, caps and exposures are fractions of equity in stake (margin); a
+  position's notional is its stake times the profile leverage (times the
+  volatility regime's leverage multiplier), and its PnL is that notional times
+  the trade's price return (``profit_ratio / leverage`` of the export),
+- the risk budget (``risk_budget_pct_equity``) caps each new position's loss
+  at its initial stop, using ``initial_stop_loss_ratio`` when exported,
+- equity, daily loss and drawdown are realized (trade lists carry no marks),
+- the rolling drawdown is measured against the equity peak of the last
+  ``drawdown_window_days``, including the equity held at the start of that
+  window; after a breaker freeze the warning size holds until the recovery
+  condition is met.
+
+Execution-safety rules (timeouts, spread/slippage guards, funding hook) need
+order book or funding data and are not simulated.
+
+:class:`ProfileSweep` replays the same stream for many deployment profile
+variants at once (e.g. a grid from :func:`profile_variants`), holding every
+per-portfolio quantity as a vector over the variants; each named profile
+gives exactly the :class:`PortfolioSimulator` result.
+"""
+
+from __future__ import annotations
+
+import itertools
+from collections import Counter, deque
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from strategy_support.allocation import InverseVolAllocator
+from strategy_support.correlation_throttle import CorrelationThrottle
+
+PROFILE_ORDER = ("conservative", "balanced", "aggressive")
+TOP3_ASSETS = ("BTC", "ETH", "SOL")
+
+DAY = 86400
+HOUR = 3600
+
+
+def _epoch_seconds(dates) -> np.ndarray:
+    return pd.to_datetime(dates, utc=True).dt.as_unit("s").astype("int64").to_numpy()
+
+
+def _asset(pair: str) -> str:
+    return pair.split("/", 1)[0]
+
+
+class PortfolioPolicy:
+    """The ``portfolio_orchestrator`` section of the orchestration YAML, with defaults filled in."""
+
+    def __init__(self, settings: Mapping[str, Any]):
+        settings = settings.get("portfolio_orchestrator", settings)
+        self.settings = settings
+        self.strategy_map: Dict[str, Dict[str, Any]] = dict(settings["strategy_map"])
+        self.allocation: Dict[str, Any] = dict(settings.get("allocation_policy", {}))
+        self.risk: Dict[str, Any] = dict(settings.get("global_risk_controls", {}))
+        self.profiles: Dict[str, Dict[str, Any]] = dict(settings.get("deployment_profiles", {}))
+
+    @classmethod
+    def from_yaml(cls, path: str) -> "PortfolioPolicy":
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as handle:
+            return cls(yaml.safe_load(handle))
+
+    @property
+    def buckets(self) -> List[str]:
+        return list(dict.fromkeys(entry["bucket"] for entry in self.strategy_map.values()))
+
+    def enabled(self, strategy: str) -> bool:
+        entry = self.strategy_map.get(strategy)
+        return bool(entry and entry.get("enabled", True))
+
+    def profile(self, name: str) -> Dict[str, Any]:
+        if name not in self.profiles:
+            raise ValueError(f"unknown deployment profile {name!r}; expected one of {sorted(self.profiles)}")
+        return self.profiles[name]
+
+    def strategy_cap(self, profile: str) -> float:
+        caps = self.allocation.get("strategy_caps", {})
+        return float(self.profile(profile).get("per_strategy_cap", caps.get(profile, caps.get("default", 1.0))))
+
+    def asset_cap(self, asset: str, profile: str) -> float:
+        caps = self.allocation.get("asset_exposure_caps", {})
+        multiplier = float(self.profile(profile).get("asset_cap_multiplier", 1.0))
+        return float(caps.get(asset, caps.get("DEFAULT_OTHER", 1.0))) * multiplier
+
+    def top3_cap(self, profile: str) -> float:
+        caps = self.allocation.get("asset_exposure_caps", {})
+        return float(caps.get("TOP3_COMBINED", 1.0)) * float(self.profile(profile).get("asset_cap_multiplier", 1.0))
+
+    @property
+    def vol_regimes(self) -> Dict[int, Dict[str, Any]]:
+        """Settings of each volatility regime: 0 normal, 1 high, 2 extreme."""
+        switch = self.risk.get("volatility_regime_switch", {})
+        return {0: {}, 1: dict(switch.get("high_vol", {})), 2: dict(switch.get("extreme_vol", {}))}
+
+
+class _SlidingSum:
+    """Sum of values stamped within the last ``window`` seconds."""
+
+    __slots__ = ("window", "items", "total")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.items: deque = deque()
+        self.total = 0.0
+
+    def add(self, time: int, value: float) -> None:
+        self.items.append((time, value))
+        self.total += value
+
+    def expire(self, now: int) -> None:
+        while self.items and self.items[0][0] <= now - self.window:
+            self.total -= self.items.popleft()[1]
+
+
+class _SlidingMax:
+    """
+    Maximum over the last ``window`` seconds of a value that holds from one stamp to the next (monotonic deque).
+
+    The value in effect at ``now - window`` counts even if it was stamped
+    earlier, so a value only leaves once its successor is out of the window.
+    """
+
+    __slots__ = ("window", "items")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.items: deque = deque()  # [time the value was replaced (None while current), value]
+
+    def add(self, time: int, value: float) -> None:
+        if self.items:
+            self.items[-1][0] = time
+        while self.items and self.items[-1][1] <= value:
+            self.items.pop()
+        self.items.append([None, value])
+
+    def value(self, now: int) -> float:
+        while self.items[0][0] is not None and self.items[0][0] <= now - self.window:
+            self.items.popleft()
+        return self.items[0][1]
+
+
+def _merge_trades(policy: PortfolioPolicy, trades: Mapping[str, DataFrame]) -> DataFrame:
+    """All strategies' trades as one frame ordered by entry, with epoch-second times and price returns."""
+    frames = []
+    for strategy, frame in trades.items():
+        if strategy not in policy.strategy_map:
+            raise ValueError(f"{strategy} is not in the policy's strategy_map")
+        if frame.empty:
+            continue
+        leverage = frame["leverage"] if "leverage" in frame else 1.0
+        stop = frame["initial_stop_loss_ratio"] if "initial_stop_loss_ratio" in frame else np.nan
+        frames.append(
+            DataFrame(
+                {
+                    "strategy": strategy,
+                    "pair": frame["pair"].to_numpy(),
+                    "open_time": _epoch_seconds(frame["open_date"]),
+                    "close_time": _epoch_seconds(frame["close_date"]),
+                    "direction": np.where(frame["is_short"].to_numpy(dtype=bool), -1, 1)
+                    if "is_short" in frame else 1,
+                    "profit_ratio": frame["profit_ratio"].to_numpy(dtype=np.float64),
+                    "leverage": np.maximum(np.asarray(leverage, dtype=np.float64), 1e-12),
+                    "stop_ratio": np.abs(np.asarray(stop, dtype=np.float64)),
+                }
+            )
+        )
+    if not frames:
+        raise ValueError("no trades to simulate")
+    merged = pd.concat(frames, ignore_index=True)
+    merged["price_return"] = merged["profit_ratio"] / merged["leverage"]
+    return merged.sort_values(["open_time", "strategy", "pair"], kind="stable", ignore_index=True)
+
+
+def _vol_regimes(policy: PortfolioPolicy, vol_proxy: Optional[pd.Series], times: np.ndarray) -> np.ndarray:
+    """Volatility regime at each of ``times``: 0 normal, 1 high (z persisted), 2 extreme."""
+    if vol_proxy is None or vol_proxy.empty:
+        return np.zeros(len(times), dtype=np.int64)
+    high, extreme = policy.vol_regimes[1], policy.vol_regimes[2]
+    series = vol_proxy.sort_index().astype(float)
+    window = int(policy.allocation.get("lookback_days", 20)) * 24
+    zscore = (series - series.rolling(window).mean()) / series.rolling(window).std(ddof=0)
+    persisted = (zscore >= float(high.get("zscore_gte", 1.5))).astype(float)
+    persisted = persisted.rolling(int(high.get("consecutive_hours", 3))).min() == 1.0
+    regime = np.where(zscore >= float(extreme.get("zscore_gte", 2.2)), 2, np.where(persisted, 1, 0))
+    positions = np.searchsorted(_epoch_seconds(pd.Series(series.index)), times, side="right") - 1
+    return np.where(positions >= 0, regime[np.maximum(positions, 0)], 0)
+
+
+def _event_order(open_times: np.ndarray, close_times: np.ndarray) -> np.ndarray:
+    """Event codes in time order: ``2 * index`` for an exit, ``2 * index + 1`` for an entry."""
+    # Exits before entries at equal times, except a trade closing at its own open.
+    count = len(open_times)
+    indices = np.arange(count)
+    times = np.concatenate([close_times, open_times])
+    ranks = np.concatenate([np.where(close_times == open_times, 2, 0), np.ones(count, dtype=np.int64)])
+    codes = np.concatenate([indices * 2, indices * 2 + 1])
+    return codes[np.lexsort((ranks, times))]
+
+
+def _streak_freezes(streaks: Mapping[str, Any]) -> List[tuple]:
+    """``(streak length, freeze seconds)`` of the consecutive-loss cooldown, longest first."""
+    return sorted(
+        ((int(key.split("_")[1]), int(value) * (60 if key.endswith("minutes") else HOUR))
+         for key, value in streaks.items()
+         if key.startswith("streak_") and key.split("_")[1].isdigit() and key.endswith(("_minutes", "_hours"))),
+        reverse=True,
+    )
+
+
+class _StreamState:
+    """
+    Profile-independent state of a replay: allocation statistics, edge scores,
+    signal alignment and strategy PnL correlation.
+
+    It is fed by every trade of the stream, taken or not, so one instance
+    serves any number of portfolios replayed side by side.
+    """
+
+    def __init__(self, policy: PortfolioPolicy, slots: Mapping[str, int], default_slots: int, edge_window: int,
+                 start: int):
+        self.strategies = list(policy.strategy_map)
+        self.enabled = [strategy for strategy in self.strategies if policy.enabled(strategy)]
+        disabled_extreme = set(policy.vol_regimes[2].get("disable_new_entries_strategies", ()))
+        self.active_by_regime = {0: self.enabled, 1: self.enabled,
+                                 2: [s for s in self.enabled if s not in disabled_extreme]}
+        self.strategy_index = {strategy: position for position, strategy in enumerate(self.strategies)}
+
+        # Allocation: daily raw strategy returns feed the EWMA variances.
+        self.allocator = InverseVolAllocator.from_policy(policy, slots=slots, default_slots=default_slots)
+        self.allocator.advance(start)
+        self.edge = {strategy: deque(maxlen=edge_window) for strategy in self.strategies}
+
+        # Throttles: recent signals and hourly raw PnL per strategy.
+        self.throttle = CorrelationThrottle.from_policy(policy)
+        self.throttle.advance(start)
+        self.level_1, self.level_2 = self.throttle.level_1, self.throttle.level_2
+        self.corr_guard, self.joint = self.throttle.corr_guard, self.throttle.joint
+
+    def advance(self, now: int) -> bool:
+        """Roll days and hours forward to ``now``; True when a UTC day boundary was crossed."""
+        self.throttle.advance(now)
+        return self.allocator.advance(now)
+
+    def close(self, now: int, strategy: str, profit_ratio: float) -> None:
+        self.allocator.record_close(strategy, now, profit_ratio)
+        self.throttle.record_pnl(strategy, now, profit_ratio)
+        self.edge[strategy].append(profit_ratio)
+
+    def entry(self, now: int, asset: str, direction: int) -> tuple:
+        """Record an entry signal; ``(alignment level, corr guard hit, joint extreme hit)`` at ``now``."""
+        self.throttle.record_signal(asset, now, direction)
+        return self.throttle.state(now)
+
+    def lowest_edge(self, strategies: Sequence[str]) -> Optional[str]:
+        """The strategy with the lowest mean recent ``profit_ratio`` (its edge score), among those with history."""
+        edge = self.edge
+        scored = [(sum(edge[strategy]) / len(edge[strategy]), strategy) for strategy in strategies if edge[strategy]]
+        return min(scored)[1] if scored else None
+
+    def weights(self, active: Sequence[str]) -> Dict[str, float]:
+        return self.allocator.weights(active)
+
+
+class PortfolioResult:
+    """Equity curve, taken trades and per-rule counts of one simulation."""
+
+    def __init__(self, equity: DataFrame, trades: DataFrame, interventions: Mapping[str, int],
+                 triggers: Mapping[str, int], initial_equity: float):
+        self.equity = equity
+        self.trades = trades
+        self.interventions = dict(sorted(interventions.items()))
+        self.triggers = dict(sorted(triggers.items()))
+        self.initial_equity = initial_equity
+
+    def summary(self) -> Dict[str, Any]:
+        curve = self.equity["equity"].to_numpy()
+        peak = np.maximum.accumulate(np.concatenate([[self.initial_equity], curve]))[1:]
+        taken = self.trades["taken"].to_numpy() if len(self.trades) else np.zeros(0, dtype=bool)
+        return {
+            "final_equity": float(curve[-1]) if len(curve) else self.initial_equity,
+            "return": float(curve[-1] / self.initial_equity - 1.0) if len(curve) else 0.0,
+            "max_drawdown": float(((peak - curve) / peak).max(initial=0.0)),
+            "trades_taken": int(taken.sum()),
+            "trades_rejected": int((~taken).sum()),
+            "interventions": self.interventions,
+            "triggers": self.triggers,
+        }
+
+
+class PortfolioSimulator:
+    """
+    Replay of the orchestration policy over per-strategy trade lists.
+
+    ``trades`` maps a strategy id of the policy's ``strategy_map`` to its
+    exported trades (``pair``, ``open_date``, ``close_date``,
+    ``profit_ratio``, ``is_short``, ``leverage`` and optionally
+    ``initial_stop_loss_ratio``). ``vol_proxy`` is an optional series of the
+    volatility proxy (e.g. BTC 1h ATR%) indexed by the time each value is
+    known; without it the volatility regime stays normal.
+    """
+
+    def __init__(self, policy: PortfolioPolicy, profile: str = "balanced", initial_equity: float = 10000.0,
+                 min_order_notional: float = 5.0, slots: Optional[Mapping[str, int]] = None,
+                 default_slots: int = 3, drawdown_window_days: float = 30.0, edge_window: int = 50,
+                 vol_proxy: Optional[pd.Series] = None):
+        policy.profile(profile)
+        self.policy = policy
+        self.profile = profile
+        self.initial_equity = float(initial_equity)
+        self.min_order_notional = float(min_order_notional)
+        self.slots = dict(slots or {})
+        self.default_slots = int(default_slots)
+        self.drawdown_window = int(drawdown_window_days * DAY)
+        self.edge_window = int(edge_window)
+        self.vol_proxy = vol_proxy
+
+    def run(self, trades: Mapping[str, DataFrame]) -> PortfolioResult:
+        policy = self.policy
+        merged = _merge_trades(policy, trades)
+        count = len(merged)
+        open_times = merged["open_time"].to_numpy()
+        close_times = merged["close_time"].to_numpy()
+        strategy_col = merged["strategy"].to_numpy()
+        assets = np.array([_asset(pair) for pair in merged["pair"].to_numpy()])
+        directions = merged["direction"].to_numpy()
+        profit_ratios = merged["profit_ratio"].to_numpy()
+        price_returns = merged["price_return"].to_numpy()
+        stop_ratios = merged["stop_ratio"].to_numpy()
+        leverages = merged["leverage"].to_numpy()
+        entry_regimes = _vol_regimes(policy, self.vol_proxy, open_times)
+        events = _event_order(open_times, close_times)
+
+        risk = policy.risk
+        daily = risk.get("daily_loss_limit", {})
+        breaker = risk.get("rolling_drawdown_breaker", {})
+        streaks = risk.get("consecutive_loss_cooldown", {})
+        streak_freezes = _streak_freezes(streaks)
+        vol_settings = policy.vol_regimes
+        start = int(min(open_times.min(), close_times.min()))
+        state = _StreamState(policy, self.slots, self.default_slots, self.edge_window, start)
+        level_1, level_2 = state.level_1, state.level_2
+        corr_guard, joint = state.corr_guard, state.joint
+
+        interventions: Counter = Counter()
+        triggers: Counter = Counter()
+        profile = self.profile
+        equity = self.initial_equity
+        last_joint_entry = None
+
+        # Risk state.
+        day_start_equity = equity
+        day_pnl = 0.0
+        soft_until = hard_until = 0
+        peak = _SlidingMax(self.drawdown_window)
+        peak.add(start, equity)
+        pnl_12h = _SlidingSum(int(float(breaker.get("recovery_non_negative_pnl_hours", 12)) * HOUR))
+        dd_state = 0  # 0 normal, 1 warning, 2 breaker freeze
+        dd_since = 0
+        breaker_until = 0
+        breaker_armed = True
+        streak = wins_in_row = 0
+        cooldown_until = cooldown_start = last_loss = 0
+
+        open_positions: Dict[int, tuple] = {}
+        strategy_stake = Counter()
+        asset_stake = Counter()
+        stakes = np.zeros(count)
+        factors = np.zeros(count)
+        pnls = np.zeros(count)
+        taken = np.zeros(count, dtype=bool)
+        reasons = np.full(count, "", dtype=object)
+        curve_times: List[int] = []
+        curve_equity: List[float] = []
+        curve_open: List[int] = []
+        curve_exposure: List[float] = []
+
+        for code in events:
+            index = int(code >> 1)
+            is_entry = bool(code & 1)
+            strategy = strategy_col[index]
+            now = int(open_times[index] if is_entry else close_times[index])
+            if state.advance(now):
+                day_start_equity = equity
+                day_pnl = 0.0
+
+            if not is_entry:
+                state.close(now, strategy, profit_ratios[index])
+                position = open_positions.pop(index, None)
+                if position is None:
+                    continue
+                stake, _risk = position
+                pnl = stake * factors[index] * price_returns[index]
+                pnls[index] = pnl
+                equity += pnl
+                day_pnl += pnl
+                strategy_stake[strategy] -= stake
+                asset_stake[assets[index]] -= stake
+                peak.add(now, equity)
+                pnl_12h.add(now, pnl)
+                curve_times.append(now)
+                curve_equity.append(equity)
+                curve_open.append(len(open_positions))
+                curve_exposure.append(sum(strategy_stake.values()) / equity if equity > 0 else 0.0)
+
+                # Daily loss limits on realized day PnL.
+                day_loss = day_pnl / day_start_equity if day_start_equity > 0 else 0.0
+                hard_limit = float(policy.profile(profile).get("daily_hard_loss_limit_pct",
+                                                               100.0 * float(daily.get("hard_pct", -0.03)))) / 100.0
+                if day_loss <= hard_limit and hard_until <= now:
+                    hard_until = (now // DAY + 1) * DAY if daily.get("hard_freeze_until_next_utc_day", True) else now
+                    triggers["daily_loss_hard"] += 1
+                elif day_loss <= float(daily.get("soft_pct", -0.02)) and soft_until <= now and hard_until <= now:
+                    soft_until = now + int(daily.get("soft_freeze_minutes", 120)) * 60
+                    triggers["daily_loss_soft"] += 1
+
+                # Consecutive losses on taken trades.
+                if pnl < 0.0:
+                    streak += 1
+                    wins_in_row = 0
+                    last_loss = now
+                    for length, freeze in streak_freezes:
+                        if streak == length:
+                            cooldown_start, cooldown_until = now, now + freeze
+                            triggers[f"loss_streak_{length}"] += 1
+                            if length == streak_freezes[0][0] and \
+                                    streaks.get(f"streak_{length}_force_profile_stepdown", False):
+                                position_in_order = PROFILE_ORDER.index(profile) if profile in PROFILE_ORDER else 0
+                                if position_in_order > 0:
+                                    profile = PROFILE_ORDER[position_in_order - 1]
+                                    triggers["profile_stepdown"] += 1
+                            break
+                elif pnl > 0.0:
+                    wins_in_row += 1
+                    if wins_in_row >= int(streaks.get("reset_after_consecutive_wins", 2)):
+                        streak = 0
+                continue
+
+            # Entry: rolling state first.
+            if cooldown_until and cooldown_until <= now and last_loss <= cooldown_start:
+                streak = 0
+                cooldown_until = 0
+            equity_peak = peak.value(now)
+            drawdown = (equity_peak - equity) / equity_peak if equity_peak > 0 else 0.0
+            pnl_12h.expire(now)
+            if dd_state == 2 and breaker_until <= now:
+                dd_state = 1
+            if drawdown >= float(breaker.get("breaker_dd_pct", 0.09)):
+                if breaker_armed:
+                    dd_state, dd_since, breaker_until, breaker_armed = 2, now, now + int(
+                        float(breaker.get("breaker_freeze_hours", 24)) * HOUR), False
+                    triggers["drawdown_breaker"] += 1
+            else:
+                breaker_armed = True
+                if dd_state == 0 and drawdown >= float(breaker.get("warning_dd_pct", 0.06)):
+                    dd_state, dd_since = 1, now
+                    triggers["drawdown_warning"] += 1
+                elif dd_state == 1 and drawdown < float(breaker.get("recovery_dd_below", 0.05)) \
+                        and pnl_12h.total >= 0.0 and now - dd_since >= pnl_12h.window:
+                    dd_state = 0
+                    triggers["drawdown_recovery"] += 1
+
+            asset = assets[index]
+            level, corr_hit, joint_hit = state.entry(now, asset, int(directions[index]))
+            regime = int(entry_regimes[index])
+            profile_settings = policy.profile(profile)
+            active = state.active_by_regime[regime]
+            max_open = int(profile_settings.get("max_open_trades", 10) *
+                           float(vol_settings[regime].get("max_open_trades_multiplier", 1.0)))
+
+            reason = None
+            if strategy not in state.enabled:
+                reason = "strategy_disabled"
+            elif hard_until > now:
+                reason = "daily_loss_hard"
+            elif soft_until > now:
+                reason = "daily_loss_soft"
+            elif dd_state == 2:
+                reason = "drawdown_breaker"
+            elif cooldown_until > now:
+                reason = "loss_streak_cooldown"
+            elif strategy not in active:
+                reason = "vol_extreme_disable"
+            elif len(open_positions) >= max_open:
+                reason = "max_open_trades"
+            elif level == 2 and level_2.get("block_lowest_edge_strategy", False) and \
+                    strategy == state.lowest_edge(active):
+                reason = "alignment_level_2_block"
+            elif joint_hit and last_joint_entry is not None and \
+                    now - last_joint_entry < 900 // max(int(joint.get("max_new_entries_per_15m", 1)), 1):
+                reason = "joint_extreme_rate_limit"
+            if reason is not None:
+                interventions[reason] += 1
+                reasons[index] = reason
+                continue
+
+            slots = self.slots.get(strategy, self.default_slots)
+            stake = equity * state.weights(active).get(strategy, 0.0) / slots
+            leverage_factor = float(profile_settings.get("leverage", 1.0)) * float(
+                vol_settings[regime].get("leverage_multiplier", 1.0))
+            stop = stop_ratios[index] / leverages[index]
+            if stop > 0.0 and leverage_factor > 0.0:
+                risk_cap = equity * float(profile_settings.get("risk_budget_pct_equity", 100.0)) / 100.0 / (
+                    stop * leverage_factor)
+                if stake > risk_cap:
+                    stake = risk_cap
+                    interventions["risk_budget"] += 1
+
+            multiplier = 1.0
+            if level == 2:
+                multiplier *= float(level_2.get("new_risk_multiplier", 0.55))
+                interventions["alignment_level_2"] += 1
+            elif level == 1:
+                multiplier *= float(level_1.get("new_risk_multiplier", 0.75))
+                interventions["alignment_level_1"] += 1
+            if corr_hit:
+                multiplier *= float(corr_guard.get("position_size_multiplier", 0.80))
+                interventions["strategy_corr_guard"] += 1
+            if joint_hit:
+                multiplier = float(joint.get("position_size_multiplier", 0.60))
+                interventions["joint_extreme"] += 1
+                last_joint_entry = now
+            if dd_state == 1:
+                multiplier *= float(breaker.get("warning_size_multiplier", 0.50))
+                interventions["drawdown_warning"] += 1
+            stake *= multiplier
+
+            room = policy.strategy_cap(profile) * equity - strategy_stake[strategy]
+            if stake > room:
+                stake = max(room, 0.0)
+                interventions["strategy_cap"] += 1
+            room = policy.asset_cap(asset, profile) * equity - asset_stake[asset]
+            if stake > room:
+                stake = max(room, 0.0)
+                interventions["asset_cap"] += 1
+            if asset in TOP3_ASSETS:
+                room = policy.top3_cap(profile) * equity - sum(asset_stake[name] for name in TOP3_ASSETS)
+                if stake > room:
+                    stake = max(room, 0.0)
+                    interventions["top3_cap"] += 1
+            if stake * leverage_factor < self.min_order_notional:
+                interventions["min_notional"] += 1
+                reasons[index] = "min_notional"
+                continue
+
+            stakes[index] = stake
+            taken[index] = True
+            factors[index] = leverage_factor
+            open_positions[index] = (stake, stake * stop * leverage_factor)
+            strategy_stake[strategy] += stake
+            asset_stake[asset] += stake
+
+        trades_out = merged.drop(columns=["price_return"]).assign(
+            open_date=pd.to_datetime(open_times, unit="s", utc=True),
+            close_date=pd.to_datetime(close_times, unit="s", utc=True),
+            taken=taken, stake=stakes, pnl=pnls, rejected_by=reasons,
+        )
+        equity_frame = DataFrame(
+            {
+                "date": pd.to_datetime(np.asarray(curve_times, dtype=np.int64), unit="s", utc=True),
+                "equity": np.asarray(curve_equity, dtype=np.float64),
+                "open_positions": np.asarray(curve_open, dtype=np.int64),
+                "exposure": np.asarray(curve_exposure, dtype=np.float64),
+            }
+        )
+        return PortfolioResult(equity_frame, trades_out, interventions, triggers, self.initial_equity)
+
+
+class _RowsSlidingMax:
+    """
+    Element-wise :class:`_SlidingMax` of stamped vectors (two-stack queue).
+
+    A ``-inf`` entry leaves its row unstamped, so each row follows only its
+    own stamps. Vectors stamped within the last ``window`` seconds are
+    maximized by the queue; per row, the newest value stamped at or before
+    ``now - window`` is the one in effect at the window start and is kept
+    aside in ``start``.
+    """
+
+    __slots__ = ("window", "front", "back", "back_max", "start")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.front: List[tuple] = []  # (time, values, max of this and every newer front entry), oldest last
+        self.back: List[tuple] = []
+        self.back_max: Optional[np.ndarray] = None
+        self.start: Optional[np.ndarray] = None
+
+    def add(self, time: int, values: np.ndarray) -> None:
+        self.back.append((time, values))
+        self.back_max = values if self.back_max is None else np.maximum(self.back_max, values)
+
+    def value(self, now: int) -> np.ndarray:
+        while self.front or self.back:
+            if not self.front:
+                running = None
+                for time, values in reversed(self.back):
+                    running = values if running is None else np.maximum(running, values)
+                    self.front.append((time, values, running))
+                self.back.clear()
+                self.back_max = None
+            if self.front[-1][0] > now - self.window:
+                break
+            values = self.front.pop()[1]
+            self.start = values if self.start is None else np.where(values == -np.inf, self.start, values)
+        result = self.start
+        for values in (self.front[-1][2] if self.front else None, self.back_max):
+            if values is not None:
+                result = values if result is None else np.maximum(result, values)
+        return result
+
+
+class _RowsSlidingSum:
+    """Element-wise sum of the vectors stamped within the last ``window`` seconds."""
+
+    __slots__ = ("window", "items", "total")
+
+    def __init__(self, window: int, width: int):
+        self.window = window
+        self.items: deque = deque()
+        self.total = np.zeros(width)
+
+    def add(self, time: int, values: np.ndarray) -> None:
+        self.items.append((time, values))
+        self.total = self.total + values
+
+    def expire(self, now: int) -> None:
+        while self.items and self.items[0][0] <= now - self.window:
+            self.total = self.total - self.items.popleft()[1]
+
+
+_GATES = ("strategy_disabled", "daily_loss_hard", "daily_loss_soft", "drawdown_breaker", "loss_streak_cooldown",
+          "vol_extreme_disable", "max_open_trades", "alignment_level_2_block", "joint_extreme_rate_limit")
+_SIZING = ("risk_budget", "alignment_level_2", "alignment_level_1", "strategy_corr_guard", "joint_extreme",
+           "drawdown_warning", "strategy_cap", "asset_cap", "top3_cap", "min_notional")
+_TRIGGERS = ("daily_loss_hard", "daily_loss_soft", "drawdown_breaker", "drawdown_warning", "drawdown_recovery",
+             "profile_stepdown")
+
+PROFILE_FIELDS = ("leverage", "max_open_trades", "risk_budget_pct_equity", "per_strategy_cap",
+                  "asset_cap_multiplier", "daily_hard_loss_limit_pct")
+
+
+def profile_variants(base: str = "balanced", **axes: Sequence[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    The cartesian product of deployment profile overrides on top of ``base``.
+
+    ``profile_variants("balanced", leverage=[1.5, 2.5], max_open_trades=[6, 10])``
+    gives four variants named like ``balanced[leverage=1.5,max_open_trades=6]``.
+    """
+    unknown = set(axes) - set(PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown profile fields {sorted(unknown)}; expected some of {PROFILE_FIELDS}")
+    variants = {}
+    for values in itertools.product(*axes.values()):
+        overrides = dict(zip(axes, values))
+        name = f"{base}[{','.join(f'{key}={value}' for key, value in overrides.items())}]" if overrides else base
+        variants[name] = {"base": base, **overrides}
+    return variants
+
+
+class SweepResult:
+    """Daily equity (dates x variants) and per-variant metrics and rule counts of a profile sweep."""
+
+    def __init__(self, equity: DataFrame, profiles: DataFrame, metrics: DataFrame, interventions: DataFrame,
+                 triggers: DataFrame):
+        self.equity = equity
+        self.profiles = profiles
+        self.metrics = metrics
+        self.interventions = interventions
+        self.triggers = triggers
+
+    def summary(self) -> DataFrame:
+        """One row per variant: its resolved profile, metrics and intervention counts."""
+        return pd.concat([self.profiles, self.metrics, self.interventions.add_prefix("intervention.")],
+                         axis=1)
+
+
+class ProfileSweep:
+    """
+    :class:`PortfolioSimulator` for many deployment profile variants in one pass.
+
+    The policy's rules are path dependent (equity feeds the sizes, breakers
+    and caps), so the replay still walks the merged event stream once, but
+    every per-portfolio quantity is a vector over the variants and each event
+    updates all of them with a handful of array operations. The
+    profile-independent state (allocation weights, signal alignment, PnL
+    correlation) is shared. Hundreds of variants cost about as much as one.
+
+    ``variants`` maps a name to deployment profile settings: ``base`` names
+    a profile of the policy (default ``balanced``), the other keys of
+    :data:`PROFILE_FIELDS` override it. By default the policy's own profiles
+    are evaluated. A loss-streak step-down moves a variant to the profile
+    below its base in :data:`PROFILE_ORDER`, as the simulator does.
+    Each named profile gives the same result as :class:`PortfolioSimulator`.
+    """
+
+    def __init__(self, policy: PortfolioPolicy, variants: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                 initial_equity: float = 10000.0, min_order_notional: float = 5.0,
+                 slots: Optional[Mapping[str, int]] = None, default_slots: int = 3,
+                 drawdown_window_days: float = 30.0, edge_window: int = 50, vol_proxy: Optional[pd.Series] = None):
+        if variants is None:
+            variants = {name: {"base": name} for name in policy.profiles}
+        if not variants:
+            raise ValueError("no profile variants to evaluate")
+        self.policy = policy
+        self.names = list(variants)
+        self.bases = [str(settings.get("base", "balanced")) for settings in variants.values()]
+        self.table = np.array([self._resolve(base, settings) for base, settings in zip(self.bases, variants.values())])
+        self.initial_equity = float(initial_equity)
+        self.min_order_notional = float(min_order_notional)
+        self.slots = dict(slots or {})
+        self.default_slots = int(default_slots)
+        self.drawdown_window = int(drawdown_window_days * DAY)
+        self.edge_window = int(edge_window)
+        self.vol_proxy = vol_proxy
+
+    def _resolve(self, base: str, overrides: Mapping[str, Any]) -> List[float]:
+        """The :data:`PROFILE_FIELDS` of ``base`` with ``overrides``, defaults as in the simulator."""
+        policy = self.policy
+        settings = {**policy.profile(base), **{k: v for k, v in overrides.items() if k in PROFILE_FIELDS}}
+        hard_pct = float(policy.risk.get("daily_loss_limit", {}).get("hard_pct", -0.03))
+        return [
+            float(settings.get("leverage", 1.0)),
+            float(settings.get("max_open_trades", 10)),
+            float(settings.get("risk_budget_pct_equity", 100.0)),
+            float(settings["per_strategy_cap"]) if "per_strategy_cap" in settings else policy.strategy_cap(base),
+            float(settings.get("asset_cap_multiplier", 1.0)),
+            float(settings.get("daily_hard_loss_limit_pct", 100.0 * hard_pct)) / 100.0,
+        ]
+
+    def run(self, trades: Mapping[str, DataFrame]) -> SweepResult:
+        policy = self.policy
+        merged = _merge_trades(policy, trades)
+        open_times = merged["open_time"].to_numpy()
+        close_times = merged["close_time"].to_numpy()
+        strategy_col = merged["strategy"].to_numpy()
+        assets = np.array([_asset(pair) for pair in merged["pair"].to_numpy()])
+        directions = merged["direction"].to_numpy()
+        profit_ratios = merged["profit_ratio"].to_numpy()
+        price_returns = merged["price_return"].to_numpy()
+        stop_ratios = merged["stop_ratio"].to_numpy()
+        leverages = merged["leverage"].to_numpy()
+        entry_regimes = _vol_regimes(policy, self.vol_proxy, open_times)
+        events = _event_order(open_times, close_times)
+
+        risk = policy.risk
+        daily = risk.get("daily_loss_limit", {})
+        breaker = risk.get("rolling_drawdown_breaker", {})
+        streaks = risk.get("consecutive_loss_cooldown", {})
+        streak_freezes = _streak_freezes(streaks)
+        stepdown_length = streak_freezes[0][0] if streak_freezes and streaks.get(
+            f"streak_{streak_freezes[0][0]}_force_profile_stepdown", False) else None
+        vol_settings = policy.vol_regimes
+        start = int(min(open_times.min(), close_times.min()))
+        state = _StreamState(policy, self.slots, self.default_slots, self.edge_window, start)
+        level_1, level_2 = state.level_1, state.level_2
+        corr_guard, joint = state.corr_guard, state.joint
+        joint_spacing = 900 // max(int(joint.get("max_new_entries_per_15m", 1)), 1)
+        block_lowest_edge = level_2.get("block_lowest_edge_strategy", False)
+        soft_pct = float(daily.get("soft_pct", -0.02))
+        soft_freeze = int(daily.get("soft_freeze_minutes", 120)) * 60
+        hard_next_day = daily.get("hard_freeze_until_next_utc_day", True)
+        breaker_pct = float(breaker.get("breaker_dd_pct", 0.09))
+        warning_pct = float(breaker.get("warning_dd_pct", 0.06))
+        recovery_pct = float(breaker.get("recovery_dd_below", 0.05))
+        breaker_freeze = int(float(breaker.get("breaker_freeze_hours", 24)) * HOUR)
+        warning_multiplier = float(breaker.get("warning_size_multiplier", 0.50))
+        reset_wins = int(streaks.get("reset_after_consecutive_wins", 2))
+
+        # Per-variant profile settings; a step-down swaps in the named profile below.
+        width = len(self.names)
+        params = self.table.copy()
+        named = {name: np.array(self._resolve(name, {})) for name in PROFILE_ORDER if name in policy.profiles}
+        rank = np.array([PROFILE_ORDER.index(base) if base in PROFILE_ORDER else 0 for base in self.bases])
+        leverage_col, max_open_col, risk_col, cap_col, asset_mult_col, hard_col = range(len(PROFILE_FIELDS))
+        asset_index: Dict[str, int] = {}
+        for asset in assets:
+            asset_index.setdefault(asset, len(asset_index))
+        asset_caps = policy.allocation.get("asset_exposure_caps", {})
+        asset_base_caps = np.array([float(asset_caps.get(asset, asset_caps.get("DEFAULT_OTHER", 1.0)))
+                                    for asset in asset_index])
+        top3_columns = [asset_index[asset] for asset in TOP3_ASSETS if asset in asset_index]
+        top3_base_cap = float(asset_caps.get("TOP3_COMBINED", 1.0))
+        strategy_index = state.strategy_index
+
+        equity = np.full(width, self.initial_equity)
+        day_start_equity = equity
+        day_pnl = np.zeros(width)
+        soft_until = np.zeros(width, dtype=np.int64)
+        hard_until = np.zeros(width, dtype=np.int64)
+        peak = _RowsSlidingMax(self.drawdown_window)
+        peak.add(start, equity)
+        pnl_12h = _RowsSlidingSum(int(float(breaker.get("recovery_non_negative_pnl_hours", 12)) * HOUR), width)
+        dd_state = np.zeros(width, dtype=np.int64)
+        dd_since = np.zeros(width, dtype=np.int64)
+        breaker_until = np.zeros(width, dtype=np.int64)
+        breaker_armed = np.ones(width, dtype=bool)
+        streak = np.zeros(width, dtype=np.int64)
+        wins_in_row = np.zeros(width, dtype=np.int64)
+        cooldown_until = np.zeros(width, dtype=np.int64)
+        cooldown_start = np.zeros(width, dtype=np.int64)
+        last_loss = np.zeros(width, dtype=np.int64)
+        last_joint_entry = np.full(width, np.iinfo(np.int64).min // 2)
+        open_count = np.zeros(width, dtype=np.int64)
+        strategy_stake = np.zeros((width, len(state.strategies)))
+        asset_stake = np.zeros((width, len(asset_index)))
+        top_equity = equity.copy()
+        max_drawdown = np.zeros(width)
+        trades_taken = np.zeros(width, dtype=np.int64)
+        scratch = np.zeros(width)
+
+        # Rule counts are rows of fixed matrices. A gate row holds "blocked by this or an earlier
+        # gate", so each rule's own rejections are the difference to the row above.
+        blocked = np.zeros((len(_GATES), width), dtype=bool)
+        gate_rows = {reason: row for row, reason in enumerate(_GATES)}
+        gate_counts = np.zeros((len(_GATES), width), dtype=np.int64)
+        sizing_rows = {reason: row for row, reason in enumerate(_SIZING)}
+        sizing_counts = np.zeros((len(_SIZING), width), dtype=np.int64)
+        trigger_names = [*_TRIGGERS, *(f"loss_streak_{length}" for length, _ in streak_freezes)]
+        trigger_rows = {name: row for row, name in enumerate(trigger_names)}
+        trigger_counts = np.zeros((len(trigger_names), width), dtype=np.int64)
+
+        open_positions: Dict[int, tuple] = {}
+        curve_days: List[int] = []
+        curve_equity: List[np.ndarray] = []
+
+        for code in events:
+            index = int(code >> 1)
+            is_entry = bool(code & 1)
+            strategy = strategy_col[index]
+            now = int(open_times[index] if is_entry else close_times[index])
+            if state.advance(now):
+                curve_days.append(now // DAY * DAY)
+                curve_equity.append(equity)
+                day_start_equity = equity
+                day_pnl = np.zeros(width)
+
+            if not is_entry:
+                state.close(now, strategy, profit_ratios[index])
+                position = open_positions.pop(index, None)
+                if position is None:
+                    continue
+                stake, factor, held = position
+                pnl = stake * factor * price_returns[index]
+                equity = equity + pnl
+                day_pnl = day_pnl + pnl
+                strategy_stake[:, strategy_index[strategy]] -= stake
+                asset_stake[:, asset_index[assets[index]]] -= stake
+                open_count -= held
+                # Only the variants that held the trade have a new equity value.
+                peak.add(now, np.where(held, equity, -np.inf))
+                pnl_12h.add(now, pnl)
+                np.maximum(top_equity, equity, out=top_equity)
+                np.maximum(max_drawdown, (top_equity - equity) / top_equity, out=max_drawdown)
+
+                # Daily loss limits on realized day PnL.
+                day_loss = np.divide(day_pnl, day_start_equity, out=np.zeros(width), where=day_start_equity > 0)
+                hard_free = hard_until <= now
+                hard_hit = held & (day_loss <= params[:, hard_col]) & hard_free
+                soft_hit = held & ~hard_hit & (day_loss <= soft_pct) & (soft_until <= now) & hard_free
+                hard_until[hard_hit] = (now // DAY + 1) * DAY if hard_next_day else now
+                soft_until[soft_hit] = now + soft_freeze
+                trigger_counts[trigger_rows["daily_loss_hard"]] += hard_hit
+                trigger_counts[trigger_rows["daily_loss_soft"]] += soft_hit
+
+                # Consecutive losses on taken trades.
+                loss = held & (pnl < 0.0)
+                win = held & (pnl > 0.0)
+                if loss.any():
+                    streak[loss] += 1
+                    wins_in_row[loss] = 0
+                    last_loss[loss] = now
+                    for length, freeze in streak_freezes:
+                        hit = loss & (streak == length)
+                        if not hit.any():
+                            continue
+                        cooldown_start[hit] = now
+                        cooldown_until[hit] = now + freeze
+                        trigger_counts[trigger_rows[f"loss_streak_{length}"]] += hit
+                        if length == stepdown_length:
+                            step = hit & (rank > 0)
+                            for row in np.flatnonzero(step):
+                                rank[row] -= 1
+                                params[row] = named[PROFILE_ORDER[rank[row]]]
+                            trigger_counts[trigger_rows["profile_stepdown"]] += step
+                if win.any():
+                    wins_in_row[win] += 1
+                    streak[win & (wins_in_row >= reset_wins)] = 0
+                continue
+
+            # Entry: rolling state first.
+            if cooldown_until.any():
+                reset = (cooldown_until > 0) & (cooldown_until <= now) & (last_loss <= cooldown_start)
+                streak[reset] = 0
+                cooldown_until[reset] = 0
+            equity_peak = peak.value(now)
+            drawdown = np.divide(equity_peak - equity, equity_peak, out=np.zeros(width), where=equity_peak > 0)
+            pnl_12h.expire(now)
+            if dd_state.any() or drawdown.max() >= min(warning_pct, breaker_pct):
+                dd_state[(dd_state == 2) & (breaker_until <= now)] = 1
+                over = drawdown >= breaker_pct
+                fire = over & breaker_armed
+                warn = ~over & (dd_state == 0) & (drawdown >= warning_pct)
+                recover = ~over & (dd_state == 1) & (drawdown < recovery_pct) & (pnl_12h.total >= 0.0) & (
+                    now - dd_since >= pnl_12h.window)
+                dd_state[fire] = 2
+                breaker_until[fire] = now + breaker_freeze
+                dd_state[warn] = 1
+                dd_since[fire | warn] = now
+                dd_state[recover] = 0
+                breaker_armed = ~over | (breaker_armed & ~fire)
+                trigger_counts[trigger_rows["drawdown_breaker"]] += fire
+                trigger_counts[trigger_rows["drawdown_warning"]] += warn
+                trigger_counts[trigger_rows["drawdown_recovery"]] += recover
+            else:
+                breaker_armed.fill(True)
+
+            asset = assets[index]
+            level, corr_hit, joint_hit = state.entry(now, asset, int(directions[index]))
+            regime = int(entry_regimes[index])
+            regime_settings = vol_settings[regime]
+            active = state.active_by_regime[regime]
+
+            blocked[gate_rows["strategy_disabled"]] = strategy not in state.enabled
+            np.greater(hard_until, now, out=blocked[gate_rows["daily_loss_hard"]])
+            np.greater(soft_until, now, out=blocked[gate_rows["daily_loss_soft"]])
+            np.equal(dd_state, 2, out=blocked[gate_rows["drawdown_breaker"]])
+            np.greater(cooldown_until, now, out=blocked[gate_rows["loss_streak_cooldown"]])
+            blocked[gate_rows["vol_extreme_disable"]] = strategy not in active
+            np.multiply(params[:, max_open_col], float(regime_settings.get("max_open_trades_multiplier", 1.0)),
+                        out=scratch)
+            np.greater_equal(open_count, scratch.astype(np.int64), out=blocked[gate_rows["max_open_trades"]])
+            blocked[gate_rows["alignment_level_2_block"]] = level == 2 and block_lowest_edge and \
+                strategy == state.lowest_edge(active)
+            if joint_hit:
+                np.less(now - last_joint_entry, joint_spacing, out=blocked[gate_rows["joint_extreme_rate_limit"]])
+            else:
+                blocked[gate_rows["joint_extreme_rate_limit"]] = False
+            np.logical_or.accumulate(blocked, axis=0, out=blocked)
+            gate_counts += blocked
+            allowed = ~blocked[-1]
+            if not allowed.any():
+                continue
+
+            slots = self.slots.get(strategy, self.default_slots)
+            stake = equity * state.weights(active).get(strategy, 0.0) / slots
+            leverage_factor = params[:, leverage_col] * float(regime_settings.get("leverage_multiplier", 1.0))
+            stop = stop_ratios[index] / leverages[index]
+            if stop > 0.0:
+                sizable = leverage_factor > 0.0
+                risk_cap = np.divide(equity * params[:, risk_col] / 100.0, stop * leverage_factor,
+                                     out=np.full(width, np.inf), where=sizable)
+                hit = allowed & sizable & (stake > risk_cap)
+                stake = np.where(hit, risk_cap, stake)
+                sizing_counts[sizing_rows["risk_budget"]] += hit
+
+            multiplier = 1.0
+            if level == 2:
+                multiplier *= float(level_2.get("new_risk_multiplier", 0.55))
+                sizing_counts[sizing_rows["alignment_level_2"]] += allowed
+            elif level == 1:
+                multiplier *= float(level_1.get("new_risk_multiplier", 0.75))
+                sizing_counts[sizing_rows["alignment_level_1"]] += allowed
+            if corr_hit:
+                multiplier *= float(corr_guard.get("position_size_multiplier", 0.80))
+                sizing_counts[sizing_rows["strategy_corr_guard"]] += allowed
+            if joint_hit:
+                multiplier = float(joint.get("position_size_multiplier", 0.60))
+                sizing_counts[sizing_rows["joint_extreme"]] += allowed
+                last_joint_entry[allowed] = now
+            warned = allowed & (dd_state == 1)
+            if warned.any():
+                sizing_counts[sizing_rows["drawdown_warning"]] += warned
+                stake = stake * np.where(warned, multiplier * warning_multiplier, multiplier)
+            else:
+                stake = stake * multiplier
+
+            column = strategy_index[strategy]
+            rooms = [("strategy_cap", params[:, cap_col] * equity - strategy_stake[:, column]),
+                     ("asset_cap", asset_base_caps[asset_index[asset]] * params[:, asset_mult_col] * equity
+                      - asset_stake[:, asset_index[asset]])]
+            if asset in TOP3_ASSETS:
+                rooms.append(("top3_cap", top3_base_cap * params[:, asset_mult_col] * equity
+                              - asset_stake[:, top3_columns].sum(axis=1)))
+            for reason, room in rooms:
+                hit = allowed & (stake > room)
+                if hit.any():
+                    stake = np.where(hit, np.maximum(room, 0.0), stake)
+                    sizing_counts[sizing_rows[reason]] += hit
+            small = allowed & (stake * leverage_factor < self.min_order_notional)
+            sizing_counts[sizing_rows["min_notional"]] += small
+            held = allowed & ~small
+            if not held.any():
+                continue
+
+            stake = np.where(held, stake, 0.0)
+            open_positions[index] = (stake, leverage_factor, held)
+            strategy_stake[:, column] += stake
+            asset_stake[:, asset_index[asset]] += stake
+            open_count += held
+            trades_taken += held
+
+        curve_days.append((int(max(open_times.max(), close_times.max())) // DAY + 1) * DAY)
+        curve_equity.append(equity)
+        names = pd.Index(self.names, name="variant")
+        equity_frame = DataFrame(np.vstack(curve_equity), columns=names,
+                                 index=pd.to_datetime(np.asarray(curve_days, dtype=np.int64), unit="s", utc=True))
+        equity_frame.index.name = "date"
+        profiles = DataFrame(self.table, index=names, columns=list(PROFILE_FIELDS)).assign(base=self.bases)
+        profiles["daily_hard_loss_limit_pct"] *= 100.0
+        metrics = DataFrame(
+            {
+                "final_equity": equity,
+                "return": equity / self.initial_equity - 1.0,
+                "max_drawdown": max_drawdown,
+                "trades_taken": trades_taken,
+                "trades_rejected": len(merged) - trades_taken,
+            },
+            index=names,
+        )
+        gate_counts[1:] -= gate_counts[:-1].copy()
+        interventions = DataFrame(dict(zip((*_GATES, *_SIZING), np.vstack([gate_counts, sizing_counts]))),
+                                  index=names)
+        triggers = DataFrame(dict(zip(trigger_names, trigger_counts)), index=names)
+        # Like the simulator's counters, only rules that fired for some variant are reported.
+        return SweepResult(equity_frame, profiles, metrics,
+                           interventions.loc[:, interventions.any()].sort_index(axis=1),
+                           triggers.loc[:, triggers.any()].sort_index(axis=1))
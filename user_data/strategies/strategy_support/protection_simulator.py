@@ -0,0 +1,308 @@
+"""
+Replay of freqtrade protections over a fixed trade list.
+
+Each strategy's ``protections`` list (CooldownPeriod, StoplossGuard,
+MaxDrawdown, LowProfitPairs) sets its real trading cadence, but measuring a
+change to a lookback, limit or duration used to take a full backtest.
+:func:`replay_protections` takes a trade list (an exported backtest run
+without protections, or :meth:`ExitSimulation.trades`) and, for any number of
+protection configurations, decides which trades would still have been
+opened:
+
+- trades are visited in time order; one whose pair (or the whole strategy)
+  is locked at its ``open_date`` is skipped and never counts towards later
+  protections,
+- every taken trade's exit evaluates the protections the way freqtrade does
+  after an exit, over the closed trades with ``close_date`` inside each
+  protection's lookback,
+- lock ends are rounded up to the next candle, as ``PairLocks`` does.
+
+Closed trades are kept in close order and every protection keeps its own
+sliding window over them (a start index plus running global and per-pair
+counts), so an exit costs O(1) amortized per protection; MaxDrawdown and
+LowProfitPairs walk their window only once their trade limit is reached.
+The replay is one numba kernel over all variants; without numba the same
+loop runs as plain Python.
+
+A skipped trade does not free its pair for the entries it would have blocked;
+those are not in the trade list. Exits are applied before entries on the same
+candle. ``only_per_side`` is not supported.
+"""
+
+from __future__ import annotations
+
+import itertools
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.exchange import timeframe_to_seconds
+
+from strategy_support._numba import njit
+
+COOLDOWN_PERIOD, STOPLOSS_GUARD, MAX_DRAWDOWN, LOW_PROFIT_PAIRS = 0, 1, 2, 3
+PROTECTION_METHODS = {
+    "CooldownPeriod": COOLDOWN_PERIOD,
+    "StoplossGuard": STOPLOSS_GUARD,
+    "MaxDrawdown": MAX_DRAWDOWN,
+    "LowProfitPairs": LOW_PROFIT_PAIRS,
+}
+STOP_EXIT_REASONS = ("stop_loss", "stoploss_on_exchange", "trailing_stop_loss", "liquidation")
+
+_SPEC_FIELDS = ("method", "lookback", "duration", "trade_limit", "threshold", "per_pair")
+
+
+def _minutes(protection: Mapping[str, Any], name: str, candle_minutes: int, default: int = 60) -> int:
+    if f"{name}_candles" in protection:
+        return int(protection[f"{name}_candles"]) * candle_minutes
+    return int(protection.get(name, default))
+
+
+def compile_protections(protections: Sequence[Mapping[str, Any]], timeframe: str) -> Dict[str, np.ndarray]:
+    """Kernel arrays (one entry per protection) for a freqtrade ``protections`` list."""
+    candle_minutes = timeframe_to_seconds(timeframe) // 60
+    spec = {field: [] for field in _SPEC_FIELDS}
+    for protection in protections:
+        method = protection["method"]
+        if method not in PROTECTION_METHODS:
+            raise ValueError(f"Unsupported protection: {method}")
+        if protection.get("only_per_side"):
+            raise ValueError(f"{method}: only_per_side is not supported")
+        duration = _minutes(protection, "stop_duration", candle_minutes)
+        code = PROTECTION_METHODS[method]
+        spec["method"].append(code)
+        # Cooldown looks back over its own stop duration.
+        lookback = duration if code == COOLDOWN_PERIOD else _minutes(protection, "lookback_period", candle_minutes)
+        spec["lookback"].append(lookback * 60)
+        spec["duration"].append(duration * 60)
+        spec["trade_limit"].append(int(protection.get("trade_limit", 10 if code == STOPLOSS_GUARD else 1)))
+        if code == MAX_DRAWDOWN:
+            spec["threshold"].append(float(protection.get("max_allowed_drawdown", 0.0)))
+        else:
+            spec["threshold"].append(float(protection.get("required_profit", 0.0)))
+        if code == STOPLOSS_GUARD:
+            spec["per_pair"].append(bool(protection.get("only_per_pair", False)))
+        else:
+            spec["per_pair"].append(code != MAX_DRAWDOWN)
+    return {
+        "method": np.array(spec["method"], dtype=np.int64),
+        "lookback": np.array(spec["lookback"], dtype=np.int64),
+        "duration": np.array(spec["duration"], dtype=np.int64),
+        "trade_limit": np.array(spec["trade_limit"], dtype=np.int64),
+        "threshold": np.array(spec["threshold"], dtype=np.float64),
+        "per_pair": np.array(spec["per_pair"], dtype=np.bool_),
+    }
+
+
+def stack_protections(variants: Sequence[Sequence[Mapping[str, Any]]], timeframe: str) -> Dict[str, np.ndarray]:
+    """``(variants x protections)`` kernel arrays, padded past each variant's ``counts``."""
+    compiled = [compile_protections(protections, timeframe) for protections in variants]
+    width = max((len(item["method"]) for item in compiled), default=0) or 1
+    out = {field: np.zeros((len(compiled), width), dtype=compiled[0][field].dtype if compiled else np.int64)
+           for field in _SPEC_FIELDS}
+    for index, item in enumerate(compiled):
+        for field in _SPEC_FIELDS:
+            out[field][index, : len(item[field])] = item[field]
+    out["counts"] = np.array([len(item["method"]) for item in compiled], dtype=np.int64)
+    return out
+
+
+def protection_grid(protections: Sequence[Mapping[str, Any]],
+                    grid: Mapping[str, Mapping[str, Sequence[Any]]]) -> List[List[Dict[str, Any]]]:
+    """
+    Every combination of ``grid`` applied to ``protections``.
+
+    ``grid`` maps a protection method to ``{setting: values}``, e.g.
+    ``{"StoplossGuard": {"lookback_period_candles": [60, 120], "trade_limit": [3, 4]}}``.
+    """
+    axes = [(method, setting, list(values)) for method, settings in grid.items() for setting, values in settings.items()]
+    variants = []
+    for combination in itertools.product(*(values for _, _, values in axes)):
+        variant = [dict(protection) for protection in protections]
+        for (method, setting, _), value in zip(axes, combination):
+            for protection in variant:
+                if protection["method"] == method:
+                    protection[setting] = value
+        variants.append(variant)
+    return variants
+
+
+@njit(cache=True)
+def _window_drawdown(closed, start, stop, profits):
+    cumulative = 0.0
+    high = -np.inf
+    drawdown = 0.0
+    for position in range(start, stop):
+        cumulative += profits[closed[position]]
+        high = max(high, cumulative)
+        drawdown = max(drawdown, high - cumulative)
+    return drawdown
+
+
+@njit(cache=True)
+def _window_pair_profit(closed, start, stop, pair_ids, pair, profits):
+    # Summed fresh in close order: a running sum would drift from the per-candle sum at the threshold.
+    total = 0.0
+    for position in range(start, stop):
+        if pair_ids[closed[position]] == pair:
+            total += profits[closed[position]]
+    return total
+
+
+@njit(cache=True)
+def _replay_kernel(events, pair_ids, open_times, close_times, profits, stop_exits, pairs, step,
+                   methods, lookbacks, durations, limits, thresholds, per_pair, counts, taken):
+    trades = len(pair_ids)
+    width = methods.shape[1]
+    for variant in range(len(counts)):
+        protections = counts[variant]
+        pair_locks = np.zeros(pairs, dtype=np.int64)
+        global_lock = np.int64(0)
+        closed = np.empty(trades, dtype=np.int64)
+        closed_count = 0
+        starts = np.zeros(width, dtype=np.int64)
+        window_count = np.zeros(width, dtype=np.int64)
+        window_hits = np.zeros(width, dtype=np.int64)
+        last_hit = np.zeros(width, dtype=np.int64)
+        pair_count = np.zeros((width, pairs), dtype=np.int64)
+        pair_hits = np.zeros((width, pairs), dtype=np.int64)
+        pair_last_hit = np.zeros((width, pairs), dtype=np.int64)
+        for event in events:
+            trade = event >> 1
+            pair = pair_ids[trade]
+            if event & 1 == 1:
+                taken[variant, trade] = max(pair_locks[pair], global_lock) <= open_times[trade]
+                continue
+            if not taken[variant, trade]:
+                continue
+            now = close_times[trade]
+            closed[closed_count] = trade
+            closed_count += 1
+            for index in range(protections):
+                method = methods[variant, index]
+                threshold = thresholds[variant, index]
+                # StoplossGuard only counts losing stop exits; the others count every trade.
+                hit = method != STOPLOSS_GUARD or (
+                    stop_exits[trade] and profits[trade] != 0.0 and profits[trade] < threshold
+                )
+                window_count[index] += 1
+                pair_count[index, pair] += 1
+                if hit:
+                    window_hits[index] += 1
+                    pair_hits[index, pair] += 1
+                    last_hit[index] = now
+                    pair_last_hit[index, pair] = now
+                horizon = now - lookbacks[variant, index]
+                while starts[index] < closed_count and close_times[closed[starts[index]]] <= horizon:
+                    old = closed[starts[index]]
+                    old_pair = pair_ids[old]
+                    window_count[index] -= 1
+                    pair_count[index, old_pair] -= 1
+                    if method != STOPLOSS_GUARD or (
+                        stop_exits[old] and profits[old] != 0.0 and profits[old] < threshold
+                    ):
+                        window_hits[index] -= 1
+                        pair_hits[index, old_pair] -= 1
+                    starts[index] += 1
+
+                until = np.int64(0)
+                limit = limits[variant, index]
+                if method == COOLDOWN_PERIOD:
+                    until = now + durations[variant, index]
+                elif method == STOPLOSS_GUARD:
+                    if per_pair[variant, index]:
+                        if pair_hits[index, pair] >= limit:
+                            until = pair_last_hit[index, pair] + durations[variant, index]
+                    elif window_hits[index] >= limit:
+                        until = last_hit[index] + durations[variant, index]
+                elif method == MAX_DRAWDOWN:
+                    if window_count[index] >= limit:
+                        drawdown = _window_drawdown(closed, starts[index], closed_count, profits)
+                        if drawdown > threshold:
+                            until = now + durations[variant, index]
+                elif pair_count[index, pair] >= limit:
+                    if _window_pair_profit(closed, starts[index], closed_count, pair_ids, pair, profits) < threshold:
+                        until = now + durations[variant, index]
+                if until <= now:
+                    continue
+                # PairLocks ends a lock at the start of the candle after ``until``.
+                until = (until // step + 1) * step
+                if per_pair[variant, index]:
+                    pair_locks[pair] = max(pair_locks[pair], until)
+                else:
+                    global_lock = max(global_lock, until)
+
+
+def _epoch_seconds(dates) -> np.ndarray:
+    return dates.dt.as_unit("s").astype("int64").to_numpy()
+
+
+class ProtectionReplay:
+    """Which trades each protection variant lets through (``taken``, ``(variants x trades)``)."""
+
+    def __init__(self, trades: DataFrame, variants: Sequence[Sequence[Mapping[str, Any]]], taken: np.ndarray):
+        self.trades = trades
+        self.variants = [list(variant) for variant in variants]
+        self.taken = taken
+
+    def __len__(self) -> int:
+        return len(self.variants)
+
+    def taken_trades(self, index: int) -> DataFrame:
+        return self.trades[self.taken[index]].reset_index(drop=True)
+
+    def summary(self) -> DataFrame:
+        """One row per variant: trades taken and blocked, winrate, summed profit and max drawdown."""
+        profits = np.where(self.taken, self.trades["profit_ratio"].to_numpy(dtype=np.float64)[None, :], 0.0)
+        taken = self.taken.sum(axis=1)
+        wins = (self.taken & (profits > 0)).sum(axis=1)
+        # Trades are in open order; drawdown follows close order.
+        order = np.argsort(_epoch_seconds(self.trades["close_date"]), kind="stable")
+        equity = np.cumsum(profits[:, order], axis=1)
+        drawdown = (np.maximum.accumulate(np.maximum(equity, 0.0), axis=1) - equity).max(axis=1, initial=0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return DataFrame(
+                {
+                    "trades": taken,
+                    "blocked": self.taken.shape[1] - taken,
+                    "winrate": np.where(taken > 0, wins / taken, np.nan),
+                    "profit_sum": profits.sum(axis=1),
+                    "max_drawdown": drawdown,
+                }
+            )
+
+
+def replay_protections(trades: DataFrame, variants: Sequence[Sequence[Mapping[str, Any]]],
+                       timeframe: str) -> ProtectionReplay:
+    """
+    Apply each protection list in ``variants`` to ``trades``.
+
+    ``trades`` needs ``pair``, ``open_date``, ``close_date``, ``profit_ratio``
+    and ``exit_reason`` (the columns of a freqtrade backtest export);
+    ``timeframe`` is the strategy's candle timeframe.
+    """
+    trades = trades.sort_values(["open_date", "pair"], kind="stable", ignore_index=True)
+    step = timeframe_to_seconds(timeframe)
+    pair_ids, _ = trades["pair"].factorize()
+    open_times = _epoch_seconds(trades["open_date"])
+    close_times = _epoch_seconds(trades["close_date"])
+    profits = trades["profit_ratio"].to_numpy(dtype=np.float64)
+    stop_exits = trades["exit_reason"].isin(STOP_EXIT_REASONS).to_numpy()
+
+    # Event codes: trade index * 2, +1 for entries. At equal times exits come first, except that a
+    # trade closing on its entry candle exits after its own entry.
+    indices = np.arange(len(trades), dtype=np.int64)
+    times = np.concatenate([close_times, open_times])
+    codes = np.concatenate([indices * 2, indices * 2 + 1])
+    ranks = np.concatenate([np.where(close_times == open_times, 2, 0), np.ones(len(trades), dtype=np.int64)])
+    events = codes[np.lexsort((ranks, times))]
+
+    spec = stack_protections(variants, timeframe)
+    taken = np.zeros((len(variants), len(trades)), dtype=np.bool_)
+    _replay_kernel(
+        events, pair_ids.astype(np.int64), open_times, close_times, profits, stop_exits,
+        int(pair_ids.max(initial=-1)) + 1, np.int64(step), spec["method"], spec["lookback"], spec["duration"],
+        spec["trade_limit"], spec["threshold"], spec["per_pair"], spec["counts"], taken,
+    )
+    return ProtectionReplay(trades, variants, taken)
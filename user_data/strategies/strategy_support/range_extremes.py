@@ -0,0 +1,105 @@
+"""
+Any-window rolling max/min from one precomputed index.
+
+S4 sweeps ``breakout_window`` over 20-100 candles, and each new window used to
+rescan ``high.rolling(window).max()`` / ``low.rolling(window).min()`` from
+scratch. :class:`RangeExtremeIndex` is a sparse table: level ``k`` holds the
+extreme of every run of ``2**k`` consecutive values, built in
+O(n log max_window). The extreme of any window ``w <= max_window`` ending at a
+row is then the extreme of two overlapping level-``floor(log2 w)`` runs, so a
+whole rolling column costs two array slices and one element-wise
+``maximum``/``minimum``.
+
+Results equal ``Series.rolling(window).max()/min()`` with the default
+``min_periods``: windows that are incomplete or contain a NaN yield NaN.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from strategy_support.indicator_cache import frame_signature
+
+
+class RangeExtremeIndex:
+    """Sparse table of running maxima (or minima) of ``values`` for windows up to ``max_window``."""
+
+    def __init__(self, values: np.ndarray, max_window: int, maximum: bool = True):
+        values = np.asarray(values, dtype=np.float64)
+        self.max_window = int(max_window)
+        if self.max_window < 1:
+            raise ValueError("max_window must be at least 1")
+        self.maximum = maximum
+        self._rows = len(values)
+        self._combine = np.maximum if maximum else np.minimum
+        # NaN-skipping combine while building; windows touching a NaN are blanked at query time.
+        combine = np.fmax if maximum else np.fmin
+        self._levels = [values]
+        span = 1
+        while span * 2 <= self.max_window and span * 2 <= self._rows:
+            previous = self._levels[-1]
+            self._levels.append(combine(previous[:-span], previous[span:]))
+            span *= 2
+        nans = np.isnan(values)
+        self._nan_counts = np.concatenate([[0], np.cumsum(nans)]) if nans.any() else None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def rolling(self, window: int) -> np.ndarray:
+        """Rolling extreme over ``window`` rows ending at each row."""
+        window = int(window)
+        if not 1 <= window <= self.max_window:
+            raise ValueError(f"window must be within [1, {self.max_window}], got {window}")
+        rows = self._rows
+        out = np.full(rows, np.nan)
+        if window > rows:
+            return out
+        level = window.bit_length() - 1
+        span = 1 << level
+        table = self._levels[level]
+        count = rows - window + 1
+        result = self._combine(table[:count], table[window - span: window - span + count])
+        if self._nan_counts is not None:
+            has_nan = self._nan_counts[window:] - self._nan_counts[:-window] > 0
+            result = np.where(has_nan, np.nan, result)
+        out[window - 1:] = result
+        return out
+
+
+class RangeExtremeCache:
+    """
+    Per-strategy :class:`RangeExtremeIndex` per (pair, column, direction).
+
+    An index is rebuilt only when the pair's frame moves to a new candle or a
+    larger ``max_window`` is requested.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, bool], Tuple[Tuple, RangeExtremeIndex]] = {}
+
+    def index(self, pair: str, dataframe: DataFrame, column: str, max_window: int,
+              maximum: bool = True) -> RangeExtremeIndex:
+        key = (pair, column, maximum)
+        signature = frame_signature(dataframe)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != signature or entry[1].max_window < max_window:
+            entry = (signature, RangeExtremeIndex(dataframe[column].to_numpy(dtype=np.float64), max_window, maximum))
+            self._entries[key] = entry
+        return entry[1]
+
+    def rolling_max(self, pair: str, dataframe: DataFrame, column: str, window: int,
+                    max_window: Optional[int] = None) -> np.ndarray:
+        """``dataframe[column].rolling(window).max()`` served from the pair's index."""
+        return self.index(pair, dataframe, column, max_window or window, True).rolling(window)
+
+    def rolling_min(self, pair: str, dataframe: DataFrame, column: str, window: int,
+                    max_window: Optional[int] = None) -> np.ndarray:
+        """``dataframe[column].rolling(window).min()`` served from the pair's index."""
+        return self.index(pair, dataframe, column, max_window or window, False).rolling(window)
+
+    def reset(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,176 @@
+"""
+Sliding-window rolling quantiles for the capital-state and event filters.
+
+``Series.rolling(w).quantile(q)`` is called several times per analysis in S5,
+S6 and S7, each time over the same window of the same column. This module
+computes any number of quantiles of one window in a single pass.
+
+The window is kept as a sorted order-statistics array: each candle locates the
+leaving and the arriving value by binary search (O(log w)) and shifts the
+contiguous block between them, after which every quantile is an O(1) index.
+For the 96-120 row windows used here this beats pointer-based trees and
+pandas' skiplist. The batch kernel is compiled with numba when available and
+otherwise falls back to a chunked NumPy sort of the sliding windows;
+:class:`RollingQuantiles` applies the same scheme with ``bisect`` for live,
+one-candle-at-a-time updates.
+
+All paths use pandas' ``interpolation="linear"`` rule verbatim,
+``v[i] + (v[i + 1] - v[i]) * (q * (nobs - 1) - i)``, NaNs are excluded from
+the window and ``min_periods`` defaults to the window, so results equal
+pandas bit-for-bit.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from collections import deque
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import Series
+
+from strategy_support._numba import HAVE_NUMBA, njit
+
+ArrayLike = Union[Series, np.ndarray, Sequence[float]]
+
+
+@njit(cache=True)
+def _sorted_window_quantiles(values, window, quantiles, min_periods):
+    n = values.shape[0]
+    out = np.full((quantiles.shape[0], n), np.nan)
+    ordered = np.empty(window)
+    nobs = 0
+    for i in range(n):
+        if i >= window:
+            old = values[i - window]
+            if not np.isnan(old):
+                low = 0
+                high = nobs
+                while low < high:
+                    middle = (low + high) // 2
+                    if ordered[middle] < old:
+                        low = middle + 1
+                    else:
+                        high = middle
+                for k in range(low, nobs - 1):
+                    ordered[k] = ordered[k + 1]
+                nobs -= 1
+        value = values[i]
+        if not np.isnan(value):
+            low = 0
+            high = nobs
+            while low < high:
+                middle = (low + high) // 2
+                if ordered[middle] <= value:
+                    low = middle + 1
+                else:
+                    high = middle
+            for k in range(nobs, low, -1):
+                ordered[k] = ordered[k - 1]
+            ordered[low] = value
+            nobs += 1
+        if nobs == 0 or nobs < min_periods:
+            continue
+
+        for j in range(quantiles.shape[0]):
+            fraction_index = quantiles[j] * (nobs - 1)
+            index = np.int64(fraction_index)
+            if index == fraction_index:
+                out[j, i] = ordered[index]
+            else:
+                out[j, i] = ordered[index] + (ordered[index + 1] - ordered[index]) * (fraction_index - index)
+    return out
+
+
+def _numpy_rolling_quantiles(values: np.ndarray, window: int, quantiles: np.ndarray, min_periods: int,
+                             chunk_rows: int = 4096) -> np.ndarray:
+    n = len(values)
+    out = np.full((len(quantiles), n), np.nan)
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    windows = sliding_window_view(padded, window)
+    for start in range(0, n, chunk_rows):
+        block = np.sort(windows[start:start + chunk_rows], axis=1)  # NaNs sort last
+        rows = np.arange(len(block))
+        nobs = window - np.isnan(block).sum(axis=1)
+        valid = (nobs > 0) & (nobs >= min_periods)
+        for j, quantile in enumerate(quantiles):
+            fraction_index = quantile * (nobs - 1)
+            index = np.floor(fraction_index).astype(np.int64)
+            low = block[rows, np.clip(index, 0, window - 1)]
+            high = block[rows, np.clip(index + 1, 0, window - 1)]
+            with np.errstate(invalid="ignore"):
+                result = np.where(index == fraction_index, low, low + (high - low) * (fraction_index - index))
+            out[j, start:start + len(block)] = np.where(valid, result, np.nan)
+    return out
+
+
+def rolling_quantiles(values: ArrayLike, window: int, quantiles: Sequence[float],
+                      min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    Rolling ``quantiles`` of ``values`` over ``window`` rows in one pass.
+
+    Returns an array of shape ``(len(quantiles), len(values))``; row ``j``
+    equals ``Series(values).rolling(window, min_periods).quantile(quantiles[j])``.
+    """
+    window = int(window)
+    min_periods = window if min_periods is None else int(min_periods)
+    data = np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+    qs = np.asarray(quantiles, dtype=np.float64)
+    if np.any((qs < 0) | (qs > 1)):
+        raise ValueError("quantiles must be within [0, 1]")
+    if len(data) == 0:
+        return np.empty((len(qs), 0))
+    if HAVE_NUMBA:
+        return _sorted_window_quantiles(data, window, qs, min_periods)
+    return _numpy_rolling_quantiles(data, window, qs, min_periods)
+
+
+def rolling_quantile_series(series: Series, window: int, quantile: float, min_periods: Optional[int] = None) -> Series:
+    """Drop-in for ``series.rolling(window, min_periods).quantile(quantile)``."""
+    values = rolling_quantiles(series.to_numpy(dtype=np.float64), window, (quantile,), min_periods)[0]
+    return Series(values, index=series.index, name=series.name)
+
+
+class RollingQuantiles:
+    """Incremental rolling quantiles for live use: ``update`` appends one value and returns every quantile."""
+
+    def __init__(self, window: int, quantiles: Sequence[float], min_periods: Optional[int] = None):
+        self.window = int(window)
+        self.quantiles = tuple(float(q) for q in quantiles)
+        self.min_periods = self.window if min_periods is None else int(min_periods)
+        self._values: deque = deque()
+        self._sorted: list = []
+
+    def update(self, value: float) -> tuple:
+        self._values.append(value)
+        if not math.isnan(value):
+            bisect.insort(self._sorted, value)
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if not math.isnan(old):
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+        return self.current()
+
+    def extend(self, values: ArrayLike) -> tuple:
+        result = tuple(math.nan for _ in self.quantiles)
+        for value in np.asarray(values, dtype=np.float64)[-self.window:]:
+            result = self.update(float(value))
+        return result
+
+    def current(self) -> tuple:
+        nobs = len(self._sorted)
+        if nobs == 0 or nobs < self.min_periods:
+            return tuple(math.nan for _ in self.quantiles)
+        result = []
+        for quantile in self.quantiles:
+            fraction_index = quantile * (nobs - 1)
+            index = int(fraction_index)
+            low = self._sorted[index]
+            if index == fraction_index:
+                result.append(low)
+            else:
+                high = self._sorted[index + 1]
+                result.append(low + (high - low) * (fraction_index - index))
+        return tuple(result)
@@ -0,0 +1,113 @@
+"""
+Parameter-keyed caching for ``minimal_roi`` and ``protections``.
+
+Both used to be plain ``@property`` methods that built new dicts/lists (and,
+for ROI, ``str(int(...))`` keys from hyperopt parameter values) on every
+access, while freqtrade reads ``minimal_roi`` for every open trade on every
+candle.
+
+:func:`parameter_property` turns such a method into a cached attribute that
+is rebuilt only when one of the named hyperopt parameters changes value.
+:func:`roi_property` does the same for ``minimal_roi`` and compiles the table
+into a :class:`RoiTable`: an int-keyed, sorted dict (the form freqtrade
+normalizes ``minimal_roi`` to) that also carries its breakpoints as NumPy
+arrays for bisect and vectorized lookups. freqtrade's own ROI lookup reads
+the cached table, so nothing in ``IStrategy`` is overridden.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+class RoiTable(dict):
+    """``{minutes: roi}`` sorted by minutes, plus compiled breakpoints."""
+
+    def __init__(self, table: Mapping[Any, float]):
+        items = sorted((int(minutes), float(roi)) for minutes, roi in table.items())
+        super().__init__(items)
+        self._minutes = [minutes for minutes, _ in items]
+        self._rois = [roi for _, roi in items]
+        self.breakpoints = np.array(self._minutes, dtype=np.int64)
+        self.rois = np.array(self._rois, dtype=np.float64)
+
+    def same_schedule(self, other: "RoiTable") -> bool:
+        return self._minutes == other._minutes and self._rois == other._rois
+
+    def lookup(self, trade_duration: float) -> Tuple[Optional[int], Optional[float]]:
+        """Latest breakpoint at or before ``trade_duration`` minutes and its ROI, or ``(None, None)``."""
+        index = bisect_right(self._minutes, trade_duration) - 1
+        if index < 0:
+            return None, None
+        return self._minutes[index], self._rois[index]
+
+    def roi_at(self, trade_durations: np.ndarray) -> np.ndarray:
+        """Vectorized :meth:`lookup` of the ROI; NaN before the first breakpoint."""
+        index = np.searchsorted(self.breakpoints, np.asarray(trade_durations), side="right") - 1
+        rois = self.rois[np.maximum(index, 0)] if len(self.rois) else np.full(np.shape(index), np.nan)
+        return np.where(index >= 0, rois, np.nan)
+
+
+class _ParameterCached:
+    def __init__(self, build: Callable[[Any], Any], parameters: Tuple[str, ...]):
+        self._build = build
+        self._parameters = parameters
+        self.__doc__ = build.__doc__
+
+    def __set_name__(self, owner, name: str) -> None:
+        self._slot = f"_{name}_cached"
+
+    def _key(self, instance) -> Tuple[Any, ...]:
+        return tuple(getattr(instance, parameter).value for parameter in self._parameters)
+
+    def _compile(self, value: Any) -> Any:
+        return value
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        key = self._key(instance)
+        cached = instance.__dict__.get(self._slot)
+        if cached is None or cached[0] != key:
+            cached = (key, self._compile(self._build(instance)))
+            instance.__dict__[self._slot] = cached
+        return cached[1]
+
+
+class _RoiCached(_ParameterCached):
+    def _compile(self, value: Any) -> RoiTable:
+        return RoiTable(value)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        override = instance.__dict__.get(self._slot + "_override")
+        if override is not None:
+            return override
+        return super().__get__(instance, owner)
+
+    def __set__(self, instance, value: Mapping[Any, float]) -> None:
+        # freqtrade re-assigns minimal_roi with int keys after loading; that must not freeze the
+        # parameter-driven table. Only a genuinely different table (config, roi space) overrides it.
+        table = RoiTable(value)
+        if table.same_schedule(super().__get__(instance)):
+            instance.__dict__.pop(self._slot + "_override", None)
+        else:
+            instance.__dict__[self._slot + "_override"] = table
+
+
+def parameter_property(*parameters: str) -> Callable[[Callable[[Any], Any]], _ParameterCached]:
+    """Cache a strategy attribute until one of the named hyperopt ``parameters`` changes."""
+    def decorate(build: Callable[[Any], Any]) -> _ParameterCached:
+        return _ParameterCached(build, parameters)
+    return decorate
+
+
+def roi_property(*parameters: str) -> Callable[[Callable[[Any], Mapping[Any, float]]], _RoiCached]:
+    """:func:`parameter_property` for ``minimal_roi``, compiled into a :class:`RoiTable`."""
+    def decorate(build: Callable[[Any], Mapping[Any, float]]) -> _RoiCached:
+        return _RoiCached(build, parameters)
+    return decorate
@@ -0,0 +1,97 @@
+"""
+Batched evaluation of threshold-only buy parameters.
+
+Most buy-space parameters (``adx_min``, ``ema_gap_min`` and ``volume_mult`` in
+S1, ``zscore_threshold``/``rsi_low``/``rsi_high``/``adx_max`` in S2,
+``adx_min``/``rs_threshold`` in S6) only move comparison thresholds in
+``populate_entry_trend``; the indicators they are compared with never change.
+
+Strategies that support batching express their entry rules once, as a static
+``entry_signals(columns, params)`` over NumPy arrays, and declare the frame
+columns (``entry_signal_columns``) and parameters (``entry_signal_params``)
+it reads. ``populate_entry_trend`` calls it with scalar parameter values;
+:func:`evaluate_entry_signals` calls it with every parameter as a column
+vector, so NumPy broadcasting yields a ``(parameter sets x candles)`` boolean
+matrix per signal from one pass over the precomputed indicators.
+
+Parameters that change indicators (S6 ``momentum_window``) are not part of
+``entry_signal_params`` and stay at the strategy's current value.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+ParameterSet = Mapping[str, float]
+
+
+def shifted(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """``Series.shift(periods)`` for float arrays (NaN fill)."""
+    out = np.full(values.shape, np.nan)
+    if periods > 0:
+        out[..., periods:] = values[..., :-periods]
+    elif periods < 0:
+        out[..., :periods] = values[..., -periods:]
+    else:
+        out[...] = values
+    return out
+
+
+def signal_columns(dataframe: DataFrame, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Float arrays of the frame columns an ``entry_signals`` rule reads."""
+    return {column: dataframe[column].to_numpy(dtype=np.float64) for column in columns}
+
+
+def parameter_values(strategy, names: Sequence[str]) -> Dict[str, float]:
+    """Current ``.value`` of each named hyperopt parameter of ``strategy``."""
+    return {name: getattr(strategy, name).value for name in names}
+
+
+def stack_parameter_sets(param_sets: Sequence[ParameterSet], defaults: ParameterSet) -> Dict[str, np.ndarray]:
+    """``{name: (len(param_sets), 1) array}``; names missing from a set take their default."""
+    return {
+        name: np.array([params.get(name, default) for params in param_sets], dtype=np.float64)[:, None]
+        for name, default in defaults.items()
+    }
+
+
+def iter_entry_signals(strategy, dataframe: DataFrame, param_sets: Sequence[ParameterSet],
+                       chunk_size: int = 256) -> Iterator[Tuple[slice, Dict[str, np.ndarray]]]:
+    """
+    Yield ``(rows, {signal: bool matrix})`` for consecutive chunks of ``param_sets``.
+
+    Chunking bounds memory at ``chunk_size x len(dataframe)`` booleans per
+    signal; ``rows`` is the slice of ``param_sets`` the chunk covers.
+    """
+    unknown = {name for params in param_sets for name in params} - set(strategy.entry_signal_params)
+    if unknown:
+        raise ValueError(f"Parameters not supported by batched evaluation: {sorted(unknown)}")
+    columns = signal_columns(dataframe, strategy.entry_signal_columns)
+    defaults = parameter_values(strategy, strategy.entry_signal_params)
+    candles = len(dataframe)
+    for start in range(0, len(param_sets), chunk_size):
+        rows = slice(start, min(start + chunk_size, len(param_sets)))
+        params = stack_parameter_sets(param_sets[rows], defaults)
+        signals = strategy.entry_signals(columns, params)
+        sets = rows.stop - rows.start
+        yield rows, {name: np.broadcast_to(values, (sets, candles)) for name, values in signals.items()}
+
+
+def evaluate_entry_signals(strategy, dataframe: DataFrame, param_sets: Sequence[ParameterSet],
+                           chunk_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    ``{signal: (len(param_sets), len(dataframe)) bool array}`` for an analyzed frame.
+
+    Row ``i`` equals what ``populate_entry_trend`` would flag with the
+    parameters of ``param_sets[i]`` (unspecified ones at their current value).
+    """
+    out: Dict[str, np.ndarray] = {}
+    for rows, signals in iter_entry_signals(strategy, dataframe, param_sets, chunk_size or max(len(param_sets), 1)):
+        for name, values in signals.items():
+            if name not in out:
+                out[name] = np.empty((len(param_sets), len(dataframe)), dtype=bool)
+            out[name][rows] = values
+    return out
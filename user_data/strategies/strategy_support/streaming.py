@@ -0,0 +1,508 @@
+"""
+Incremental (O(1) per candle) indicator engine for ``process_only_new_candles`` strategies.
+
+Every indicator keeps just enough state to fold in one more candle. The update
+rules follow TA-Lib's own recurrences (SMA-seeded EMA, Wilder-smoothed
+ATR/RSI/ADX) and pandas' windowed add/remove kernels, so replaying the same
+history reproduces ``talib.abstract`` / ``Series.rolling`` output to floating
+point tolerance.
+
+:class:`IncrementalIndicatorEngine` tracks one state per pair. When the new
+frame continues the previous one by whole candles it only folds in the new
+rows; on the first call, after a data gap, or when the history no longer lines
+up it rebuilds the state by replaying the full frame.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from freqtrade.exchange import timeframe_to_seconds
+
+
+def is_live_runmode(dp) -> bool:
+    """True for dry-run/live bots, where frames advance one closed candle at a time."""
+    return dp is not None and getattr(dp.runmode, "value", None) in ("live", "dry_run")
+
+
+def _is_zero(value: float) -> bool:
+    # Same epsilon as TA-Lib's TA_IS_ZERO.
+    return -0.00000001 < value < 0.00000001
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(prev_close - high), abs(prev_close - low))
+
+
+class StreamingIndicator:
+    """Base class: ``update`` consumes one candle's source values and returns the new output."""
+
+    sources: Tuple[str, ...] = ("close",)
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def update(self, *values: float) -> float:
+        raise NotImplementedError
+
+
+class EMA(StreamingIndicator):
+    """TA-Lib EMA: seeded with the SMA of the first ``period`` values."""
+
+    def __init__(self, period: int, source: str = "close"):
+        self.period = int(period)
+        self.sources = (source,)
+        self._k = 2.0 / (self.period + 1)
+        self.reset()
+
+    def reset(self) -> None:
+        self._count = 0
+        self._seed = 0.0
+        self._value = math.nan
+
+    def update(self, value: float) -> float:
+        self._count += 1
+        if self._count < self.period:
+            self._seed += value
+            return math.nan
+        if self._count == self.period:
+            self._value = (self._seed + value) / self.period
+            return self._value
+        self._value = (value - self._value) * self._k + self._value
+        return self._value
+
+
+class ATR(StreamingIndicator):
+    """TA-Lib ATR: SMA of the first ``period`` true ranges, then Wilder smoothing."""
+
+    sources = ("high", "low", "close")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.reset()
+
+    def reset(self) -> None:
+        self._prev_close = math.nan
+        self._count = 0
+        self._seed = 0.0
+        self._value = math.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self._count == 0 and math.isnan(self._prev_close):
+            self._prev_close = close
+            return math.nan
+        true_range = _true_range(high, low, self._prev_close)
+        self._prev_close = close
+        self._count += 1
+        if self._count < self.period:
+            self._seed += true_range
+            return math.nan
+        if self._count == self.period:
+            self._value = (self._seed + true_range) / self.period
+            return self._value
+        self._value = (self._value * (self.period - 1) + true_range) / self.period
+        return self._value
+
+
+class RSI(StreamingIndicator):
+    """TA-Lib RSI (Wilder smoothing of average gain/loss)."""
+
+    def __init__(self, period: int = 14, source: str = "close"):
+        self.period = int(period)
+        self.sources = (source,)
+        self.reset()
+
+    def reset(self) -> None:
+        self._prev = math.nan
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def update(self, value: float) -> float:
+        if math.isnan(self._prev):
+            self._prev = value
+            return math.nan
+        diff = value - self._prev
+        self._prev = value
+        self._count += 1
+        if self._count <= self.period:
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            if self._count < self.period:
+                return math.nan
+            self._gain /= self.period
+            self._loss /= self.period
+        else:
+            self._gain *= self.period - 1
+            self._loss *= self.period - 1
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            self._gain /= self.period
+            self._loss /= self.period
+        total = self._gain + self._loss
+        return 0.0 if _is_zero(total) else 100.0 * (self._gain / total)
+
+
+class ADX(StreamingIndicator):
+    """TA-Lib ADX: Wilder-smoothed +DM/-DM/TR, DX averaged over ``period`` then smoothed."""
+
+    sources = ("high", "low", "close")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self.reset()
+
+    def reset(self) -> None:
+        self._prev: Optional[Tuple[float, float, float]] = None
+        self._bar = 0
+        self._plus_dm = 0.0
+        self._minus_dm = 0.0
+        self._tr = 0.0
+        self._dx_sum = 0.0
+        self._value = math.nan
+
+    def _dx(self) -> Optional[float]:
+        if _is_zero(self._tr):
+            return None
+        minus_di = 100.0 * (self._minus_dm / self._tr)
+        plus_di = 100.0 * (self._plus_dm / self._tr)
+        total = minus_di + plus_di
+        if _is_zero(total):
+            return None
+        return 100.0 * (abs(minus_di - plus_di) / total)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self._prev is None:
+            self._prev = (high, low, close)
+            return math.nan
+        prev_high, prev_low, prev_close = self._prev
+        self._prev = (high, low, close)
+        self._bar += 1
+        diff_plus = high - prev_high
+        diff_minus = prev_low - low
+        true_range = _true_range(high, low, prev_close)
+        period = self.period
+
+        if self._bar < period:
+            if diff_minus > 0 and diff_plus < diff_minus:
+                self._minus_dm += diff_minus
+            elif diff_plus > 0 and diff_plus > diff_minus:
+                self._plus_dm += diff_plus
+            self._tr += true_range
+            return math.nan
+
+        self._minus_dm -= self._minus_dm / period
+        self._plus_dm -= self._plus_dm / period
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self._minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self._plus_dm += diff_plus
+        self._tr = self._tr - self._tr / period + true_range
+        dx = self._dx()
+
+        if self._bar < 2 * period:
+            if dx is not None:
+                self._dx_sum += dx
+            if self._bar < 2 * period - 1:
+                return math.nan
+            self._value = self._dx_sum / period
+            return self._value
+        if dx is not None:
+            self._value = (self._value * (period - 1) + dx) / period
+        return self._value
+
+
+class ROC(StreamingIndicator):
+    """TA-Lib ROC: ``(value / value[t - period] - 1) * 100``."""
+
+    def __init__(self, period: int = 10, source: str = "close"):
+        self.period = int(period)
+        self.sources = (source,)
+        self.reset()
+
+    def reset(self) -> None:
+        self._window: deque = deque(maxlen=self.period + 1)
+
+    def update(self, value: float) -> float:
+        self._window.append(value)
+        if len(self._window) <= self.period:
+            return math.nan
+        previous = self._window[0]
+        return 0.0 if previous == 0 else (value / previous - 1.0) * 100.0
+
+
+class RollingMean(StreamingIndicator):
+    """``Series.rolling(window).mean()`` with pandas' compensated add/remove sum and result fix-ups."""
+
+    def __init__(self, window: int, source: str = "close"):
+        self.window = int(window)
+        self.sources = (source,)
+        self.reset()
+
+    def reset(self) -> None:
+        self._values: deque = deque()
+        self._nobs = 0
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._negatives = 0
+        self._same = 0
+        self._prev = math.nan
+
+    def _add(self, value: float) -> None:
+        if math.isnan(value):
+            return
+        self._nobs += 1
+        y = value - self._comp_add
+        t = self._sum + y
+        self._comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._negatives += 1
+        self._same = self._same + 1 if value == self._prev else 1
+        self._prev = value
+
+    def _remove(self, value: float) -> None:
+        if math.isnan(value):
+            return
+        self._nobs -= 1
+        y = -value - self._comp_remove
+        t = self._sum + y
+        self._comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, value) < 0:
+            self._negatives -= 1
+
+    def update(self, value: float) -> float:
+        # pandas drops the leaving value before adding the arriving one; the order changes the rounding.
+        if len(self._values) == self.window:
+            self._remove(self._values.popleft())
+        self._values.append(value)
+        self._add(value)
+        nobs = self._nobs
+        if nobs < self.window or nobs == 0:
+            return math.nan
+        if self._same >= nobs:
+            return self._prev
+        result = self._sum / nobs
+        if self._negatives == 0 and result < 0:
+            return 0.0
+        if self._negatives == nobs and result > 0:
+            return 0.0
+        return result
+
+
+class RollingStd(StreamingIndicator):
+    """``Series.rolling(window).std(ddof)`` using pandas' Welford add/remove updates."""
+
+    def __init__(self, window: int, source: str = "close", ddof: int = 1):
+        self.window = int(window)
+        self.sources = (source,)
+        self.ddof = int(ddof)
+        self.reset()
+
+    def reset(self) -> None:
+        self._values: deque = deque()
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._comp = 0.0
+
+    def _add(self, value: float) -> None:
+        nobs = len(self._values)
+        prev_mean = self._mean - self._comp
+        y = value - self._comp
+        t = y - self._mean
+        self._comp = t + self._mean - y
+        self._mean += t / nobs
+        self._ssqdm += (value - prev_mean) * (value - self._mean)
+
+    def _remove(self, value: float) -> None:
+        nobs = len(self._values)
+        if nobs == 0:
+            self._mean = self._ssqdm = self._comp = 0.0
+            return
+        prev_mean = self._mean - self._comp
+        y = value - self._comp
+        t = y - self._mean
+        self._comp = t + self._mean - y
+        self._mean -= t / nobs
+        self._ssqdm -= (value - prev_mean) * (value - self._mean)
+
+    def update(self, value: float) -> float:
+        if len(self._values) == self.window:
+            self._remove_oldest()
+        self._values.append(value)
+        self._add(value)
+        nobs = len(self._values)
+        if nobs < self.window or nobs <= self.ddof:
+            return math.nan
+        if self._ssqdm < 0:
+            self._ssqdm = 0.0
+        return math.sqrt(self._ssqdm / (nobs - self.ddof))
+
+    def _remove_oldest(self) -> None:
+        self._remove(self._values.popleft())
+
+
+class _RollingExtreme(StreamingIndicator):
+    _is_max = True
+
+    def __init__(self, window: int, source: str):
+        self.window = int(window)
+        self.sources = (source,)
+        self.reset()
+
+    def reset(self) -> None:
+        # Monotonic deque of (position, value); the front is the window extreme.
+        self._candidates: deque = deque()
+        self._position = -1
+
+    def update(self, value: float) -> float:
+        self._position += 1
+        candidates = self._candidates
+        if self._is_max:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+        candidates.append((self._position, value))
+        if candidates[0][0] <= self._position - self.window:
+            candidates.popleft()
+        if self._position + 1 < self.window:
+            return math.nan
+        return candidates[0][1]
+
+
+class RollingMax(_RollingExtreme):
+    """``Series.rolling(window).max()`` via a monotonic deque."""
+
+    _is_max = True
+
+    def __init__(self, window: int, source: str = "high"):
+        super().__init__(window, source)
+
+
+class RollingMin(_RollingExtreme):
+    """``Series.rolling(window).min()`` via a monotonic deque."""
+
+    _is_max = False
+
+    def __init__(self, window: int, source: str = "low"):
+        super().__init__(window, source)
+
+
+class _OutputBuffer:
+    """Append-only float buffer with amortized O(1) appends; ``tail`` copies the last rows out."""
+
+    def __init__(self, keep: int):
+        self._keep = max(int(keep), 1)
+        self._data = np.full(2 * self._keep, np.nan)
+        self._end = 0
+
+    def append(self, value: float) -> None:
+        if self._end == len(self._data):
+            self._data[: self._keep] = self._data[self._end - self._keep: self._end]
+            self._data[self._keep:] = np.nan
+            self._end = self._keep
+        self._data[self._end] = value
+        self._end += 1
+
+    def tail(self, rows: int) -> np.ndarray:
+        out = np.full(rows, np.nan)
+        available = min(rows, self._end)
+        if available:
+            out[rows - available:] = self._data[self._end - available: self._end]
+        return out
+
+
+class _PairState:
+    def __init__(self, indicators: Dict[str, StreamingIndicator], keep: int):
+        self.indicators = indicators
+        self.keep = keep
+        self.outputs = {name: _OutputBuffer(keep) for name in indicators}
+        self.last_date = None
+        self.rows = 0
+
+
+class IncrementalIndicatorEngine:
+    """
+    Per-pair streaming indicator state for one base timeframe.
+
+    ``factory`` returns a fresh ``{column: StreamingIndicator}`` mapping; it is
+    called once per pair and again whenever the state has to be rebuilt.
+    :meth:`update` returns ``{column: ndarray}`` aligned to the given frame.
+    """
+
+    def __init__(self, timeframe: str, factory: Callable[[], Dict[str, StreamingIndicator]],
+                 keep_rows: int = 1000):
+        self.timeframe = timeframe
+        self.factory = factory
+        self.keep_rows = int(keep_rows)
+        self._step = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self._states: Dict[str, _PairState] = {}
+        self.full_recomputes = 0
+        self.incremental_updates = 0
+
+    def reset(self, pair: Optional[str] = None) -> None:
+        if pair is None:
+            self._states.clear()
+        else:
+            self._states.pop(pair, None)
+
+    def update(self, pair: str, dataframe: DataFrame) -> Dict[str, np.ndarray]:
+        rows = len(dataframe)
+        state = self._states.get(pair)
+        if rows == 0:
+            return {name: np.empty(0) for name in (state.indicators if state else self.factory())}
+
+        # Naive datetime64: tz-aware ``to_numpy()`` gives object arrays that searchsorted compares one by one.
+        dates = dataframe["date"].to_numpy(dtype="datetime64[ns]")
+        start = self._continuation_start(state, dates)
+        if start is None:
+            state = _PairState(self.factory(), max(self.keep_rows, rows))
+            self._states[pair] = state
+            start = 0
+            self.full_recomputes += 1
+        elif start < rows:
+            self.incremental_updates += 1
+
+        if start < rows:
+            self._fold(state, dataframe, start, rows)
+            state.last_date = dates[-1]
+        return {name: buffer.tail(rows) for name, buffer in state.outputs.items()}
+
+    def _continuation_start(self, state: Optional[_PairState], dates: np.ndarray) -> Optional[int]:
+        """Index of the first unseen row, or ``None`` if the state must be rebuilt."""
+        if state is None or state.last_date is None or len(dates) > state.keep:
+            return None
+        position = int(np.searchsorted(dates, state.last_date))
+        if position >= len(dates) or dates[position] != state.last_date:
+            return None
+        new_dates = dates[position:]
+        if len(new_dates) > 1 and np.any(np.diff(new_dates) != self._step):
+            # A missing candle would silently skew every recursive indicator.
+            return None
+        return position + 1
+
+    @staticmethod
+    def _fold(state: _PairState, dataframe: DataFrame, start: int, stop: int) -> None:
+        columns: Dict[str, np.ndarray] = {}
+        for indicator in state.indicators.values():
+            for source in indicator.sources:
+                if source not in columns:
+                    columns[source] = dataframe[source].to_numpy(dtype=float)[start:stop]
+        for row in range(stop - start):
+            for name, indicator in state.indicators.items():
+                value = indicator.update(*(columns[source][row] for source in indicator.sources))
+                state.outputs[name].append(value)
+        state.rows += stop - start
@@ -0,0 +1,332 @@
+"""
+In-memory index of closed trades for live protection checks.
+
+StoplossGuard, MaxDrawdown and LowProfitPairs look back 60-240 candles over
+closed trades and are evaluated continuously; with ten strategies on one
+account, filtering the whole trade history for every check adds up as the
+history grows. :class:`ClosedTradeIndex` keeps closed trades ordered by close
+time, once globally and once per pair, together with aggregates that are
+updated as trades are added:
+
+- close times, for O(log n) bisection of any lookback window,
+- prefix sums of ``close_profit``, for window profit in O(1),
+- stop exits with their profit, and per StoplossGuard ``required_profit``
+  the close times of those below it, for StoplossGuard counts,
+- a segment tree over the cumulative profit, for window max drawdown in
+  O(log n).
+
+:meth:`ClosedTradeIndex.lock_until` evaluates a freqtrade protection
+definition against the index with the same rules as
+:mod:`strategy_support.protection_simulator`.
+
+:class:`LiveProtections` enforces a strategy's protections through the index
+in dry-run/live bots: ``bot_start`` seeds it from the closed trades in the
+database and takes the protections away from freqtrade's own
+``ProtectionManager`` (built after ``bot_start``), and ``order_filled`` adds
+each closed trade and places the resulting locks with ``lock_pair``. Entries
+are then blocked by freqtrade's regular pair-lock checks.
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from freqtrade.exchange import timeframe_to_seconds
+from freqtrade.persistence import Trade
+
+from strategy_support.protection_simulator import STOP_EXIT_REASONS
+from strategy_support.streaming import is_live_runmode
+
+logger = logging.getLogger(__name__)
+
+Timestamp = Union[datetime, int, float]
+
+
+def _seconds(value: Timestamp) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+class _DropTree:
+    """Append-only segment tree of ``(max, min, max drop)`` over a value sequence."""
+
+    def __init__(self):
+        self._size = 1
+        self._count = 0
+        self._max = [float("-inf")] * 2
+        self._min = [float("inf")] * 2
+        self._drop = [0.0] * 2
+
+    def append(self, value: float) -> None:
+        if self._count == self._size:
+            values = [self._max[self._size + index] for index in range(self._count)]
+            self._size *= 2
+            self._max = [float("-inf")] * (2 * self._size)
+            self._min = [float("inf")] * (2 * self._size)
+            self._drop = [0.0] * (2 * self._size)
+            for index, item in enumerate(values):
+                self._set_leaf(index, item)
+            for node in range(self._size - 1, 0, -1):
+                self._pull(node)
+        self._set_leaf(self._count, value)
+        node = (self._size + self._count) // 2
+        while node:
+            self._pull(node)
+            node //= 2
+        self._count += 1
+
+    def _set_leaf(self, index: int, value: float) -> None:
+        leaf = self._size + index
+        self._max[leaf] = value
+        self._min[leaf] = value
+        self._drop[leaf] = 0.0
+
+    def _pull(self, node: int) -> None:
+        left, right = 2 * node, 2 * node + 1
+        self._max[node] = max(self._max[left], self._max[right])
+        self._min[node] = min(self._min[left], self._min[right])
+        self._drop[node] = max(self._drop[left], self._drop[right], self._max[left] - self._min[right])
+
+    def max_drop(self, start: int, stop: int) -> float:
+        """Largest ``values[i] - values[j]`` with ``start <= i <= j < stop``."""
+        left_parts, right_parts = [], []
+        low, high = start + self._size, stop + self._size
+        while low < high:
+            if low & 1:
+                left_parts.append(low)
+                low += 1
+            if high & 1:
+                high -= 1
+                right_parts.append(high)
+            low //= 2
+            high //= 2
+        drop, peak = 0.0, float("-inf")
+        for node in left_parts + right_parts[::-1]:
+            drop = max(drop, self._drop[node], peak - self._min[node])
+            peak = max(peak, self._max[node])
+        return drop
+
+
+class _TradeSeries:
+    __slots__ = ("times", "prefix", "stops", "stop_times", "cumulative")
+
+    def __init__(self):
+        self.times: List[int] = []
+        self.prefix: List[float] = [0.0]
+        self.stops: List[Tuple[int, float]] = []
+        self.stop_times: Dict[float, List[int]] = {}
+        self.cumulative = _DropTree()
+
+    def append(self, close_time: int, profit: float, stop: bool) -> None:
+        self.times.append(close_time)
+        self.prefix.append(self.prefix[-1] + profit)
+        self.cumulative.append(self.prefix[-1])
+        # freqtrade's StoplossGuard skips stop exits that closed at exactly zero profit.
+        if stop and profit != 0.0:
+            self.stops.append((close_time, profit))
+            for threshold, times in self.stop_times.items():
+                if profit < threshold:
+                    times.append(close_time)
+
+    def stops_below(self, threshold: float) -> List[int]:
+        """Close times of the stop exits with ``close_profit`` below ``threshold``; built on first use."""
+        times = self.stop_times.get(threshold)
+        if times is None:
+            times = self.stop_times[threshold] = [time for time, profit in self.stops if profit < threshold]
+        return times
+
+    def start(self, since: int) -> int:
+        return bisect_right(self.times, since)
+
+
+class ClosedTradeIndex:
+    """
+    Closed trades per pair and globally, ordered by close time.
+
+    Windows are ``(since, now]`` in epoch seconds (datetimes are accepted), as
+    freqtrade selects trades with ``close_date`` after the lookback start.
+    Trades are expected in close-time order (a late one rebuilds the index);
+    :meth:`add_trade` skips trades it has already seen.
+    """
+
+    def __init__(self):
+        self._global = _TradeSeries()
+        self._pairs: Dict[str, _TradeSeries] = {}
+        self._rows: List[tuple] = []
+        self._seen: set = set()
+
+    def __len__(self) -> int:
+        return len(self._global.times)
+
+    def add(self, pair: str, close_date: Timestamp, profit: float, exit_reason: Optional[str] = None) -> None:
+        close_time = _seconds(close_date)
+        if self._global.times and close_time < self._global.times[-1]:
+            self._rebuild_with(pair, close_time, profit, exit_reason)
+            return
+        profit = float(profit or 0.0)
+        stop = str(exit_reason) in STOP_EXIT_REASONS
+        self._rows.append((close_time, pair, profit, exit_reason))
+        self._global.append(close_time, profit, stop)
+        self._pairs.setdefault(pair, _TradeSeries()).append(close_time, profit, stop)
+
+    def _rebuild_with(self, pair: str, close_time: int, profit: float, exit_reason: Optional[str]) -> None:
+        # Late arrivals are rare (restarts, manual closes); rebuild rather than complicate appends.
+        rows = list(self._rows)
+        insort(rows, (close_time, pair, float(profit or 0.0), exit_reason), key=lambda row: row[0])
+        self._global = _TradeSeries()
+        self._pairs = {}
+        self._rows = []
+        for row_time, row_pair, row_profit, row_reason in rows:
+            self.add(row_pair, row_time, row_profit, row_reason)
+
+    def add_trade(self, trade) -> bool:
+        """Add a closed freqtrade ``Trade``; returns False for open or already indexed trades."""
+        key = getattr(trade, "id", None) or id(trade)
+        if key in self._seen or getattr(trade, "is_open", False) or trade.close_date is None:
+            return False
+        self._seen.add(key)
+        self.add(trade.pair, trade.close_date_utc, trade.close_profit, trade.exit_reason)
+        return True
+
+    def _series(self, pair: Optional[str]) -> Optional[_TradeSeries]:
+        return self._global if pair is None else self._pairs.get(pair)
+
+    def count(self, since: Timestamp, pair: Optional[str] = None) -> int:
+        series = self._series(pair)
+        return 0 if series is None else len(series.times) - series.start(_seconds(since))
+
+    def profit(self, since: Timestamp, pair: Optional[str] = None) -> float:
+        """Summed ``close_profit`` of the window."""
+        series = self._series(pair)
+        if series is None:
+            return 0.0
+        return series.prefix[-1] - series.prefix[series.start(_seconds(since))]
+
+    def losing_stops(self, since: Timestamp, pair: Optional[str] = None, required_profit: float = 0.0) -> int:
+        """Stop-type exits in the window with a nonzero ``close_profit`` below ``required_profit``."""
+        series = self._series(pair)
+        if series is None:
+            return 0
+        times = series.stops_below(required_profit)
+        return len(times) - bisect_right(times, _seconds(since))
+
+    def last_close(self, pair: Optional[str] = None, stops_only: bool = False,
+                   required_profit: float = 0.0) -> Optional[int]:
+        """Latest close time; with ``stops_only``, of the stop exits :meth:`losing_stops` counts."""
+        series = self._series(pair)
+        if series is None:
+            return None
+        times = series.stops_below(required_profit) if stops_only else series.times
+        return times[-1] if times else None
+
+    def max_drawdown(self, since: Timestamp, pair: Optional[str] = None) -> float:
+        """
+        Max drawdown of the window's cumulative ``close_profit``.
+
+        Measured from the first trade of the window on, as freqtrade's
+        ``calculate_max_drawdown`` does for MaxDrawdown.
+        """
+        series = self._series(pair)
+        if series is None:
+            return 0.0
+        start = series.start(_seconds(since))
+        return series.cumulative.max_drop(start, len(series.times))
+
+    def lock_until(self, protection: Mapping[str, Any], now: Timestamp, timeframe: str,
+                   pair: Optional[str] = None) -> Optional[int]:
+        """
+        End (epoch seconds, before candle rounding) of the lock ``protection`` places at ``now``, or None.
+
+        ``pair`` is the pair whose trade just closed; per-pair protections
+        need it, global ones (MaxDrawdown, StoplossGuard without
+        ``only_per_pair``) ignore it.
+        """
+        candle = timeframe_to_seconds(timeframe)
+        now = _seconds(now)
+
+        def seconds(name: str) -> int:
+            if f"{name}_candles" in protection:
+                return int(protection[f"{name}_candles"]) * candle
+            return int(protection.get(name, 60)) * 60
+
+        method = protection["method"]
+        duration = seconds("stop_duration")
+        if method == "CooldownPeriod":
+            last = self.last_close(pair)
+            return last + duration if last is not None and last > now - duration else None
+        since = now - seconds("lookback_period")
+        if method == "StoplossGuard":
+            scope = pair if protection.get("only_per_pair", False) else None
+            required = float(protection.get("required_profit", 0.0))
+            if self.losing_stops(since, scope, required) < int(protection.get("trade_limit", 10)):
+                return None
+            return self.last_close(scope, stops_only=True, required_profit=required) + duration
+        if method == "MaxDrawdown":
+            if self.count(since) < int(protection.get("trade_limit", 1)):
+                return None
+            if self.max_drawdown(since) <= float(protection.get("max_allowed_drawdown", 0.0)):
+                return None
+            return self.last_close() + duration
+        if method == "LowProfitPairs":
+            if self.count(since, pair) < int(protection.get("trade_limit", 1)):
+                return None
+            if self.profit(since, pair) >= float(protection.get("required_profit", 0.0)):
+                return None
+            return self.last_close(pair) + duration
+        raise ValueError(f"Unsupported protection: {method}")
+
+
+class LiveProtections:
+    """
+    A strategy's protections, evaluated on a :class:`ClosedTradeIndex` and enforced with pair locks.
+
+    Create it with :meth:`attach` from ``bot_start`` and call
+    :meth:`trade_closed` from ``order_filled``. Locks of per-pair protections
+    (CooldownPeriod, LowProfitPairs, StoplossGuard with ``only_per_pair``) go
+    on the closed trade's pair, the others on ``"*"``; freqtrade rounds their
+    ends up to the next candle, as it does for its own protections.
+    """
+
+    def __init__(self, protections: List[Mapping[str, Any]], timeframe: str):
+        self.protections = [dict(protection) for protection in protections]
+        self.timeframe = timeframe
+        self.index = ClosedTradeIndex()
+
+    @classmethod
+    def attach(cls, strategy) -> Optional["LiveProtections"]:
+        """
+        Take over ``strategy.protections`` in dry-run/live; None in other runmodes.
+
+        Seeds the index from the database's closed trades and leaves an empty
+        protection list for freqtrade's ``ProtectionManager``.
+        """
+        if not is_live_runmode(strategy.dp) or not strategy.protections:
+            return None
+        protections = cls(strategy.protections, strategy.timeframe)
+        closed = Trade.get_trades_proxy(is_open=False)
+        for trade in sorted(closed, key=lambda trade: trade.close_date_utc):
+            protections.index.add_trade(trade)
+        strategy.protections = []
+        logger.info("Enforcing %d protections from %d indexed closed trades",
+                    len(protections.protections), len(protections.index))
+        return protections
+
+    def trade_closed(self, strategy, trade, current_time: datetime) -> None:
+        """Index ``trade`` once it is closed and lock what its protections call for."""
+        if not self.index.add_trade(trade):
+            return
+        for protection in self.protections:
+            until = self.index.lock_until(protection, current_time, self.timeframe, trade.pair)
+            if until is None:
+                continue
+            method = protection["method"]
+            per_pair = method in ("CooldownPeriod", "LowProfitPairs") or (
+                method == "StoplossGuard" and protection.get("only_per_pair", False))
+            strategy.lock_pair(trade.pair if per_pair else "*", datetime.fromtimestamp(until, tz=timezone.utc),
+                               reason=method)